@@ -1,11 +1,39 @@
 # app/__init__.py
+import time
+
 from flask import Flask
 def create_app(config_object=None):
     app = Flask(__name__)
 
+    # orjson-backed (when installed), compact JSON for every response
+    from .fastjson import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     if config_object:
         app.config.from_object(config_object)
 
+    # ---- Metrics at /metrics (app/metrics.py); off: no hooks at all ----
+    metrics = None
+    if app.config.get("METRICS_ENABLED", True):
+        from .metrics import Metrics
+        metrics = app.extensions["metrics"] = Metrics()
+
+    # ---- Storage engine (json / memory / sqlite, see app/backends.py) ----
+    # instrumented before a lazy load starts, so that load is timed as well
+    from .backends import create_backend
+    started = time.perf_counter()
+    app.extensions["storage"] = create_backend(
+        app.config, instrument=metrics.instrument_storage if metrics is not None else None)
+    open_seconds = time.perf_counter() - started
+
+    # ---- Change notifications for /api/events subscribers ----
+    from .events import EventHub, EVENT_QUEUE_SIZE, MAX_SUBSCRIBERS
+    app.extensions["events"] = EventHub(
+        queue_size=app.config.get("EVENT_QUEUE_SIZE", EVENT_QUEUE_SIZE),
+        max_subscribers=app.config.get("MAX_EVENT_SUBSCRIBERS", MAX_SUBSCRIBERS),
+    )
+    app.extensions["storage"].add_listener(app.extensions["events"].publish)
+
     # ---- Register API blueprint CLEANLY ----
     try:
         from .routes import bp as api_bp
@@ -16,9 +44,28 @@ def create_app(config_object=None):
     if "api" not in app.blueprints:
         app.register_blueprint(api_bp, url_prefix="/api")
 
-    # Health check route (used by some tests)
+    # ---- Request and encoding metrics, and the /metrics routes ----
+    if metrics is not None:
+        from .metrics import init_app as init_metrics
+        init_metrics(app, open_seconds=open_seconds)
+
+    # ---- Negotiated zstd / br / gzip for large responses (app/compression.py) ----
+    # registered after metrics so that response sizes are measured compressed
+    if app.config.get("COMPRESSION_ENABLED", True):
+        from .compression import init_app as init_compression
+        init_compression(app)
+
+    # Liveness: the process is up and serving (used by some tests)
     @app.route("/health")
     def health():
         return {"status": "ok"}
 
+    # Readiness: 503 until the storage engine has finished loading, so a
+    # load balancer only routes traffic here once every request is fast
+    @app.route("/ready")
+    def ready():
+        if not app.extensions["storage"].is_ready():
+            return {"status": "loading"}, 503
+        return {"status": "ready"}
+
     return app
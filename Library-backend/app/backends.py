@@ -0,0 +1,188 @@
+# app/backends.py
+"""
+Storage backend interface and registry.
+
+Every engine (JSON file, in-memory, SQLite) implements StorageBackend.
+create_app() builds the engine named by the STORAGE_BACKEND config key and
+registers it as app.extensions["storage"]; routes only talk to that object.
+"""
+
+ITEM_FIELDS = ("title", "item_type", "author_or_director", "is_available", "expected_available_date")
+
+
+class StorageBackend:
+    """
+    The operations the API needs from a storage engine.
+    Items are plain dicts with an int "id", an int "version" plus ITEM_FIELDS.
+
+    Every mutation bumps a monotonically increasing catalog version and
+    stamps it on the items it writes. Together with `epoch` (a random token
+    identifying this catalog's lineage, so a wiped or different store never
+    reuses version numbers) that makes cheap, strong HTTP validators.
+
+    Committed mutations are reported to listeners (see add_listener) as a
+    list of events, {"op": "put", "item": item} or
+    {"op": "del", "id": id, "version": version}, in version order.
+    """
+
+    epoch = ""
+    _listeners = ()
+
+    def add_listener(self, callback):
+        """Call `callback(events)` after every mutation this process commits."""
+        self._listeners = self._listeners + (callback,)
+
+    def _notify(self, events):
+        for callback in self._listeners:
+            callback(events)
+
+    def version(self):
+        """The current catalog version."""
+        raise NotImplementedError
+
+    def get_items(self, name=None, item_type=None):
+        """All items in id order, optionally filtered by exact name / type."""
+        raise NotImplementedError
+
+    def get_page(self, limit, after=None, name=None, item_type=None):
+        """Up to `limit` items with id > `after`, plus the id to resume from."""
+        raise NotImplementedError
+
+    def search(self, query, name=None, item_type=None, limit=50):
+        """Ranked title/author search with prefix matching."""
+        raise NotImplementedError
+
+    def get_unavailable(self, due_before=None, name=None, item_type=None):
+        """
+        Unavailable items ordered by expected_available_date, then id; those
+        without a date come last. With `due_before` (a datetime.date), only
+        the items due strictly before that day. Optional exact name / type filters.
+        """
+        raise NotImplementedError
+
+    def get_changes(self, since):
+        """
+        What changed after catalog version `since`: (items created or updated,
+        ids deleted, current version). None when `since` is older than the
+        engine's change history (or from the future), i.e. the caller has to
+        resync from a full listing.
+        """
+        raise NotImplementedError
+
+    def get_item(self, item_id):
+        raise NotImplementedError
+
+    def add_item(self, data):
+        raise NotImplementedError
+
+    def add_items(self, batch):
+        """Create several items, persisting them in a single step."""
+        raise NotImplementedError
+
+    def update_item(self, item_id, data):
+        """Apply the ITEM_FIELDS present in `data`; None if there is no such item."""
+        raise NotImplementedError
+
+    def delete_item(self, item_id):
+        """True if the item existed."""
+        raise NotImplementedError
+
+    def update_items(self, updates):
+        """
+        Apply several updates, each a dict with the item "id" plus the
+        ITEM_FIELDS to change, in one transaction persisted in a single step.
+        Returns the updated items in order; None (and nothing is changed)
+        if any id does not exist.
+        """
+        raise NotImplementedError
+
+    def delete_items(self, item_ids):
+        """
+        Delete several items in one transaction persisted in a single step.
+        Returns the ids that existed (and are now deleted).
+        """
+        raise NotImplementedError
+
+    def iter_items(self, batch_size=1000):
+        """
+        Yield every item in id order, one page at a time.
+        Safe to consume slowly (e.g. from a streaming response) while the
+        store is being modified, since each page resumes from the last id.
+        """
+        after = None
+        while True:
+            page, after = self.get_page(batch_size, after=after)
+            yield from page
+            if after is None:
+                return
+
+    def compact(self):
+        """Engine-specific housekeeping (fold logs into the main file)."""
+
+    def close(self):
+        """Flush and release files / connections."""
+
+    def start(self):
+        """
+        Start background work (JsonStorage's lazy load). create_backend()
+        calls it once the engine is instrumented, so that work is timed too.
+        """
+
+    def is_ready(self):
+        """
+        False while the engine is still loading in the background; requests
+        then either wait for it or are answered from a partial view.
+        """
+        return True
+
+
+def _json_backend(config):
+    from .storage import DURABILITY, JsonStorage
+    return JsonStorage(
+        config.get("STORAGE_FILE", "library.json"),
+        journal=config.get("STORAGE_JOURNAL", True),
+        shared=config.get("STORAGE_SHARED", True),
+        durability=config.get("STORAGE_DURABILITY", DURABILITY),
+        lazy=config.get("STORAGE_LAZY_LOAD", True),
+        start=False,
+    )
+
+
+def _memory_backend(config):
+    from .storage import MemoryStorage
+    return MemoryStorage()
+
+
+def _sqlite_backend(config):
+    from .sqlite_storage import SqliteStorage, database_path
+    return SqliteStorage(database_path(config.get("SQLALCHEMY_DATABASE_URI", "library.db")))
+
+
+# name -> factory(config); extend with register_backend()
+BACKENDS = {
+    "json": _json_backend,
+    "memory": _memory_backend,
+    "sqlite": _sqlite_backend,
+}
+
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+
+def create_backend(config, instrument=None):
+    """
+    Build the engine named by config["STORAGE_BACKEND"] (default "json").
+    `instrument(engine)`, if given, runs before the engine starts any
+    background work.
+    """
+    engine = config.get("STORAGE_BACKEND", "json")
+    try:
+        factory = BACKENDS[engine]
+    except KeyError:
+        raise RuntimeError(f"Unknown STORAGE_BACKEND: {engine}")
+    storage = factory(config)
+    if instrument is not None:
+        instrument(storage)
+    storage.start()
+    return storage
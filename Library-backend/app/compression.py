@@ -0,0 +1,138 @@
+# app/compression.py
+"""
+Negotiated response compression, registered by init_app().
+
+zstd and brotli are offered when their packages are installed (zstandard,
+brotli); gzip (stdlib zlib) always is. The client's Accept-Encoding
+q-values decide, ties go to the first of CODECS. Only text-like bodies are
+compressed (never Server-Sent Events), and buffered ones only from
+COMPRESS_MIN_SIZE bytes on, below which compressing costs more than it
+saves. Streamed bodies are compressed chunk by chunk, each chunk flushed,
+so the client can decode what arrived without waiting for the rest.
+
+A compressed response keeps its ETag, made weak: the bytes differ from the
+identity encoding but the content does not, and If-None-Match is compared
+weakly (routes._conditional), so either tag revalidates.
+"""
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESS_MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv")
+
+
+class _Gzip:
+    def __init__(self, level=6):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, level=4):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level=3):
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._c.flush()
+
+
+# Content-Encoding -> compressor, in order of preference
+CODECS = {}
+if zstandard is not None:
+    CODECS["zstd"] = _Zstd
+if brotli is not None:
+    CODECS["br"] = _Brotli
+CODECS["gzip"] = _Gzip
+
+
+def negotiate(accept_encodings):
+    """The Content-Encoding to use for a request's Accept-Encoding, or None."""
+    return accept_encodings.best_match(list(CODECS))
+
+
+def compress(data, encoding):
+    """`data` compressed in one go."""
+    compressor = CODECS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks, flushing after each one."""
+    compressor = CODECS[encoding]()
+    try:
+        for chunk in chunks:
+            out = compressor.compress(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def init_app(app):
+    """Compress the app's eligible responses for clients that accept it."""
+    min_size = app.config.get("COMPRESS_MIN_SIZE", COMPRESS_MIN_SIZE)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough
+                or "Content-Encoding" in response.headers):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None or response.status_code != 200:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -7,5 +7,8 @@ load_dotenv()
 
 class Config:
 	SECRET_KEY = os.environ.get('SECRET_KEY', 'devkey')
+	STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json')
+	STORAGE_FILE = os.environ.get('STORAGE_FILE', 'library.json')
+	STORAGE_DURABILITY = os.environ.get('STORAGE_DURABILITY', 'async')
 	SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', f"sqlite:///{os.path.join(os.path.abspath(os.path.dirname(__file__)), '..', 'library.db')}")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
@@ -0,0 +1,85 @@
+# app/due_index.py
+"""
+Index of unavailable items by expected_available_date.
+
+Dates are parsed once, when an item enters the index, into day ordinals.
+They sit in a column (array) kept sorted by (day, id), parallel to a
+column of item ids. "Due before D" is then a single bisection of the day
+column and a slice of the id column. Unavailable items without a usable
+date are kept apart and listed after the dated ones.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import date
+
+
+def due_ordinal(value):
+    """The day ordinal of an ISO date string ("YYYY-MM-DD[...]"), else None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+class DueIndex:
+    def __init__(self):
+        self._days = array("l")
+        self._ids = array("q")
+        self._undated = set()
+        self._pending = None      # (day, id) pairs collected by bulk()
+
+    def __len__(self):
+        return len(self._ids) + len(self._undated)
+
+    def clear(self):
+        self._days = array("l")
+        self._ids = array("q")
+        self._undated.clear()
+
+    @contextmanager
+    def bulk(self):
+        """Collect add()s and sort them once at the end (index rebuilds)."""
+        self._pending = list(zip(self._days, self._ids))
+        try:
+            yield
+        finally:
+            pending, self._pending = sorted(self._pending), None
+            self._days = array("l", (day for day, _ in pending))
+            self._ids = array("q", (item_id for _, item_id in pending))
+
+    def _position(self, day, item_id):
+        lo = bisect_left(self._days, day)
+        hi = bisect_right(self._days, day, lo)
+        return bisect_left(self._ids, item_id, lo, hi)
+
+    def add(self, item_id, expected_date):
+        day = due_ordinal(expected_date)
+        if day is None:
+            self._undated.add(item_id)
+        elif self._pending is not None:
+            self._pending.append((day, item_id))
+        else:
+            pos = self._position(day, item_id)
+            self._days.insert(pos, day)
+            self._ids.insert(pos, item_id)
+
+    def remove(self, item_id, expected_date):
+        day = due_ordinal(expected_date)
+        if day is None:
+            self._undated.discard(item_id)
+            return
+        pos = self._position(day, item_id)
+        if pos < len(self._ids) and self._days[pos] == day and self._ids[pos] == item_id:
+            del self._days[pos]
+            del self._ids[pos]
+
+    def due_before(self, day):
+        """Ids due strictly before the date `day`, earliest first."""
+        return self._ids[:bisect_left(self._days, day.toordinal())].tolist()
+
+    def all(self):
+        """Every id, by due date, then the undated ones by id."""
+        return self._ids.tolist() + sorted(self._undated)
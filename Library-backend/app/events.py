@@ -0,0 +1,79 @@
+# app/events.py
+"""
+In-process fan-out of storage change events to /api/events subscribers.
+
+The storage engine calls EventHub.publish() with every committed batch of
+changes. Each subscriber owns a bounded queue; publishing never blocks, and
+a subscriber whose queue overflows is dropped (its stream ends and the
+client reconnects, catching up from the changes feed). Waiting subscribers
+sleep on a condition variable, so an idle stream costs no CPU.
+"""
+import threading
+from collections import deque
+
+EVENT_QUEUE_SIZE = 1000     # events buffered per subscriber before it is dropped
+MAX_SUBSCRIBERS = 1000
+
+
+class Subscription:
+    def __init__(self, hub, maxsize):
+        self._hub = hub
+        self._maxsize = maxsize
+        self._events = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self.dropped = False
+
+    def _offer(self, events):
+        """Queue `events`; False (and the queue is discarded) on overflow."""
+        with self._cond:
+            if len(self._events) + len(events) > self._maxsize:
+                self.dropped = True
+                self._events.clear()
+            else:
+                self._events.extend(events)
+            self._cond.notify()
+            return not self.dropped
+
+    def get(self, timeout):
+        """Every queued event, waiting up to `timeout` seconds for the first."""
+        with self._cond:
+            if not self._events and not self.dropped:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE, max_subscribers=MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        """A new Subscription, or None when the hub is full."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self, self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events):
+        """Hand a batch of change events to every subscriber without blocking."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription._offer(events):
+                self.unsubscribe(subscription)
@@ -0,0 +1,66 @@
+# app/fastjson.py
+"""
+JSON encoding used for API responses and on-disk files.
+
+Uses orjson when it is installed (several times faster than the stdlib and
+produces bytes directly), otherwise falls back to a compact stdlib encoder.
+Output is always compact (no indentation, no key sorting) and dict keys may
+be ints, as in the in-memory item store.
+"""
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps_bytes(obj, default=None):
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    if default is None:
+        return _encoder.encode(obj).encode("utf-8")
+    return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj, default=None):
+    """Compact JSON text."""
+    return dumps_bytes(obj, default).decode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by dumps_bytes/loads. jsonify() responses are
+    built straight from the encoded bytes, without an intermediate str.
+    Debug mode or an explicit compact=False still pretty-prints.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, default=self.default) + b"\n", mimetype=self.mimetype)
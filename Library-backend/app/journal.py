@@ -0,0 +1,132 @@
+# app/journal.py
+"""
+Append-only mutation log used by the journaled storage mode.
+
+Every mutation is written as one compact JSON line. Lines are flushed to the
+OS immediately (so they survive a process crash); when they are fsync'd is
+up to the caller (JsonStorage's durability mode). sync() may run on another
+thread than the appends, so a writer thread can sync a burst of appends at
+once while they continue.
+
+`offset` is the byte position just past the last complete record read or
+written, which lets a reader pick up only what was appended since (e.g. by
+another worker process).
+"""
+import os
+import threading
+
+from . import fastjson
+from .persistence import write_atomic
+
+
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self.records = 0          # records written since the last truncate
+        self.offset = 0           # end of the last complete record
+        self._fh = None
+        self._dirty = False       # written but not yet fsync'd
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fh is None:
+            self._fh = open(self.path, "ab")
+        return self._fh
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def append(self, record):
+        """Append one record (flushed to the OS, not fsync'd)."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Append several records with a single write."""
+        data = b"".join(fastjson.dumps_bytes(r) + b"\n" for r in records)
+        with self._lock:
+            fh = self._open()
+            if os.fstat(fh.fileno()).st_size != self.offset:
+                # drop a torn tail left by a crash so new records stay readable
+                fh.truncate(self.offset)
+            fh.write(data)
+            fh.flush()
+            self._dirty = True
+        self.offset += len(data)
+        self.records += len(records)
+
+    def sync(self):
+        """Force every record appended so far to disk."""
+        with self._lock:
+            if self._fh is None or not self._dirty:
+                return
+            self._dirty = False
+            # fsync a duplicate so appends can go on meanwhile
+            fd = os.dup(self._fh.fileno())
+        try:
+            os.fsync(fd)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+        finally:
+            os.close(fd)
+
+    def replay(self, start=0):
+        """
+        Yield every record from byte `start` on, in order.
+        A torn final line (crash mid-append) is ignored.
+        """
+        if start == 0:
+            self.records = 0
+        self.offset = start
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = fastjson.loads(line)
+                except ValueError:
+                    break
+                self.offset += len(line)
+                self.records += 1
+                yield record
+
+    def truncate(self):
+        """Drop every record; called once they are folded into a snapshot."""
+        self.close()
+        with open(self.path, "wb") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.records = 0
+        self.offset = 0
+
+    def drop_through(self, offset):
+        """
+        Drop the records before byte `offset` (folded into a snapshot taken
+        at that point) and keep those appended since. The file is replaced
+        atomically, so a crash leaves either the old journal or the new one.
+        """
+        if offset >= self.offset:
+            self.truncate()
+            return
+        self.close()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            tail = f.read(self.offset - offset)
+        write_atomic(self.path, tail)
+        self.records = tail.count(b"\n")
+        self.offset = len(tail)
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
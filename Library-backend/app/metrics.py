@@ -0,0 +1,236 @@
+# app/metrics.py
+"""
+Request, storage and serialization metrics, served at /metrics in the
+Prometheus text format.
+
+init_app() registers everything in one go:
+  - per-route request latency and response size histograms (Flask hooks)
+  - latency of every storage operation, by wrapping the engine's methods
+    on the instance (including JsonStorage's _save_to_disk / _load and
+    its writer-thread _flush / _compact_in_background). create_app() has
+    create_backend() do this before the engine starts a lazy load, and
+    passes the Metrics on in app.extensions["metrics"]
+  - startup as operation="open": the time create_app() took to build the
+    engine. A lazily loading JSON store only maps its snapshot then; the
+    full load that follows on a thread is timed as operation="load"
+  - time spent encoding jsonify() responses
+  - optionally, cProfile on a sample of requests (PROFILE_SAMPLE_RATE)
+    handed to PROFILE_HOOK, or aggregated per route at /metrics/profile;
+    one request at a time, others picked meanwhile are not profiled
+
+Observing is a bisection and a few increments under a lock. With
+METRICS_ENABLED = False, create_app() does not call init_app and requests
+pay nothing. Counters are per process: under several workers each one
+reports its own. Streaming responses (/events, /items/export) are timed
+to their first byte and have no size.
+"""
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+STORAGE_OPERATIONS = (
+    "get_items", "get_page", "search", "get_unavailable", "get_changes", "get_item",
+    "add_item", "add_items", "update_item", "update_items", "delete_item", "delete_items",
+    "compact", "_save_to_disk", "_load", "_flush", "_compact_in_background",
+)
+PROFILE_TOP = 40            # functions listed per route at /metrics/profile
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Held while a sampled request is profiled. From Python 3.12 cProfile sits on
+# sys.monitoring, which takes one profiler per process: enabling a second
+# raises ValueError, so concurrent requests go unprofiled instead.
+_profiling = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound):
+    return repr(float(bound)) if isinstance(bound, float) else f"{bound}.0"
+
+
+class Histogram:
+    """One Prometheus histogram metric, with a series per combination of label values."""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}          # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, values, amount):
+        slot = bisect_left(self.buckets, amount)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((values, list(series)) for values, series in self._series.items())
+        for values, series in snapshot:
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(self.labels, values))
+            prefix = labels + "," if labels else ""
+            total = 0
+            for bound, count in zip(self.buckets, series):
+                total += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{_format_bound(bound)}"}} {total}')
+            total += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {total}')
+            braces = f"{{{labels}}}" if labels else ""
+            lines.append(f"{self.name}_sum{braces} {series[-1]!r}")
+            lines.append(f"{self.name}_count{braces} {total}")
+        return "\n".join(lines)
+
+
+class Metrics:
+    def __init__(self):
+        self.requests = Histogram(
+            "library_http_request_duration_seconds", "Time to handle a request, by route.",
+            ("route", "method", "status"), DURATION_BUCKETS)
+        self.response_size = Histogram(
+            "library_http_response_size_bytes", "Response body size, by route.",
+            ("route", "method"), SIZE_BUCKETS)
+        self.storage = Histogram(
+            "library_storage_operation_duration_seconds", "Time spent in storage engine operations.",
+            ("operation",), DURATION_BUCKETS)
+        self.json_encode = Histogram(
+            "library_json_encode_duration_seconds", "Time spent encoding JSON responses.",
+            (), DURATION_BUCKETS)
+        self.histograms = (self.requests, self.response_size, self.storage, self.json_encode)
+
+    def timed(self, histogram, values, fn):
+        """`fn` wrapped to record its duration in `histogram` under `values`."""
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(values, time.perf_counter() - started)
+
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def instrument_storage(self, storage):
+        """Time the engine's operations (those it has) from now on."""
+        for name in STORAGE_OPERATIONS:
+            method = getattr(storage, name, None)
+            if method is not None:
+                setattr(storage, name, self.timed(self.storage, (name.lstrip("_"),), method))
+
+    def render(self):
+        return "\n".join(h.render() for h in self.histograms) + "\n"
+
+
+class ProfileStore:
+    """Default PROFILE_HOOK: profiles aggregated per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}           # route -> pstats.Stats
+
+    def __call__(self, route, profiler):
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                self._stats[route] = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+
+    def report(self, route=None, top=PROFILE_TOP):
+        out = io.StringIO()
+        with self._lock:
+            for name in sorted(self._stats):
+                if route is None or name == route:
+                    out.write(f"==== {name}\n")
+                    self._stats[name].stream = out
+                    self._stats[name].sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_app(app, open_seconds=None):
+    """
+    Instrument `app` and add the /metrics routes. The storage engine is
+    instrumented here unless app.extensions["metrics"] already holds the
+    Metrics that did it.
+    """
+    metrics = app.extensions.get("metrics")
+    if metrics is None:
+        metrics = app.extensions["metrics"] = Metrics()
+        metrics.instrument_storage(app.extensions["storage"])
+    if open_seconds is not None:
+        metrics.storage.observe(("open",), open_seconds)
+    app.json.response = metrics.timed(metrics.json_encode, (), app.json.response)
+
+    sample_rate = app.config.get("PROFILE_SAMPLE_RATE", 0.0)
+    profile_hook = app.config.get("PROFILE_HOOK") or ProfileStore()
+    app.extensions["profile_hook"] = profile_hook
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        if sample_rate and random.random() < sample_rate and _profiling.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:      # a profiler outside this module is active
+                _profiling.release()
+            else:
+                g.profiler = profiler
+
+    @app.after_request
+    def record(response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        route = _route()
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _profiling.release()
+            profile_hook(route, profiler)
+        metrics.requests.observe((route, request.method, str(response.status_code)),
+                                 time.perf_counter() - started)
+        size = response.content_length
+        if size is not None and not response.is_streamed:
+            metrics.response_size.observe((route, request.method), size)
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        # after_request is skipped when a request fails outright
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _profiling.release()
+
+    @app.get("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+    @app.get("/metrics/profile")
+    def profile_endpoint():
+        if not isinstance(profile_hook, ProfileStore):
+            return Response("Profiles go to the configured PROFILE_HOOK\n", status=404, mimetype="text/plain")
+        return Response(profile_hook.report(request.args.get("route")), mimetype="text/plain")
+
+    return metrics
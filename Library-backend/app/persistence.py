@@ -0,0 +1,156 @@
+# app/persistence.py
+"""
+Crash-safe file writes and the background writer thread used by JsonStorage.
+
+Files are never rewritten in place: new contents go to a temp file in the
+same directory, which is fsync'd and then renamed over the old one, so a
+crash leaves either the old file or the new one, never a truncated mix.
+
+BackgroundWriter takes disk I/O off the request path. Callers request a
+flush and carry on; requests made while a flush runs are coalesced into the
+next one, so a burst of mutations costs a single write and fsync.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# failed flushes remembered for callers still waiting on them
+FAILURE_HISTORY = 16
+
+
+def fsync_directory(path):
+    """Make a rename inside the directory `path` durable (no-op where unsupported)."""
+    flags = getattr(os, "O_DIRECTORY", None)
+    if flags is None:
+        return
+    fd = os.open(path or ".", os.O_RDONLY | flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp(path, data):
+    """Write `data` to a new fsync'd temp file next to `path`; returns its name."""
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return tmp
+
+
+def install(tmp, path):
+    """Atomically replace `path` with the temp file `tmp`."""
+    os.replace(tmp, path)
+    fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def write_atomic(path, data):
+    """Replace the contents of `path` with `data` so a crash never leaves a partial file."""
+    install(write_temp(path, data), path)
+
+
+class BackgroundWriter:
+    """
+    Runs `flush()` on a daemon thread whenever work has been requested,
+    waiting `delay` seconds first so that more requests can pile up.
+
+    request() returns a ticket; wait(ticket) blocks until a flush that
+    started after that request has finished and re-raises its error, which
+    is how group commit shares one fsync between every waiting request.
+    The thread starts on the first request (also after a fork) and close()
+    runs a last flush for whatever is still pending.
+    """
+
+    def __init__(self, flush, delay=0.0, name="storage-writer"):
+        self._flush = flush
+        self.delay = delay
+        self.name = name
+        self._cond = threading.Condition()
+        self._requested = 0     # latest ticket handed out
+        self._done = 0          # every ticket up to this one has been flushed
+        self._failures = []     # (first ticket, last ticket, exception)
+        self._closing = False
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # caller holds self._cond
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def request(self):
+        """Ask for a flush covering everything done so far; returns its ticket."""
+        with self._cond:
+            self._requested += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+            return self._requested
+
+    @property
+    def pending(self):
+        with self._cond:
+            return self._requested - self._done
+
+    def wait(self, ticket, timeout=None):
+        """Block until `ticket` is flushed; raise the flush's error if it failed."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._done >= ticket, timeout):
+                raise TimeoutError(f"{self.name}: flush not finished after {timeout}s")
+            for first, last, error in self._failures:
+                if first <= ticket <= last:
+                    raise error
+
+    def drain(self, timeout=None):
+        """Wait for every flush requested so far."""
+        with self._cond:
+            ticket = self._requested
+        self.wait(ticket, timeout)
+
+    def close(self):
+        """Flush what is pending and stop the thread (it restarts on the next request)."""
+        with self._cond:
+            thread = self._thread if self._pid == os.getpid() else None
+            self._closing = True
+            self._cond.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._cond:
+            self._thread = None
+            self._closing = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._requested > self._done or self._closing)
+                if self._requested == self._done:
+                    return
+                closing = self._closing
+            if self.delay and not closing:
+                time.sleep(self.delay)
+            with self._cond:
+                first, last = self._done + 1, self._requested
+            error = None
+            try:
+                self._flush()
+            except Exception as exc:
+                log.exception("%s: flush failed", self.name)
+                error = exc
+            with self._cond:
+                self._done = last
+                if error is not None:
+                    self._failures.append((first, last, error))
+                    del self._failures[:-FAILURE_HISTORY]
+                self._cond.notify_all()
@@ -1,47 +1,548 @@
 # app/routes.py
-from flask import Blueprint, request, jsonify
-from . import storage
+import base64
+import json
+from datetime import date
+from itertools import islice
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from . import fastjson
+from .backends import ITEM_FIELDS
 
 bp = Blueprint("api", __name__)      # <-- NAME MUST BE "api"
 
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SEARCH_LIMIT = 50
+BULK_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 10000      # operations accepted by one PATCH / batch-delete request
+MAX_REPORTED_ERRORS = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK = 500          # items encoded per chunk of a streamed list
+EVENT_KEEPALIVE = 5.0       # seconds between keepalives / checks for other workers' commits
+EVENT_RETRY_MS = 3000       # client reconnect delay announced on /events
+ITEM_KEYS = ("id", "version") + ITEM_FIELDS
+
+
+def _store():
+    """The storage engine selected for this app in create_app()."""
+    return current_app.extensions["storage"]
+
+
+def _conditional(etag, build, weak=False):
+    """
+    Answer If-None-Match with a bodiless 304 when `etag` still matches;
+    otherwise call `build()` for the full response. Either way, tag it,
+    as W/"..." when `weak` (the body is not pinned to one version).
+    The comparison is weak: compressed responses carry the tag as W/"..."
+    too (see compression.py).
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+    if response.status_code in (200, 304):
+        response.set_etag(etag, weak=weak)
+    return response
+
+
+def _encode_cursor(after):
+    raw = json.dumps({"after": after}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """Return the id encoded in an opaque cursor, or None if it is invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after = json.loads(raw)["after"]
+    except Exception:
+        return None
+    return after if isinstance(after, int) else None
+
+
+def _parse_limit(default):
+    """?limit= as an int within bounds, or None if it is invalid."""
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        return None
+    return limit if 1 <= limit <= MAX_PAGE_SIZE else None
+
+
+def _parse_fields():
+    """?fields= as a list of keys (None if absent), and an error message if invalid."""
+    if not request.args.get("fields"):
+        return None, None
+    fields = [f.strip() for f in request.args["fields"].split(",") if f.strip()]
+    unknown = [f for f in fields if f not in ITEM_KEYS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    return fields, None
+
+
+def _project(items, fields):
+    if not fields:
+        return items
+    return [{k: item.get(k) for k in fields} for item in items]
+
+
+def _stream_list(items, fields):
+    """
+    A JSON array response encoded and sent STREAM_CHUNK items at a time:
+    the first bytes leave before the whole list is serialized, and the
+    full body never sits in memory.
+    """
+    def generate():
+        iterator = iter(items)
+        opening = b"["
+        while True:
+            batch = _project(list(islice(iterator, STREAM_CHUNK)), fields)
+            if not batch:
+                break
+            yield opening + fastjson.dumps_bytes(batch)[1:-1]
+            opening = b","
+        yield b"[]\n" if opening == b"[" else b"]\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
 @bp.get("/items")
 def get_items():
     """
     GET /api/items
     Optional query params:
-      - name : exact-name search
-      - type : filter by item type
+      - q      : ranked full-text/prefix search on title and author
+                 (limit caps the number of hits; the response stays a list)
+      - available  : true / false; unavailable items are listed by
+                     expected date (a list; limit caps it)
+      - due_before : YYYY-MM-DD; unavailable items due strictly before it
+      - name   : exact-name search
+      - type   : filter by item type
+      - fields : comma-separated subset of item keys to return
+      - limit  : page size; switches the response to {"items", "next_cursor",
+                 "version", "epoch"}, where version (read before the page)
+                 is a safe `since` for /items/changes
+      - cursor : next_cursor from the previous page
+    Without limit / cursor the whole (filtered) list is streamed in chunks.
+    """
+    # the body is a pure function of the URL and the catalog version, so the
+    # version alone validates it and a match skips the query entirely. A
+    # streamed list is read while it is sent and may include later writes,
+    # so its tag is weak. Bad params are a 400 whatever the client has cached.
+    store = _store()
+    error, build = _list_items(store)
+    if error is not None:
+        return error
+    return _conditional(f"{store.epoch}-{store.version()}", build, weak=_streams_list())
+
+
+def _streams_list():
+    """Whether GET /items answers with the whole list, streamed (_stream_list)."""
+    args = request.args
+    return not args.get("q") and not any(k in args for k in ("available", "due_before", "limit", "cursor"))
+
+
+def _list_items(store):
+    """
+    Validate the GET /items params: (error response, None) if they are
+    bad, else (None, build) where build() makes the response.
     """
     name = request.args.get("name")
     item_type = request.args.get("type")
-    items = storage.get_items(name=name, item_type=item_type)
+
+    fields, error = _parse_fields()
+    if error:
+        return (jsonify({"error": error}), 400), None
+
+    if "available" in request.args or "due_before" in request.args:
+        return _list_by_availability(store, name, item_type, fields)
+
+    if request.args.get("q"):
+        if "cursor" in request.args:
+            return (jsonify({"error": "Search results are not cursor-paginated"}), 400), None
+        limit = _parse_limit(DEFAULT_SEARCH_LIMIT)
+        if limit is None:
+            return (jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400), None
+        def search():
+            items = store.search(request.args["q"], name=name, item_type=item_type, limit=limit)
+            return jsonify(_project(items, fields))
+
+        return None, search
+
+    if _streams_list():
+        # unfiltered, read page by page while streaming (like /items/export);
+        # it may include changes made meanwhile, newer than the ETag's version
+        def stream():
+            if name or item_type:
+                return _stream_list(store.get_items(name=name, item_type=item_type), fields)
+            return _stream_list(store.iter_items(), fields)
+
+        return None, stream
+
+    limit = _parse_limit(DEFAULT_PAGE_SIZE)
+    if limit is None:
+        return (jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400), None
+
+    after = None
+    if request.args.get("cursor"):
+        after = _decode_cursor(request.args["cursor"])
+        if after is None:
+            return (jsonify({"error": "Invalid cursor"}), 400), None
+
+    def page():
+        version = store.version()
+        items, next_after = store.get_page(limit, after=after, name=name, item_type=item_type)
+        return jsonify({
+            "items": _project(items, fields),
+            "next_cursor": _encode_cursor(next_after) if next_after is not None else None,
+            "version": version,
+            "epoch": store.epoch,
+        })
+
+    return None, page
+
+
+def _list_by_availability(store, name, item_type, fields):
+    """_list_items() for available / due_before: (error response, None) or (None, build)."""
+    if request.args.get("q") or "cursor" in request.args:
+        return (jsonify({"error": "available/due_before cannot be combined with q or cursor"}), 400), None
+    available = request.args.get("available", "false").lower()
+    if available not in ("true", "false"):
+        return (jsonify({"error": "available must be true or false"}), 400), None
+    limit = _parse_limit(MAX_PAGE_SIZE) if "limit" in request.args else None
+    if "limit" in request.args and limit is None:
+        return (jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400), None
+
+    due_before = None
+    if "due_before" in request.args:
+        if available == "true":
+            return (jsonify({"error": "due_before only applies to unavailable items"}), 400), None
+        try:
+            due_before = date.fromisoformat(request.args["due_before"])
+        except ValueError:
+            return (jsonify({"error": "due_before must be a YYYY-MM-DD date"}), 400), None
+
+    def build():
+        if available == "true":
+            items = [i for i in store.get_items(name=name, item_type=item_type) if i["is_available"]]
+        else:
+            items = store.get_unavailable(due_before, name=name, item_type=item_type)
+        return jsonify(_project(items[:limit], fields))
+
+    return None, build
+
+
+@bp.get("/items/overdue")
+def overdue_items():
+    """
+    GET /api/items/overdue
+    Unavailable items whose expected date is before today (server time),
+    most overdue first. Accepts the `type` and `fields` params of /items.
+    """
+    store = _store()
+    today = date.today()
+    fields, error = _parse_fields()
+    if error:
+        return jsonify({"error": error}), 400
+
+    def build():
+        items = store.get_unavailable(today, item_type=request.args.get("type"))
+        return jsonify(_project(items, fields))
+
+    return _conditional(f"{store.epoch}-{store.version()}-{today.isoformat()}", build)
+
+
+def _validate_item(data):
+    """Return an error message for an unusable item payload, else None."""
+    if not isinstance(data, dict):
+        return "Item must be a JSON object"
+    for key in ("title", "item_type"):
+        if not isinstance(data.get(key), str) or not data[key].strip():
+            return f"'{key}' is required"
+    return None
+
+
+@bp.post("/items/bulk")
+def bulk_import():
+    """
+    POST /api/items/bulk
+    Body: NDJSON, one item object per line. The body is read as a stream;
+    valid lines are inserted in batches of BULK_BATCH_SIZE and each batch is
+    persisted once. Invalid lines are skipped and reported by line number.
+    """
+    inserted = 0
+    errors = []
+    error_count = 0
+    batch = []
+
+    for lineno, line in enumerate(request.stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = fastjson.loads(line)
+        except ValueError:
+            data, error = None, "Invalid JSON"
+        else:
+            error = _validate_item(data)
+
+        if error:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": lineno, "error": error})
+            continue
+
+        batch.append(data)
+        if len(batch) >= BULK_BATCH_SIZE:
+            inserted += len(_store().add_items(batch))
+            batch = []
+
+    if batch:
+        inserted += len(_store().add_items(batch))
+
+    return jsonify({"inserted": inserted, "error_count": error_count, "errors": errors})
+
+
+@bp.get("/items/export")
+def export_items():
+    """
+    GET /api/items/export
+    Streams every item as NDJSON without building the full list in memory.
+    """
+    store = _store()
+
+    def generate():
+        for item in store.iter_items():
+            yield fastjson.dumps_bytes(item) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@bp.get("/items/changes")
+def get_changes():
+    """
+    GET /api/items/changes?since=<version>&epoch=<epoch>
+    Returns {"epoch", "version", "reset", "items", "deleted"}: the items
+    created or updated after `since` and the ids deleted since then.
+    Without `since`, or when it is from another epoch or older than the
+    store's change log, "reset" is true and "items" is the whole catalog;
+    the client should replace its copy. Pass the returned version back next time.
+    """
+    store = _store()
+    since = request.args.get("since")
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": "since must be an integer version"}), 400
+
+    def build():
+        changes = None
+        if since is not None and request.args.get("epoch", store.epoch) == store.epoch:
+            changes = store.get_changes(since)
+        if changes is not None:
+            items, deleted, version = changes
+            reset = False
+        else:
+            # read the version first: items newer than it are harmless, as
+            # the next delta simply reports them again
+            version = store.version()
+            items, deleted, reset = store.get_items(), [], True
+        return jsonify({
+            "epoch": store.epoch,
+            "version": version,
+            "reset": reset,
+            "items": items,
+            "deleted": deleted,
+        })
+
+    return _conditional(f"{store.epoch}-{store.version()}", build)
+
+
+def _sse(event, data, event_id=None):
+    head = b"id: %s\n" % event_id.encode() if event_id else b""
+    return head + b"event: %s\ndata: %s\n\n" % (event.encode(), fastjson.dumps_bytes(data))
+
+
+def _event_version(event):
+    return event["item"]["version"] if event["op"] == "put" else event["version"]
+
+
+def _parse_event_id(value, epoch):
+    """The version in a Last-Event-ID of this epoch; None if absent, foreign or malformed."""
+    if not value:
+        return None
+    event_epoch, _, version = value.rpartition("-")
+    if event_epoch != epoch or not version.isdigit():
+        return None
+    return int(version)
+
+
+def _reset(store):
+    """A "reset" SSE event (the client must refetch everything), and the version it is at."""
+    version = store.version()
+    return _sse("reset", {"epoch": store.epoch, "version": version}, f"{store.epoch}-{version}"), version
+
+
+def _catch_up(store, since):
+    """SSE events for everything after `since` (from the changes feed), and the new version."""
+    changes = store.get_changes(since)
+    if changes is None:
+        return _reset(store)
+
+    items, deleted, version = changes
+    events = [("put", item) for item in items] + [("delete", {"id": item_id}) for item_id in deleted]
+    # only the last event carries the id: a reconnect mid-batch replays it all
+    return b"".join(
+        _sse(name, data, f"{store.epoch}-{version}" if n == len(events) else None)
+        for n, (name, data) in enumerate(events, start=1)
+    ), version
+
+
+@bp.get("/events")
+def events():
+    """
+    GET /api/events
+    Server-Sent Events stream of item changes: "put" events carry the item,
+    "delete" events {"id"}, and each event id is "<epoch>-<version>".
+    Reconnecting with Last-Event-ID replays what was missed, or sends a
+    "reset" event when the change log no longer covers it or the id is from
+    another epoch or unreadable (refetch all).
+    A subscriber that falls EVENT_QUEUE_SIZE events behind is disconnected.
+    """
+    store = _store()
+    subscription = current_app.extensions["events"].subscribe()
+    if subscription is None:
+        return jsonify({"error": "Too many subscribers"}), 503
+    last_event_id = request.headers.get("Last-Event-ID")
+    since = _parse_event_id(last_event_id, store.epoch)
+    # subscribed before reading the version, so no commit falls in between
+    start = store.version()
+    keepalive = current_app.config.get("EVENT_KEEPALIVE", EVENT_KEEPALIVE)
+
+    def generate():
+        last = start
+        try:
+            yield b"retry: %d\n\n" % EVENT_RETRY_MS
+            if last_event_id and since is None:
+                # the client's view is of another catalog (wiped or restarted store)
+                chunk, last = _reset(store)
+                yield chunk
+            elif since is not None and since != start:
+                chunk, last = _catch_up(store, since)
+                yield chunk
+            while True:
+                batch = subscription.get(keepalive)
+                if subscription.dropped:
+                    return
+                if not batch:
+                    # versions also advance when another worker process commits
+                    if store.version() != last:
+                        chunk, last = _catch_up(store, last)
+                        yield chunk
+                    else:
+                        yield b": keepalive\n\n"
+                    continue
+
+                out = []
+                for event in batch:
+                    version = _event_version(event)
+                    if version <= last:
+                        continue
+                    if version != last + 1:
+                        # a commit we were not told about (another process): fill the gap
+                        chunk, last = _catch_up(store, last)
+                        out.append(chunk)
+                        continue
+                    if event["op"] == "put":
+                        out.append(_sse("put", event["item"], f"{store.epoch}-{version}"))
+                    else:
+                        out.append(_sse("delete", {"id": event["id"]}, f"{store.epoch}-{version}"))
+                    last = version
+                if out:
+                    yield b"".join(out)
+        finally:
+            subscription.close()
+
+    response = Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # the generator's own cleanup never runs if it is closed before starting
+    response.call_on_close(subscription.close)
+    return response
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@bp.patch("/items")
+def update_items():
+    """
+    PATCH /api/items
+    Body: a JSON list of partial items, each with its "id", e.g.
+    [{"id": 1, "is_available": false}, {"id": 2, "title": "New"}].
+    All updates are applied atomically and persisted once. Returns the
+    updated items; 404 with the "missing" ids (and nothing changed) if any
+    item does not exist.
+    """
+    updates = request.get_json(silent=True)
+    if not isinstance(updates, list) or not all(isinstance(u, dict) and _is_id(u.get("id")) for u in updates):
+        return jsonify({"error": "Body must be a list of objects with an integer 'id'"}), 400
+    if len(updates) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} updates per request"}), 400
+
+    store = _store()
+    items = store.update_items(updates)
+    if items is None:
+        missing = sorted({u["id"] for u in updates if store.get_item(u["id"]) is None})
+        return jsonify({"error": "Not found", "missing": missing}), 404
     return jsonify(items)
 
 
+@bp.post("/items/batch-delete")
+def delete_items():
+    """
+    POST /api/items/batch-delete
+    Body: {"ids": [1, 2, ...]}. Deletes the items in one atomic, singly
+    persisted step and returns {"deleted": [...], "missing": [...]}; ids
+    that did not exist are reported, not an error.
+    """
+    data = request.get_json(silent=True)
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(_is_id(i) for i in ids):
+        return jsonify({"error": "'ids' must be a list of integers"}), 400
+    if len(ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} ids per request"}), 400
+
+    deleted = _store().delete_items(ids)
+    gone = set(deleted)
+    return jsonify({"deleted": deleted, "missing": [i for i in dict.fromkeys(ids) if i not in gone]})
+
+
 @bp.post("/items")
 def create_item():
     data = request.json or {}
-    item = storage.add_item(data)
+    item = _store().add_item(data)
     return jsonify(item), 201
 
 @bp.get("/items/<int:item_id>")
 def get_item(item_id):
-    item = storage.get_item(item_id)
+    store = _store()
+    item = store.get_item(item_id)
     if not item:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(item)
+    return _conditional(f"{store.epoch}-{item_id}-{item['version']}", lambda: jsonify(item))
 
 @bp.put("/items/<int:item_id>")
 def update_item(item_id):
     data = request.json or {}
-    updated = storage.update_item(item_id, data)
+    updated = _store().update_item(item_id, data)
     if not updated:
         return jsonify({"error": "Not found"}), 404
     return jsonify(updated)
 
 @bp.delete("/items/<int:item_id>")
 def delete_item(item_id):
-    ok = storage.delete_item(item_id)
+    ok = _store().delete_item(item_id)
     if not ok:
         return jsonify({"error": "Not found"}), 404
     return jsonify({"status": "deleted"})
@@ -0,0 +1,215 @@
+# app/search.py
+"""
+In-memory inverted index over item titles and authors/directors.
+
+Documents are tokenized into case-folded words. A title hit weighs more
+than an author hit, so a token gives each item one of a few weights; its
+postings are kept as {weight: ascending list of item ids}. A sorted
+vocabulary gives prefix matching by bisection, so "tolk" finds "tolkien".
+Queries are AND-ed across terms and ranked by summed weight, ties by id.
+
+Scores take only a handful of values, so the most selective term's
+postings are walked one score level at a time, best first and in id order
+within a level, and the walk stops as soon as no remaining item can enter
+the top `limit`: a one-word query touches about `limit` postings however
+many items match. Further terms narrow each level of that term's items to
+those matching them all, with set operations rather than Python loops, so
+a multi-word query costs about as much as the levels of its most selective
+term that it has to walk have postings: roughly 0.1-1 us each. At 10^6
+items a pair of common words (~10^4 postings each, counting prefix
+completions) takes milliseconds; see benchmarks/bench_search.py.
+"""
+import heapq
+import re
+from bisect import bisect_left, insort
+from functools import partial
+from itertools import compress
+from operator import itemgetter, not_
+
+TITLE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 1.0
+PREFIX_FACTOR = 0.5          # a prefix hit scores half of an exact token hit
+MAX_PREFIX_EXPANSIONS = 64   # bound the work a very short prefix can cause
+# A further AND term narrows the candidates through a set of all its ids
+# unless it has more than this many per candidate; then each candidate's own
+# tokens are checked instead. Both are C loops; at 10^6 items a posting costs
+# about 90 ns to gather and a candidate about 1.3 us to check.
+INTERSECT_RATIO = 15
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _TOKEN_RE.findall(str(text).casefold())
+
+
+class SearchIndex:
+    def __init__(self):
+        self._postings = {}   # token -> {weight: ascending item ids}
+        self._vocab = []      # sorted tokens, for prefix lookups
+        self._docs = {}       # item_id -> (tokens, weights) indexed for it
+
+    def __len__(self):
+        return len(self._docs)
+
+    def clear(self):
+        self._postings.clear()
+        self._vocab.clear()
+        self._docs.clear()
+
+    def add(self, item_id, title, author):
+        weights = dict.fromkeys(tokenize(title), TITLE_WEIGHT)
+        for token in set(tokenize(author)):
+            weights[token] = weights.get(token, 0.0) + AUTHOR_WEIGHT
+
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                insort(self._vocab, token)
+            # new ids are the largest, so this appends unless an update re-adds one
+            insort(posting.setdefault(weight, []), item_id)
+        self._docs[item_id] = (tuple(weights), tuple(weights.values()))
+
+    def remove(self, item_id):
+        tokens, weights = self._docs.pop(item_id, ((), ()))
+        for token, weight in zip(tokens, weights):
+            posting = self._postings[token]
+            ids = posting[weight]
+            del ids[bisect_left(ids, item_id)]
+            if not ids:
+                del posting[weight]
+                if not posting:
+                    del self._postings[token]
+                    del self._vocab[bisect_left(self._vocab, token)]
+
+    def _expand(self, term):
+        """(token, factor) pairs a query term matches: itself plus completions."""
+        matches = []
+        if term in self._postings:
+            matches.append((term, 1.0))
+        i = bisect_left(self._vocab, term)
+        while i < len(self._vocab) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            token = self._vocab[i]
+            if not token.startswith(term):
+                break
+            if token != term:
+                matches.append((token, PREFIX_FACTOR))
+            i += 1
+        return matches
+
+    def _levels(self, expansion):
+        """{score: [id lists]} for one term's expansion."""
+        levels = {}
+        for token, factor in expansion.items():
+            for weight, ids in self._postings[token].items():
+                levels.setdefault(weight * factor, []).append(ids)
+        return levels
+
+    def _score(self, item_id, expansions):
+        """
+        The item's summed score over `expansions` (one per term), or 0.0
+        unless every term matches. A term none of its tokens match is
+        rejected with one set operation before anything is scored.
+        """
+        tokens, weights = self._docs.get(item_id, ((), ()))
+        for expansion in expansions:
+            if expansion.keys().isdisjoint(tokens):
+                return 0.0
+        score = 0.0
+        for expansion in expansions:
+            best = 0.0
+            for token, weight in zip(tokens, weights):
+                factor = expansion.get(token)
+                if factor is not None and weight * factor > best:
+                    best = weight * factor
+            score += best
+        return score
+
+    def _probe(self, expansion, ids):
+        """The `ids` whose own tokens include one of `expansion`'s, without a Python loop over them."""
+        ids = list(ids)
+        tokens = map(itemgetter(0), map(self._docs.__getitem__, ids))
+        return set(compress(ids, map(not_, map(expansion.keys().isdisjoint, tokens))))
+
+    def _walk(self, driver, others):
+        """
+        (score, ascending ids) per score level of the driving term, best
+        first and lazily: most queries stop after the first levels. With
+        further AND terms (expansion, levels, size) only the items matching
+        all of them are listed, each level narrowed by set operations.
+        """
+        if not others:
+            for level in sorted(driver, reverse=True):
+                yield level, heapq.merge(*driver[level])
+            return
+        gathered = {}       # other term's position -> the set of all its ids, once built
+        for level in sorted(driver, reverse=True):
+            ids = set().union(*driver[level])
+            for n, (expansion, levels, size) in enumerate(others):
+                if not ids:
+                    break
+                # gather a term's ids only once a level has enough candidates to pay for it
+                every = gathered.get(n)
+                if every is None and size <= INTERSECT_RATIO * len(ids):
+                    every = gathered[n] = set().union(
+                        *(posting for lists in levels.values() for posting in lists))
+                ids = every.intersection(ids) if every is not None else self._probe(expansion, ids)
+            yield level, sorted(ids)
+
+    def search(self, query, limit=50, allowed=None):
+        """
+        Return up to `limit` item ids matching every query term, best first.
+        `allowed`, if given, restricts results to those ids (any container
+        with len() and `in`).
+        """
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        expansions = [dict(self._expand(term)) for term in terms]
+        if not all(expansions):
+            return []
+        levels = [self._levels(expansion) for expansion in expansions]
+        sizes = [sum(len(ids) for lists in level.values() for ids in lists) for level in levels]
+        order = sorted(range(len(terms)), key=sizes.__getitem__)
+
+        if allowed is not None and len(allowed) < sizes[order[0]]:
+            # a narrower filter than any term: score its items directly
+            scored = []
+            for item_id in allowed:
+                score = self._score(item_id, expansions)
+                if score:
+                    scored.append((-score, item_id))
+            return [item_id for _, item_id in heapq.nsmallest(limit, scored)]
+
+        # walk the most selective term; the others are only scored per candidate
+        others = [expansions[i] for i in order[1:]]
+        walk = self._walk(levels[order[0]], [(expansions[i], levels[i], sizes[i]) for i in order[1:]])
+        headroom = sum(max(levels[i]) for i in order[1:])   # the most the others can add
+        best = []       # min-heap of (score, -id): the `limit` best so far, worst on top
+        seen = set()
+        for level, ids in walk:
+            for item_id in ids:
+                if len(best) == limit:
+                    worst, worst_id = best[0][0], -best[0][1]
+                    bound = level + headroom
+                    if bound < worst or (bound == worst and item_id > worst_id):
+                        return [-neg_id for _, neg_id in sorted(best, reverse=True)]
+                if item_id in seen:
+                    continue        # listed under a higher score already
+                seen.add(item_id)
+                if allowed is not None and item_id not in allowed:
+                    continue
+                score = level
+                if others:
+                    rest = self._score(item_id, others)
+                    if not rest:
+                        continue
+                    score += rest
+                if len(best) < limit:
+                    heapq.heappush(best, (score, -item_id))
+                elif (score, -item_id) > best[0]:
+                    heapq.heapreplace(best, (score, -item_id))
+        return [-neg_id for _, neg_id in sorted(best, reverse=True)]
@@ -0,0 +1,395 @@
+# app/sqlite_storage.py
+"""
+SQLite storage engine implementing StorageBackend (app/backends.py).
+
+Items live in the `library_items` table (the schema already present in
+library.db) plus two case-folded key columns so the exact-name and type
+filters use indexes, an availability index, and an FTS5 table kept in sync
+by triggers for ranked ?q= search. Deletes leave a tombstone in
+`item_tombstones` (bounded to the most recent TOMBSTONE_LIMIT) so
+get_changes() can report them; live changes come from the version column.
+Every write touches only the rows it changes, in one transaction (a batch
+included), so cost no longer grows with catalog size.
+
+The database runs in WAL mode: readers never block the writer, and any
+number of threads or worker processes can share one file.
+"""
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .backends import ITEM_FIELDS, StorageBackend
+from .search import tokenize, TITLE_WEIGHT, AUTHOR_WEIGHT
+
+TOMBSTONE_LIMIT = 10000
+
+_COLUMNS = "id, version, title, item_type, author_or_director, is_available, expected_available_date"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS library_items (
+    id INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    item_type VARCHAR(50) NOT NULL,
+    author_or_director VARCHAR(255),
+    is_available BOOLEAN NOT NULL,
+    expected_available_date DATE,
+    version INTEGER NOT NULL DEFAULT 0,
+    title_key TEXT,
+    type_key TEXT,
+    PRIMARY KEY (id)
+);
+CREATE TABLE IF NOT EXISTS item_tombstones (
+    version INTEGER PRIMARY KEY,
+    item_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS storage_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_library_items_title_key ON library_items (title_key, id);
+CREATE INDEX IF NOT EXISTS ix_library_items_type_key ON library_items (type_key, id);
+CREATE INDEX IF NOT EXISTS ix_library_items_availability ON library_items (is_available, expected_available_date);
+CREATE INDEX IF NOT EXISTS ix_library_items_version ON library_items (version);
+"""
+
+_FTS = """
+CREATE VIRTUAL TABLE library_items_fts USING fts5(
+    title, author_or_director, content='library_items', content_rowid='id'
+);
+CREATE TRIGGER library_items_ai AFTER INSERT ON library_items BEGIN
+    INSERT INTO library_items_fts (rowid, title, author_or_director)
+    VALUES (new.id, new.title, new.author_or_director);
+END;
+CREATE TRIGGER library_items_ad AFTER DELETE ON library_items BEGIN
+    INSERT INTO library_items_fts (library_items_fts, rowid, title, author_or_director)
+    VALUES ('delete', old.id, old.title, old.author_or_director);
+END;
+CREATE TRIGGER library_items_au AFTER UPDATE ON library_items BEGIN
+    INSERT INTO library_items_fts (library_items_fts, rowid, title, author_or_director)
+    VALUES ('delete', old.id, old.title, old.author_or_director);
+    INSERT INTO library_items_fts (rowid, title, author_or_director)
+    VALUES (new.id, new.title, new.author_or_director);
+END;
+INSERT INTO library_items_fts (library_items_fts) VALUES ('rebuild');
+"""
+
+
+def database_path(uri):
+    """Filesystem path from a `sqlite:///...` URI (plain paths pass through)."""
+    if uri.startswith("sqlite:///"):
+        return uri[len("sqlite:///"):]
+    return uri
+
+
+def _fold(value):
+    return str(value).casefold() if value is not None else ""
+
+
+class _Rollback(Exception):
+    """Raised inside _write() to undo the transaction."""
+
+
+def _row_to_item(row):
+    return {
+        "id": row[0],
+        "version": row[1],
+        "title": row[2],
+        "item_type": row[3],
+        "author_or_director": row[4],
+        "is_available": bool(row[5]),
+        "expected_available_date": row[6],
+    }
+
+
+class SqliteStorage(StorageBackend):
+    def __init__(self, path, tombstone_limit=TOMBSTONE_LIMIT):
+        self.path = path
+        self.tombstone_limit = tombstone_limit
+        self._local = threading.local()
+        self._migrate()
+
+    # --------------------
+    # Internal helpers
+    # --------------------
+
+    def _conn(self):
+        """One connection per thread (sqlite3 connections are not shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """An IMMEDIATE transaction: takes the write lock up front."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _migrate(self):
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+        # library.db files created before this engine lack the key columns
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(library_items)")}
+        with self._write():
+            for column in ("title_key", "type_key"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE library_items ADD COLUMN {column} TEXT")
+            if "version" not in columns:
+                conn.execute("ALTER TABLE library_items ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                "INSERT OR IGNORE INTO storage_meta (key, value) VALUES ('epoch', ?)", (secrets.randbits(31),)
+            )
+            rows = conn.execute(
+                "SELECT id, title, item_type FROM library_items WHERE title_key IS NULL OR type_key IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE library_items SET title_key = ?, type_key = ? WHERE id = ?",
+                [(_fold(title), _fold(item_type), item_id) for item_id, title, item_type in rows],
+            )
+        conn.executescript(_INDEXES)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'library_items_fts'").fetchone():
+            conn.executescript(_FTS)
+        epoch = conn.execute("SELECT value FROM storage_meta WHERE key = 'epoch'").fetchone()[0]
+        self.epoch = f"{epoch:08x}"
+
+    def _allocate_ids(self, conn, count):
+        """Reserve `count` new ids; ids are never reused after a delete."""
+        row = conn.execute("SELECT value FROM storage_meta WHERE key = 'next_id'").fetchone()
+        if row is None:
+            first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM library_items").fetchone()[0]
+        else:
+            first = row[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('next_id', ?)", (first + count,)
+        )
+        return range(first, first + count)
+
+    def _bump_version(self, conn, count=1):
+        """Advance the catalog version by `count`; returns the new versions."""
+        row = conn.execute("SELECT value FROM storage_meta WHERE key = 'version'").fetchone()
+        current = row[0] if row else 0
+        conn.execute(
+            "INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('version', ?)", (current + count,)
+        )
+        return range(current + 1, current + count + 1)
+
+    def _add_tombstone(self, conn, version, item_id):
+        """Record a delete, dropping the oldest tombstones past the limit."""
+        conn.execute("INSERT INTO item_tombstones (version, item_id) VALUES (?, ?)", (version, item_id))
+        row = conn.execute(
+            "SELECT version FROM item_tombstones ORDER BY version DESC LIMIT 1 OFFSET ?", (self.tombstone_limit,)
+        ).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM item_tombstones WHERE version <= ?", row)
+            conn.execute("INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('changes_floor', ?)", row)
+
+    @staticmethod
+    def _filters(name, item_type):
+        clauses, params = [], []
+        if name:
+            clauses.append("title_key = ?")
+            params.append(_fold(name))
+        if item_type:
+            clauses.append("type_key = ?")
+            params.append(_fold(item_type))
+        return clauses, params
+
+    # --------------------
+    # Storage API
+    # --------------------
+
+    def version(self):
+        row = self._conn().execute("SELECT value FROM storage_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def get_items(self, name=None, item_type=None):
+        clauses, params = self._filters(name, item_type)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(f"SELECT {_COLUMNS} FROM library_items{where} ORDER BY id", params)
+        return [_row_to_item(row) for row in rows]
+
+    def get_page(self, limit, after=None, name=None, item_type=None):
+        clauses, params = self._filters(name, item_type)
+        if after is not None:
+            clauses.append("id > ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM library_items{where} ORDER BY id LIMIT ?", params + [limit + 1]
+        ).fetchall()
+        items = [_row_to_item(row) for row in rows[:limit]]
+        next_after = items[-1]["id"] if len(rows) > limit else None
+        return items, next_after
+
+    def search(self, query, name=None, item_type=None, limit=50):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        clauses, params = self._filters(name, item_type)
+        extra = "".join(f" AND i.{clause}" for clause in clauses)
+        columns = ", ".join(f"i.{c.strip()}" for c in _COLUMNS.split(","))
+        rows = self._conn().execute(
+            f"SELECT {columns} FROM library_items_fts f JOIN library_items i ON i.id = f.rowid"
+            f" WHERE library_items_fts MATCH ?{extra}"
+            f" ORDER BY bm25(library_items_fts, ?, ?), i.id LIMIT ?",
+            [match] + params + [TITLE_WEIGHT, AUTHOR_WEIGHT, limit],
+        )
+        return [_row_to_item(row) for row in rows]
+
+    def get_unavailable(self, due_before=None, name=None, item_type=None):
+        # ISO date strings order like the dates; served by the availability index
+        clauses, params = self._filters(name, item_type)
+        clauses.insert(0, "is_available = 0")
+        if due_before is not None:
+            clauses.append("expected_available_date < ?")
+            params.append(due_before.isoformat())
+        rows = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM library_items WHERE {' AND '.join(clauses)}"
+            " ORDER BY expected_available_date IS NULL, expected_available_date, id", params
+        )
+        return [_row_to_item(row) for row in rows]
+
+    def get_changes(self, since):
+        conn = self._conn()
+        # one read transaction, so the three queries see the same snapshot
+        conn.execute("BEGIN")
+        try:
+            meta = dict(conn.execute(
+                "SELECT key, value FROM storage_meta WHERE key IN ('version', 'changes_floor')"
+            ))
+            version = meta.get("version", 0)
+            if since < meta.get("changes_floor", 0) or since > version:
+                return None
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM library_items WHERE version > ? ORDER BY id", (since,)
+            ).fetchall()
+            deleted = [row[0] for row in conn.execute(
+                "SELECT DISTINCT item_id FROM item_tombstones WHERE version > ? ORDER BY item_id", (since,)
+            )]
+        finally:
+            conn.execute("COMMIT")
+        return [_row_to_item(row) for row in rows], deleted, version
+
+    def get_item(self, item_id):
+        row = self._conn().execute(
+            f"SELECT {_COLUMNS} FROM library_items WHERE id = ?", (item_id,)
+        ).fetchone()
+        return _row_to_item(row) if row else None
+
+    def _insert(self, conn, batch):
+        items = []
+        ids = self._allocate_ids(conn, len(batch))
+        versions = self._bump_version(conn, len(batch))
+        for item_id, version, data in zip(ids, versions, batch):
+            items.append({
+                "id": item_id,
+                "version": version,
+                "title": data.get("title", ""),
+                "item_type": data.get("item_type", ""),
+                "author_or_director": data.get("author_or_director"),
+                "is_available": data.get("is_available", True),
+                "expected_available_date": data.get("expected_available_date"),
+            })
+        conn.executemany(
+            f"INSERT INTO library_items ({_COLUMNS}, title_key, type_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(i["id"], i["version"], i["title"], i["item_type"], i["author_or_director"], i["is_available"],
+              i["expected_available_date"], _fold(i["title"]), _fold(i["item_type"])) for i in items],
+        )
+        return items
+
+    def add_item(self, data):
+        return self.add_items([data])[0]
+
+    def add_items(self, batch):
+        if not batch:
+            return []
+        with self._write() as conn:
+            items = self._insert(conn, batch)
+        self._notify([{"op": "put", "item": item} for item in items])
+        return items
+
+    def _update(self, conn, item_id, data):
+        """Update one row inside the caller's transaction; None if it is missing."""
+        row = conn.execute(f"SELECT {_COLUMNS} FROM library_items WHERE id = ?", (item_id,)).fetchone()
+        if row is None:
+            return None
+        item = _row_to_item(row)
+        for key in ITEM_FIELDS:
+            if key in data:
+                item[key] = data[key]
+        item["version"] = self._bump_version(conn)[0]
+        conn.execute(
+            "UPDATE library_items SET version = ?, title = ?, item_type = ?, author_or_director = ?,"
+            " is_available = ?, expected_available_date = ?, title_key = ?, type_key = ? WHERE id = ?",
+            (item["version"], item["title"], item["item_type"], item["author_or_director"], item["is_available"],
+             item["expected_available_date"], _fold(item["title"]), _fold(item["item_type"]), item_id),
+        )
+        return item
+
+    def _delete(self, conn, item_id):
+        """Delete one row inside the caller's transaction; its event, or None."""
+        if conn.execute("DELETE FROM library_items WHERE id = ?", (item_id,)).rowcount == 0:
+            return None
+        version = self._bump_version(conn)[0]
+        self._add_tombstone(conn, version, item_id)
+        return {"op": "del", "id": item_id, "version": version}
+
+    def update_item(self, item_id, data):
+        with self._write() as conn:
+            item = self._update(conn, item_id, data)
+        if item is not None:
+            self._notify([{"op": "put", "item": item}])
+        return item
+
+    def update_items(self, updates):
+        if not updates:
+            return []
+        try:
+            with self._write() as conn:
+                items = []
+                for update in updates:
+                    item = self._update(conn, update["id"], update)
+                    if item is None:
+                        raise _Rollback
+                    items.append(item)
+        except _Rollback:
+            return None
+        self._notify([{"op": "put", "item": item} for item in items])
+        return items
+
+    def delete_item(self, item_id):
+        return bool(self.delete_items([item_id]))
+
+    def delete_items(self, item_ids):
+        with self._write() as conn:
+            events = [self._delete(conn, item_id) for item_id in dict.fromkeys(item_ids)]
+        events = [event for event in events if event is not None]
+        if events:
+            self._notify(events)
+        return [event["id"] for event in events]
+
+    def compact(self):
+        """Fold the WAL back into the main database file."""
+        self._conn().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -1,105 +1,794 @@
 # app/storage.py
-import json
+"""
+In-memory item store and its JSON-file persistent variant.
+
+MemoryStorage keeps items as compact ItemRecord objects in a dict with
+secondary indexes (title, type, full-text, due date of unavailable items)
+and an ordered id list for keyset pagination, guarded by a readers/writer
+lock.
+
+JsonStorage adds persistence: a snapshot file plus an append-only
+journal, optionally shared between worker processes, written by a
+background thread according to a durability mode, and optionally loaded
+lazily from an indexed snapshot (app/snapshot.py).
+"""
+import atexit
 import os
+import secrets
+import sys
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single worker only
+    fcntl = None
+
+from . import fastjson
+from .backends import ITEM_FIELDS, StorageBackend
+from .due_index import DueIndex
+from .journal import Journal
+from .locking import RWLock
+from .persistence import BackgroundWriter, install, write_temp
+from .snapshot import INDEX_SUFFIX, LazyCatalog, SnapshotReader, encode
+from .search import SearchIndex
+
+# Journaled mode: mutations are appended to <snapshot>.log instead of
+# rewriting the whole snapshot. Once the log holds COMPACT_THRESHOLD records
+# a background thread folds it back into the snapshot and trims it.
+COMPACT_THRESHOLD = 5000
+
+# When a mutation is durable before it returns:
+#   "sync"  - fsync (or snapshot rewrite) on the request thread
+#   "group" - after the writer thread's next fsync, shared by every request
+#             waiting at that moment (group commit)
+#   "async" - not waited for; the writer flushes within FLUSH_INTERVAL s.
+#             Journal records still reach the OS first, so only a machine
+#             crash can lose them; without a journal a process crash can too.
+DURABILITY_MODES = ("sync", "group", "async")
+DURABILITY = "async"
+FLUSH_INTERVAL = 0.05
+
+# Recent (version, item id) mutations kept for get_changes(); clients that
+# fall further behind than this get a full resync instead of a delta.
+CHANGE_LOG_SIZE = 10000
+
+
+def _fold(value):
+    return str(value).casefold() if value is not None else ""
+
 
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
 
-STORAGE_FILE = "library.json"
 
-_data = {}
-_next_id = 1
+class IdList(list):
+    """
+    Item ids in ascending order: a secondary index entry that filtered
+    pages bisect and slice like MemoryStorage._ids. Membership bisects too.
+    """
+
+    __slots__ = ()
 
-# --------------------
-# Internal helpers
-# --------------------
+    def __contains__(self, item_id):
+        i = bisect_left(self, item_id)
+        return i < len(self) and self[i] == item_id
 
-def _load_from_disk():
-    global _data, _next_id
-    if not os.path.exists(STORAGE_FILE):
-        _data = {}
-        _next_id = 1
-        return
+    def intersection(self, other):
+        """Ids in both lists, in order: the shorter one probed against the longer."""
+        short, long = (self, other) if len(self) <= len(other) else (other, self)
+        return IdList(i for i in short if i in long)
 
-    try:
-        with open(STORAGE_FILE, "r") as f:
-            raw = json.load(f)
-        _data = raw.get("data", {})
-        _next_id = raw.get("next_id", 1)
-    except Exception:
-        _data = {}
-        _next_id = 1
 
+class ItemRecord:
+    """
+    One item as held in memory: slots instead of a per-item dict, and the
+    item_type / date strings (a handful of distinct values across the whole
+    catalog) interned, so each is stored once. Records are never modified
+    after they are stored; to_dict() builds the plain dict the storage API
+    hands out, so dicts only exist on their way to JSON.
+    """
+
+    __slots__ = ("id", "version") + ITEM_FIELDS
 
-def _save_to_disk():
-    with open(STORAGE_FILE, "w") as f:
-        json.dump({"data": _data, "next_id": _next_id}, f, indent=2)
+    def __init__(self, item):
+        self.id = item["id"]
+        self.version = item.get("version", 0)
+        self.title = item.get("title", "")
+        self.item_type = _intern(item.get("item_type", ""))
+        self.author_or_director = item.get("author_or_director")
+        self.is_available = item.get("is_available", True)
+        self.expected_available_date = _intern(item.get("expected_available_date"))
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "version": self.version,
+            "title": self.title,
+            "item_type": self.item_type,
+            "author_or_director": self.author_or_director,
+            "is_available": self.is_available,
+            "expected_available_date": self.expected_available_date,
+        }
 
-# --------------------
-# Storage API  
-# --------------------
 
-def get_items(name=None, item_type=None):
+class MemoryStorage(StorageBackend):
     """
-    Return list of all items.
-    Optional exact name match or type filter.
+    Items live only in this process, as ItemRecords. Reads run concurrently,
+    mutations (and id allocation) are serialized. Every item returned is a
+    fresh dict, so callers may keep or modify it outside the lock.
     """
-    items = list(_data.values())
 
-    if name:
-        items = [item for item in items if item["title"].lower() == name.lower()]
-    if item_type:
-        items = [item for item in items if item["item_type"].lower() == item_type.lower()]
+    def __init__(self, change_log_size=CHANGE_LOG_SIZE):
+        self._lock = RWLock()
+        self._data = {}                # id -> ItemRecord
+        self._next_id = 1
+        self._version = 0
+        self.epoch = secrets.token_hex(4)
+        # All item ids in ascending order, for keyset pagination
+        self._ids = []
+        # Secondary indexes: case-folded title / item_type -> IdList
+        self._title_index = {}
+        self._type_index = {}
+        # Full-text index over title + author_or_director
+        self._search_index = SearchIndex()
+        # Unavailable items by expected_available_date
+        self._due_index = DueIndex()
+        # Bounded change log; every change after _changes_floor is in it
+        self._changes = deque(maxlen=change_log_size)
+        self._changes_floor = 0
+
+    # --------------------
+    # Hooks for persistent subclasses
+    # --------------------
+
+    def _before_read(self):
+        """Called before every read, outside the lock."""
+
+    @contextmanager
+    def _mutation(self):
+        """Context every write runs in."""
+        with self._lock.write():
+            yield
+
+    def _persist(self, *records):
+        """Make mutations durable; a no-op in memory."""
+
+    # --------------------
+    # Internal helpers
+    # --------------------
+
+    def _commit(self, *records):
+        """Persist mutation records, then publish them to listeners."""
+        self._persist(*records)
+        self._notify(list(records))
+
+    def _index_add(self, record):
+        # new ids go last, so insort is an append except when an update re-adds one
+        insort(self._title_index.setdefault(_fold(record.title), IdList()), record.id)
+        insort(self._type_index.setdefault(_fold(record.item_type), IdList()), record.id)
+        self._search_index.add(record.id, record.title, record.author_or_director)
+        if not record.is_available:
+            self._due_index.add(record.id, record.expected_available_date)
+
+    def _index_remove(self, record):
+        for index, key in ((self._title_index, _fold(record.title)),
+                           (self._type_index, _fold(record.item_type))):
+            ids = index.get(key)
+            if ids is not None and record.id in ids:
+                del ids[bisect_left(ids, record.id)]
+                if not ids:
+                    del index[key]
+        self._search_index.remove(record.id)
+        if not record.is_available:
+            self._due_index.remove(record.id, record.expected_available_date)
+
+    def _rebuild_indexes(self):
+        self._title_index.clear()
+        self._type_index.clear()
+        self._search_index.clear()
+        self._due_index.clear()
+        self._ids[:] = sorted(self._data)
+        with self._due_index.bulk():
+            for item_id in self._ids:          # in id order: every insort appends
+                self._index_add(self._data[item_id])
+
+    def _filter_ids(self, name, item_type):
+        """
+        IdList of the items matching the exact-name / type filters, from the
+        indexes (None without filters). A single filter returns the index
+        entry itself: read it under the read lock, never modify it.
+        """
+        ids = None
+        if name:
+            ids = self._title_index.get(_fold(name), IdList())
+        if item_type:
+            matches = self._type_index.get(_fold(item_type), IdList())
+            ids = matches if ids is None else ids.intersection(matches)
+        return ids
+
+    def _log_change(self, version, item_id):
+        if len(self._changes) == self._changes.maxlen:
+            self._changes_floor = self._changes[0][0]
+        self._changes.append((version, item_id))
+
+    def _reset_changes(self):
+        """Forget the change log; only versions from now on can be diffed."""
+        self._changes.clear()
+        self._changes_floor = self._version
+
+    def _apply(self, record):
+        """Apply one journal record to the store (idempotent)."""
+        if record["op"] == "put":
+            item = ItemRecord(record["item"])
+            self._version = max(self._version, item.version)
+            old = self._data.get(item.id)
+            if old is not None:
+                self._index_remove(old)
+            else:
+                insort(self._ids, item.id)
+            self._data[item.id] = item
+            self._index_add(item)
+            self._next_id = max(self._next_id, item.id + 1)
+            self._log_change(item.version, item.id)
+        elif record["op"] == "del":
+            self._version = max(self._version, record.get("version", 0))
+            old = self._data.pop(record["id"], None)
+            if old is not None:
+                self._index_remove(old)
+                del self._ids[bisect_left(self._ids, record["id"])]
+            self._log_change(record.get("version", 0), record["id"])
+
+    def _new_item(self, data):
+        self._version += 1
+        item = {
+            "id": self._next_id,
+            "version": self._version,
+            "title": data.get("title", ""),
+            "item_type": data.get("item_type", ""),
+            "author_or_director": data.get("author_or_director"),
+            "is_available": data.get("is_available", True),
+            "expected_available_date": data.get("expected_available_date"),
+        }
+
+        record = ItemRecord(item)
+        self._data[self._next_id] = record
+        self._index_add(record)
+        self._ids.append(self._next_id)
+        self._log_change(self._version, self._next_id)
+        self._next_id += 1
+        return item
+
+    # --------------------
+    # Storage API
+    # --------------------
+
+    def version(self):
+        self._before_read()
+        return self._version
+
+    def get_items(self, name=None, item_type=None):
+        """
+        Return list of all items.
+        Optional exact name match or type filter, answered from the secondary
+        indexes (both filters together intersect the two id lists).
+        """
+        self._before_read()
+        with self._lock.read():
+            if not name and not item_type:
+                return [record.to_dict() for record in self._data.values()]
+
+            # ids are allocated in insertion order, so id order is the listing order
+            return [self._data[i].to_dict() for i in self._filter_ids(name, item_type)]
+
+    def get_page(self, limit, after=None, name=None, item_type=None):
+        """
+        Return up to `limit` items with id greater than `after`, in id order,
+        plus the id to resume from (None on the last page).
+        Pages bisect an ordered id list instead of scanning the store: _ids,
+        or the filters' index entry.
+        """
+        self._before_read()
+        with self._lock.read():
+            if name or item_type:
+                ids = self._filter_ids(name, item_type)
+            else:
+                ids = self._ids
+
+            start = bisect_right(ids, after) if after is not None else 0
+            page = ids[start:start + limit]
+            next_after = page[-1] if page and start + limit < len(ids) else None
+            return [self._data[i].to_dict() for i in page], next_after
+
+    def search(self, query, name=None, item_type=None, limit=50):
+        """
+        Ranked full-text search over title and author_or_director.
+        Every query word must match a whole word or a word prefix.
+        """
+        self._before_read()
+        with self._lock.read():
+            allowed = self._filter_ids(name, item_type)
+            hits = self._search_index.search(query, limit=limit, allowed=allowed)
+            return [self._data[i].to_dict() for i in hits]
+
+    def get_unavailable(self, due_before=None, name=None, item_type=None):
+        """
+        Unavailable items by expected date, from the due-date index:
+        a bisection for `due_before`, then a slice.
+        """
+        self._before_read()
+        with self._lock.read():
+            if due_before is None:
+                ids = self._due_index.all()
+            else:
+                ids = self._due_index.due_before(due_before)
+            allowed = self._filter_ids(name, item_type)
+            if allowed is not None:
+                ids = [i for i in ids if i in allowed]
+            return [self._data[i].to_dict() for i in ids]
+
+    def get_changes(self, since):
+        """
+        Items created or updated after version `since` and the ids deleted
+        since then, walking the change log backwards from the newest entry.
+        """
+        self._before_read()
+        with self._lock.read():
+            if since < self._changes_floor or since > self._version:
+                return None
+            changed = set()
+            for version, item_id in reversed(self._changes):
+                if version <= since:
+                    break
+                changed.add(item_id)
+            items = [self._data[i].to_dict() for i in sorted(changed) if i in self._data]
+            deleted = sorted(i for i in changed if i not in self._data)
+            return items, deleted, self._version
+
+    def get_item(self, item_id):
+        self._before_read()
+        with self._lock.read():
+            record = self._data.get(item_id)
+            return record.to_dict() if record is not None else None
+
+    def add_item(self, data):
+        """Create a new item."""
+        with self._mutation():
+            item = self._new_item(data)
+            self._commit({"op": "put", "item": item})
+            return item
+
+    def add_items(self, batch):
+        """Create several items, persisting them in a single step."""
+        with self._mutation():
+            items = [self._new_item(data) for data in batch]
+            if items:
+                self._commit(*({"op": "put", "item": item} for item in items))
+            return items
+
+    def _replace(self, item_id, data):
+        """Swap in an updated record for an existing item; returns it as a dict."""
+        old = self._data[item_id]
+        item = old.to_dict()
+        for key in ITEM_FIELDS:
+            if key in data:
+                item[key] = data[key]
+        self._version += 1
+        item["version"] = self._version
+
+        record = ItemRecord(item)
+        self._index_remove(old)
+        self._data[item_id] = record
+        self._index_add(record)
+        self._log_change(self._version, item_id)
+        return item
+
+    def _remove(self, item_id):
+        """Drop an existing item; returns its delete record."""
+        self._index_remove(self._data.pop(item_id))
+        del self._ids[bisect_left(self._ids, item_id)]
+        self._version += 1
+        self._log_change(self._version, item_id)
+        return {"op": "del", "id": item_id, "version": self._version}
+
+    def update_item(self, item_id, data):
+        """Update an existing item."""
+        with self._mutation():
+            if item_id not in self._data:
+                return None
+            item = self._replace(item_id, data)
+            self._commit({"op": "put", "item": item})
+            return item
+
+    def update_items(self, updates):
+        """Update several items; all ids are checked before anything changes."""
+        with self._mutation():
+            if any(update["id"] not in self._data for update in updates):
+                return None
+            items = [self._replace(update["id"], update) for update in updates]
+            if items:
+                self._commit(*({"op": "put", "item": item} for item in items))
+            return items
+
+    def delete_item(self, item_id):
+        """Delete item by ID."""
+        with self._mutation():
+            if item_id not in self._data:
+                return False
+            self._commit(self._remove(item_id))
+            return True
+
+    def delete_items(self, item_ids):
+        """Delete the given items that exist, in one commit."""
+        with self._mutation():
+            records = [self._remove(item_id) for item_id in dict.fromkeys(item_ids) if item_id in self._data]
+            if records:
+                self._commit(*records)
+            return [record["id"] for record in records]
+
+
+class JsonStorage(MemoryStorage):
+    """
+    MemoryStorage persisted to a JSON snapshot (`path`) plus, in journaled
+    mode, an append-only log next to it (`path` + ".log").
+
+    Shared mode lets several worker processes (e.g. gunicorn pre-fork
+    workers) serve the same files. Writers take an exclusive flock on
+    `path` + ".lock" and first catch up with whatever other workers
+    appended. Every operation cheaply checks for foreign changes (journal
+    size + a snapshot generation counter kept in the lock file) and replays
+    only the new tail.
+
+    Snapshots are written to a temp file and renamed into place. fsyncs,
+    snapshot rewrites and compactions run on writer threads as `durability`
+    (see DURABILITY_MODES) allows. A shared store without a journal is
+    always "sync": other workers only see its changes once the snapshot is
+    rewritten, so a deferred write could be overwritten by theirs.
+
+    With `lazy`, the constructor returns at once and the snapshot is loaded
+    on a thread; see _load_lazily() for what is served meanwhile. With
+    start=False that thread only starts on start(), so the caller can
+    instrument the instance first.
+    """
+
+    def __init__(self, path, journal=True, shared=True, durability=DURABILITY,
+                 flush_interval=FLUSH_INTERVAL, compact_threshold=COMPACT_THRESHOLD, lazy=False, start=True):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability!r}")
+        super().__init__()
+        self.path = path
+        self.journal_enabled = journal
+        self.shared = shared and fcntl is not None
+        self.durability = "sync" if self.shared and not journal else durability
+        self.compact_threshold = compact_threshold
+        self._journal = None
+        self._lock_fd = None
+        self._generation = 0      # snapshot generation this process has loaded
+        self._saved_version = -1  # version of the newest snapshot written here
+        self._install_lock = threading.Lock()
+        self._local = threading.local()
+        # looked up per call so instrumented methods (metrics.py) are timed
+        self._writer = BackgroundWriter(
+            lambda: self._flush(), flush_interval if self.durability == "async" else 0.0,
+            name="storage-writer")
+        self._compactor = BackgroundWriter(lambda: self._compact_in_background(), name="storage-compactor")
+        self._ready = threading.Event()
+        self._load_error = None
+        self._early = None        # (LazyCatalog, its Journal, generation) while loading lazily
+        self._loader = None
+        if lazy:
+            self._load_lazily()
+            if start:
+                self.start()
+        else:
+            self.load()
+        atexit.register(self.close)
+
+    # --------------------
+    # Cross-process coordination
+    # --------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """Cross-process flock on the lock file (no-op outside shared mode)."""
+        if self._lock_fd is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _disk_generation(self):
+        raw = os.pread(self._lock_fd, 20, 0)
+        return int(raw) if raw.strip() else 0
+
+    def _bump_generation(self):
+        """Record that the snapshot was rewritten; caller holds the exclusive flock."""
+        self._generation = self._disk_generation() + 1
+        os.pwrite(self._lock_fd, b"%020d" % self._generation, 0)
+
+    def _is_stale(self):
+        return (self._disk_generation() != self._generation
+                or (self.journal_enabled and self._journal.size() != self._journal.offset))
+
+    def _catch_up(self):
+        """
+        Pull in changes made by other processes. Caller holds the write lock
+        and a file lock. A new snapshot means a full reload; otherwise only
+        the journal records appended since our offset are replayed.
+        """
+        if self._disk_generation() != self._generation:
+            self._load()
+        elif self.journal_enabled and self._journal.size() != self._journal.offset:
+            for record in self._journal.replay(self._journal.offset):
+                self._apply(record)
+
+    def _before_read(self):
+        """Cheap staleness check run before reads; reloads only when needed."""
+        self._wait_ready()
+        if self._lock_fd is None or not self._is_stale():
+            return
+        with self._lock.write():
+            with self._file_lock(exclusive=False):
+                self._catch_up()
+
+    @contextmanager
+    def _mutation(self):
+        """
+        Serialize a write within this process and across worker processes.
+        In "group" mode the caller then waits, with the locks released, for
+        the fsync covering its commit.
+        """
+        self._wait_ready()
+        with self._lock.write():
+            with self._file_lock(exclusive=True):
+                if self._lock_fd is not None:
+                    self._catch_up()
+                yield
+        ticket = self._local.__dict__.pop("ticket", None)
+        if ticket is not None:
+            self._writer.wait(ticket)
+
+    # --------------------
+    # Snapshot + journal
+    # --------------------
+
+    def _open_lock_file(self):
+        if self.shared and self._lock_fd is None:
+            self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+    def load(self):
+        """(Re)load the snapshot, then replay the journal on top of it."""
+        self.flush()
+        with self._lock.write():
+            self._open_lock_file()
+            with self._file_lock(exclusive=False):
+                self._load()
+        self._ready.set()
+
+    def _load_lazily(self):
+        """
+        Start serving at once: map the indexed snapshot and lay the journal
+        over it (milliseconds, whatever the catalog size), then run the full
+        load on a thread. Until it is done, version(), get_item() and
+        unfiltered get_page() - what a client's first requests need - are
+        answered from that view as long as no other worker has written
+        since; everything else waits for the load.
+        """
+        self._open_lock_file()
+        with self._file_lock(exclusive=False):
+            reader = SnapshotReader.open(self.path)
+            if reader is not None:
+                catalog, journal = LazyCatalog(reader), Journal(self.path + ".log")
+                if self.journal_enabled:
+                    for record in journal.replay():
+                        catalog.apply(record)
+                self.epoch = catalog.epoch
+                generation = self._disk_generation() if self._lock_fd is not None else 0
+                self._early = (catalog, journal, generation)
+        self._loader = threading.Thread(target=self._finish_loading, name="storage-loader", daemon=True)
+
+    def start(self):
+        if self._loader is not None and self._loader.ident is None:
+            self._loader.start()
+
+    def _finish_loading(self):
+        try:
+            self.load()
+            if self._early is None and os.path.exists(self.path):
+                self.compact()      # an older snapshot without an index: start lazily next time
+        except Exception as e:
+            self._load_error = e
+            self._ready.set()
+        finally:
+            self._early = None
+
+    def _wait_ready(self):
+        if not self._ready.is_set():
+            self._ready.wait()
+        if self._load_error is not None:
+            raise RuntimeError(f"Storage failed to load: {self._load_error}") from self._load_error
+
+    def _early_view(self):
+        """The LazyCatalog while loading, unless other workers have written since."""
+        early = self._early
+        if early is None or self._ready.is_set():
+            return None
+        catalog, journal, generation = early
+        if self._lock_fd is not None and (self._disk_generation() != generation
+                                          or (self.journal_enabled and journal.size() != journal.offset)):
+            return None
+        return catalog
+
+    def is_ready(self):
+        return self._ready.is_set() and self._load_error is None
+
+    def version(self):
+        catalog = self._early_view()
+        return catalog.version if catalog is not None else super().version()
+
+    def get_item(self, item_id):
+        catalog = self._early_view()
+        return catalog.get_item(item_id) if catalog is not None else super().get_item(item_id)
 
-    return items
+    def get_page(self, limit, after=None, name=None, item_type=None):
+        catalog = None if name or item_type else self._early_view()
+        if catalog is not None:
+            return catalog.get_page(limit, after)
+        return super().get_page(limit, after=after, name=name, item_type=item_type)
 
+    def _load(self):
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = Journal(self.path + ".log")
+        if self._lock_fd is not None:
+            self._generation = self._disk_generation()
 
-def get_item(item_id):
-    return _data.get(item_id)
+        self._data = {}
+        self._next_id = 1
+        self._version = 0
 
+        # snapshots are replaced atomically, so an unreadable one is real
+        # damage: refuse to start rather than serve an empty library
+        try:
+            reader = SnapshotReader.open(self.path)
+            if reader is not None:
+                # decoded through the index, a chunk at a time
+                self._data = {item["id"]: ItemRecord(item) for item in reader.iter_items()}
+                self._next_id, self._version, self.epoch = reader.next_id, reader.version, reader.epoch
+            elif os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    raw = fastjson.loads(f.read())
+                # JSON object keys are strings; ids are ints everywhere else
+                self._data = {int(k): ItemRecord(v) for k, v in raw.get("data", {}).items()}
+                self._next_id = raw.get("next_id", 1)
+                self._version = raw.get("version", 0)
+                self.epoch = raw.get("epoch", self.epoch)
+        except Exception as e:
+            raise RuntimeError(f"Cannot load snapshot {self.path}: {e}") from e
 
-def add_item(data):
-    """Create a new item."""
-    global _next_id
+        self._rebuild_indexes()
+        self._reset_changes()
 
-    item = {
-        "id": _next_id,
-        "title": data.get("title", ""),
-        "item_type": data.get("item_type", ""),
-        "author_or_director": data.get("author_or_director"),
-        "is_available": data.get("is_available", True),
-        "expected_available_date": data.get("expected_available_date"),
-    }
+        if self.journal_enabled:
+            for record in self._journal.replay():
+                self._apply(record)
 
-    _data[_next_id] = item
-    _next_id += 1
-    _save_to_disk()
+    def _snapshot(self):
+        """
+        Encode the catalog as (snapshot, index) bytes; caller holds the lock
+        (a read lock is enough).
+        """
+        # compact, not indented: a fraction of the bytes and encode time
+        return encode({item_id: self._data[item_id].to_dict() for item_id in self._ids},
+                      self._next_id, self._version, self.epoch)
 
-    return item
+    def _write_snapshot(self, encoded):
+        """Write an encoded snapshot and its index to temp files; returns their names."""
+        data, index = encoded
+        return write_temp(self.path, data), write_temp(self.path + INDEX_SUFFIX, index)
 
+    def _install_snapshot(self, temps, version):
+        """
+        Rename a written snapshot and then its index into place, unless a
+        newer snapshot already is (snapshots are encoded under the lock but
+        written outside it). An index left behind by a crash in between
+        does not match the snapshot and is ignored.
+        """
+        with self._install_lock:
+            if version < self._saved_version:
+                for tmp in temps:
+                    os.unlink(tmp)
+                return False
+            install(temps[0], self.path)
+            install(temps[1], self.path + INDEX_SUFFIX)
+            self._saved_version = version
+        if self._lock_fd is not None:
+            self._bump_generation()
+        return True
 
-def update_item(item_id, data):
-    """Update an existing item."""
-    if item_id not in _data:
-        return None
+    def _save_to_disk(self):
+        self._install_snapshot(self._write_snapshot(self._snapshot()), self._version)
 
-    item = _data[item_id]
+    def _persist(self, *records):
+        """
+        Make mutations durable: journal them, or rewrite the snapshot once.
+        Only "sync" does disk I/O here; otherwise the writer thread is asked
+        to, and a "group" commit waits for it in _mutation().
+        """
+        if self.journal_enabled:
+            self._journal.append_many(records)
+            if self._journal.records >= self.compact_threshold:
+                self._compactor.request()
+            if self.durability == "sync":
+                self._journal.sync()
+                return
+        elif self.durability == "sync":
+            self._save_to_disk()
+            return
+        ticket = self._writer.request()
+        if self.durability == "group":
+            self._local.ticket = ticket
 
-    for key in ["title", "item_type", "author_or_director", "is_available", "expected_available_date"]:
-        if key in data:
-            item[key] = data[key]
+    def _flush(self):
+        """Writer thread: make every mutation committed so far durable."""
+        if self.journal_enabled:
+            self._journal.sync()
+            return
+        with self._lock.read():
+            encoded, version = self._snapshot(), self._version
+        self._install_snapshot(self._write_snapshot(encoded), version)
 
-    _save_to_disk()
-    return item
+    def _compact_in_background(self):
+        """
+        Compactor thread: snapshot the catalog under the lock, write it with
+        the lock released, then swap it in and drop the journal records it
+        covers. Records appended meanwhile stay in the journal. If another
+        worker rewrote the snapshot in between, this one is stale; drop it.
+        """
+        with self._mutation():
+            if self._journal.records < self.compact_threshold:
+                return
+            encoded, version = self._snapshot(), self._version
+            offset, generation = self._journal.offset, self._generation
+        temps = self._write_snapshot(encoded)
+        with self._mutation():
+            if self._generation != generation or not self._install_snapshot(temps, version):
+                for tmp in temps:
+                    if os.path.exists(tmp):
+                        os.unlink(tmp)
+                return
+            self._journal.drop_through(offset)
 
+    def _compact(self):
+        self._save_to_disk()
+        if self._journal is not None:
+            self._journal.truncate()
 
-def delete_item(item_id):
-    """Delete item by ID."""
-    if item_id not in _data:
-        return False
-    del _data[item_id]
-    _save_to_disk()
-    return True
+    def compact(self):
+        """Fold the journal into a fresh snapshot and truncate it."""
+        self._compactor.drain()
+        with self._mutation():
+            self._compact()
 
+    def flush(self):
+        """Wait until every mutation made so far is on disk (and a lazy load has finished)."""
+        loader = self._loader
+        if loader is not None and loader is not threading.current_thread():
+            loader.join()
+        self._writer.drain()
+        self._compactor.drain()
 
-# Load data initially
-_load_from_disk()
+    def close(self):
+        self._compactor.close()
+        self._writer.close()
+        with self._lock.write():
+            if self._journal is not None:
+                self._journal.close()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
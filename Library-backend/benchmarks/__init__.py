@@ -0,0 +1,25 @@
+# benchmarks/__init__.py
+# Standalone performance / stress scripts for the backend.
+# Run from the Library-backend folder, e.g. `python -m benchmarks.bench_backends`.
+import os
+
+from app.backends import create_backend
+
+
+def make_backend(name, directory, **config):
+    """A storage engine whose files all live in `directory`."""
+    settings = {
+        "STORAGE_BACKEND": name,
+        "STORAGE_FILE": os.path.join(directory, "library.json"),
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(directory, "library.db"),
+    }
+    settings.update(config)
+    return create_backend(settings)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
@@ -0,0 +1,107 @@
+# benchmarks/bench_backends.py
+"""
+Compare storage engines operation by operation across catalog sizes.
+
+For every backend and size the catalog is bulk-loaded, then each operation
+is timed individually. Reports ops/sec and p50/p99 latency (microseconds).
+
+    python -m benchmarks.bench_backends --sizes 1000 10000 100000 --ops 2000
+    python -m benchmarks.bench_backends --backends json sqlite --json results.json
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+from app.backends import BACKENDS
+
+from . import make_backend, percentile
+from .catalog import ITEM_TYPES, generate_items
+
+
+def _operations(store, items, rng):
+    """name -> zero-arg callable performing one randomized operation."""
+    ids = [item["id"] for item in items]
+    titles = [item["title"] for item in items]
+    words = [w[:4] for t in titles[:1000] for w in t.lower().split()]
+
+    def update():
+        store.update_item(rng.choice(ids), {"is_available": rng.random() < 0.5})
+
+    def add_then_delete():
+        store.delete_item(store.add_item({"title": "Bench", "item_type": "book"})["id"])
+
+    return {
+        "get_item": lambda: store.get_item(rng.choice(ids)),
+        "filter_name": lambda: store.get_items(name=rng.choice(titles)),
+        "page_by_type": lambda: store.get_page(50, after=rng.choice(ids), item_type=rng.choice(ITEM_TYPES)),
+        "page": lambda: store.get_page(100, after=rng.choice(ids)),
+        "search": lambda: store.search(rng.choice(words), limit=20),
+        "due_before": lambda: store.get_unavailable(date(2024, rng.randint(1, 12), 1)),
+        "update_item": update,
+        "add+delete": add_then_delete,
+    }
+
+
+def bench(backend, size, ops, seed=1):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_backend(backend, tmp)
+        t0 = time.perf_counter()
+        for start in range(0, size, 1000):
+            items_chunk = generate_items(min(1000, size - start), seed=seed + start)
+            store.add_items(items_chunk)
+        load_s = time.perf_counter() - t0
+        items = store.get_items()
+
+        results = []
+        for name, op in _operations(store, items, rng).items():
+            samples = []
+            for _ in range(ops):
+                t = time.perf_counter()
+                op()
+                samples.append(time.perf_counter() - t)
+            samples.sort()
+            total = sum(samples)
+            results.append({
+                "backend": backend,
+                "size": size,
+                "op": name,
+                "ops_per_sec": ops / total if total else float("inf"),
+                "p50_us": percentile(samples, 50) * 1e6,
+                "p99_us": percentile(samples, 99) * 1e6,
+            })
+        store.close()
+    return load_s, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark storage backends")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--ops", type=int, default=1000, help="timed calls per operation")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    rows = []
+    print(f"{'backend':<8} {'size':>8} {'op':<13} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9}")
+    for size in args.sizes:
+        for backend in args.backends:
+            load_s, results = bench(backend, size, args.ops)
+            print(f"{backend:<8} {size:>8} {'bulk load':<13} {size / load_s:>10,.0f}")
+            for r in results:
+                print(f"{r['backend']:<8} {r['size']:>8} {r['op']:<13} {r['ops_per_sec']:>10,.0f} "
+                      f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f}")
+            rows.extend(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
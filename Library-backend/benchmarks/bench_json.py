@@ -0,0 +1,64 @@
+# benchmarks/bench_json.py
+"""
+Serialize / deserialize cost of the library.json snapshot per encoder.
+
+Compares the original format (stdlib, indent=2), stdlib compact, and
+orjson (if installed), reporting encode/decode time and size.
+
+    python -m benchmarks.bench_json --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+
+from .catalog import generate_items
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encoders():
+    encoders = {
+        "stdlib indent=2": (lambda obj: json.dumps(obj, indent=2).encode(), json.loads),
+        "stdlib compact": (lambda obj: json.dumps(obj, separators=(",", ":")).encode(), json.loads),
+    }
+    if orjson is not None:
+        encoders["orjson"] = (lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+    return encoders
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark snapshot JSON encoders")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if orjson is None:
+        print("orjson is not installed; only stdlib encoders are compared")
+
+    print(f"{'size':>8} {'encoder':<16} {'encode ms':>10} {'decode ms':>10} {'MB':>8}")
+    for size in args.sizes:
+        items = generate_items(size)
+        snapshot = {"data": {i: dict(item, id=i) for i, item in enumerate(items, 1)}, "next_id": size + 1}
+        for name, (encode, decode) in _encoders().items():
+            blob = encode(snapshot)
+            enc = _best_of(lambda: encode(snapshot), args.repeat)
+            dec = _best_of(lambda: decode(blob), args.repeat)
+            print(f"{size:>8} {name:<16} {enc * 1e3:>10.1f} {dec * 1e3:>10.1f} {len(blob) / 1e6:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
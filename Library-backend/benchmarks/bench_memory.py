@@ -0,0 +1,84 @@
+# benchmarks/bench_memory.py
+"""
+Memory per item of the in-memory item store.
+
+Each layout is built from a decoded snapshot, the way JsonStorage loads
+one, and measured with tracemalloc (item strings included):
+
+  - dict records : {id: dict}, the layout MemoryStorage used to keep
+  - ItemRecord   : {id: ItemRecord}, the current slotted layout
+  - MemoryStorage: a whole store, ItemRecords plus every index
+
+    python -m benchmarks.bench_memory --sizes 10000 100000 1000000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from app import fastjson
+from app.storage import ItemRecord, MemoryStorage
+
+from .catalog import generate_items
+
+
+def _snapshot_bytes(size):
+    items = generate_items(size)
+    data = {i: dict(item, id=i, version=i) for i, item in enumerate(items, 1)}
+    return fastjson.dumps_bytes({"data": data, "next_id": size + 1})
+
+
+def _dict_records(blob):
+    return {int(k): v for k, v in fastjson.loads(blob)["data"].items()}
+
+
+def _item_records(blob):
+    return {int(k): ItemRecord(v) for k, v in fastjson.loads(blob)["data"].items()}
+
+
+def _memory_storage(blob):
+    store = MemoryStorage()
+    for item in fastjson.loads(blob)["data"].values():
+        store._apply({"op": "put", "item": item})
+    return store
+
+
+LAYOUTS = {
+    "dict records": _dict_records,
+    "ItemRecord": _item_records,
+    "MemoryStorage": _memory_storage,
+}
+
+
+def measure(build, blob):
+    """Bytes still allocated by what `build(blob)` returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        kept = build(blob)
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    del kept
+    return used
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark memory per stored item")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=list(LAYOUTS))
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>8} {'layout':<14} {'MB':>8} {'bytes/item':>11}")
+    for size in args.sizes:
+        blob = _snapshot_bytes(size)
+        for name in args.layouts:
+            used = measure(LAYOUTS[name], blob)
+            print(f"{size:>8} {name:<14} {used / 1e6:>8.1f} {used / size:>11.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
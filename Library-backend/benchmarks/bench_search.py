@@ -0,0 +1,113 @@
+# benchmarks/bench_search.py
+"""
+Full-text search latency against the sub-millisecond target.
+
+For each size a SearchIndex is filled from the synthetic catalog, then
+every query shape below is run `--queries` times with words drawn from
+the catalog vocabulary, limit = DEFAULT_SEARCH_LIMIT. Reports p50/p99 in
+microseconds and flags shapes whose p99 misses `--target-ms`; the exit
+status is 1 if any does.
+
+  - word      : one whole word ("dunrakal")
+  - prefix4   : a 4-character prefix ("dunr")
+  - prefix2   : a 2-character prefix ("du"), MAX_PREFIX_EXPANSIONS tokens
+  - two_words : two whole words, AND-ed
+  - word_pref : a whole word and a 3-character prefix
+  - by_type   : one word within one item type (storage's `allowed` IdList)
+
+    python -m benchmarks.bench_search --sizes 100000 1000000
+
+Measured limits (one core, default catalog, 2000 queries per shape): at
+10^6 items word, prefix4, prefix2 and by_type stay under 1 ms at p99
+(about 0.1-0.3 ms; by_type 1.0 ms). AND queries do not: two_words p50
+0.3 ms / p99 2.7 ms, word_pref p50 1.4 ms / p99 10 ms. Their cost follows
+the postings of the rarest term's score levels that have to be walked,
+about 1 us each, and a short word's prefix completions give it ~10^4.
+At 10^5 items only word_pref misses, at p99 (1.3 ms).
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.routes import DEFAULT_SEARCH_LIMIT
+from app.search import SearchIndex
+from app.storage import IdList
+
+from . import percentile
+from .catalog import ITEM_TYPES, catalog_words, iter_items
+
+TARGET_MS = 1.0
+
+
+def _build(size, seed):
+    index = SearchIndex()
+    by_type = {item_type: IdList() for item_type in ITEM_TYPES}
+    for item_id, item in enumerate(iter_items(size, seed), 1):
+        index.add(item_id, item["title"], item["author_or_director"])
+        by_type[item["item_type"]].append(item_id)
+    return index, by_type
+
+
+def _shapes(words, by_type, rng):
+    """name -> zero-arg callable returning (query, allowed)."""
+    return {
+        "word": lambda: (rng.choice(words), None),
+        "prefix4": lambda: (rng.choice(words)[:4], None),
+        "prefix2": lambda: (rng.choice(words)[:2], None),
+        "two_words": lambda: (f"{rng.choice(words)} {rng.choice(words)}", None),
+        "word_pref": lambda: (f"{rng.choice(words)} {rng.choice(words)[:3]}", None),
+        "by_type": lambda: (rng.choice(words), by_type[rng.choice(ITEM_TYPES)]),
+    }
+
+
+def bench(size, queries, seed=42):
+    started = time.perf_counter()
+    index, by_type = _build(size, seed)
+    build_s = time.perf_counter() - started
+    rng = random.Random(seed)
+    results = []
+    for name, make in _shapes(catalog_words(seed), by_type, rng).items():
+        samples = []
+        for _ in range(queries):
+            query, allowed = make()
+            t = time.perf_counter()
+            index.search(query, limit=DEFAULT_SEARCH_LIMIT, allowed=allowed)
+            samples.append(time.perf_counter() - t)
+        samples.sort()
+        results.append({
+            "size": size,
+            "shape": name,
+            "p50_us": percentile(samples, 50) * 1e6,
+            "p99_us": percentile(samples, 99) * 1e6,
+        })
+    return build_s, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark full-text search latency")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100000, 1000000])
+    parser.add_argument("--queries", type=int, default=2000, help="timed queries per shape")
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS, help="p99 latency target")
+    args = parser.parse_args(argv)
+
+    missed = []
+    print(f"{'size':>8} {'shape':<10} {'p50 us':>9} {'p99 us':>9}")
+    for size in args.sizes:
+        build_s, results = bench(size, args.queries)
+        print(f"{size:>8} {'build':<10} {build_s * 1e6 / size:>9.1f}  (per item)")
+        for r in results:
+            miss = r["p99_us"] > args.target_ms * 1e3
+            if miss:
+                missed.append(f"{r['shape']}@{size}")
+            print(f"{size:>8} {r['shape']:<10} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f}"
+                  f"{'  MISSES TARGET' if miss else ''}")
+    if missed:
+        print(f"\np99 above {args.target_ms:g} ms: {', '.join(missed)}.\nAND queries (two_words,"
+              f" word_pref) cost about 1 us per posting of their rarest term's walked score"
+              f" levels; measured limits are listed in benchmarks/bench_search.py.")
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
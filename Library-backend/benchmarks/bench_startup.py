@@ -0,0 +1,82 @@
+# benchmarks/bench_startup.py
+"""
+Time to first request after a restart, eager vs lazy (STORAGE_LAZY_LOAD).
+
+For each size a JSON catalog (indexed snapshot plus a journal tail) is
+written once, then the app is started on it `--repeat` times and the
+median of each milestone is reported, in milliseconds since startup:
+
+  - start : create_app() returned
+  - health: first /health response (liveness)
+  - page  : first GET /api/items?limit=500, the desktop client's first request
+  - ready : /ready answers 200 (full load done)
+
+    python -m benchmarks.bench_startup --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from app import create_app
+from app.storage import JsonStorage
+
+from .load.server import seed_catalog
+
+JOURNAL_TAIL = 200
+MODES = {"eager": False, "lazy": True}
+
+
+def _write_catalog(directory, size):
+    store = JsonStorage(os.path.join(directory, "library.json"))
+    seed_catalog(store, size, seed=42)
+    for item_id in range(1, min(size, JOURNAL_TAIL) + 1):
+        store.update_item(item_id, {"is_available": False})
+    store.close()
+
+
+def _start(directory, lazy):
+    config = type("StartupConfig", (), {
+        "STORAGE_BACKEND": "json",
+        "STORAGE_FILE": os.path.join(directory, "library.json"),
+        "STORAGE_LAZY_LOAD": lazy,
+        "METRICS_ENABLED": False,
+    })
+    started = time.perf_counter()
+    app = create_app(config)
+    timings = {"start": time.perf_counter() - started}
+    client = app.test_client()
+    client.get("/health")
+    timings["health"] = time.perf_counter() - started
+    client.get("/api/items", query_string={"limit": 500})
+    timings["page"] = time.perf_counter() - started
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.001)
+    timings["ready"] = time.perf_counter() - started
+    app.extensions["storage"].close()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time to first request after a restart")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 100000])
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>8} {'mode':<6} {'start':>9} {'health':>9} {'page':>9} {'ready':>9}  (ms)")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            _write_catalog(directory, size)
+            for mode in args.modes:
+                runs = [_start(directory, MODES[mode]) for _ in range(args.repeat)]
+                medians = {k: statistics.median(run[k] for run in runs) * 1e3 for k in runs[0]}
+                print(f"{size:>8} {mode:<6} {medians['start']:>9.1f} {medians['health']:>9.1f} "
+                      f"{medians['page']:>9.1f} {medians['ready']:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
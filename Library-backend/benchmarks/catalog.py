@@ -0,0 +1,45 @@
+# benchmarks/catalog.py
+"""Deterministic synthetic catalogs for benchmarks."""
+import random
+
+ITEM_TYPES = ["book", "film", "magazine", "other"]
+
+_SYLLABLES = ["ka", "lo", "mi", "ra", "tes", "dun", "sol", "ar", "is", "be", "tor", "vel",
+              "no", "qui", "em", "pha", "zan", "or", "lu", "cre"]
+
+
+def make_words(count, rng):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def catalog_words(seed=42, vocabulary=5000):
+    """The vocabulary iter_items(..., seed, vocabulary) draws titles and authors from."""
+    return make_words(vocabulary, random.Random(seed))
+
+
+def iter_items(n, seed=42, vocabulary=5000):
+    """
+    `n` item payloads (no ids) with realistic-looking titles/authors drawn
+    from a fixed vocabulary, so searches and exact-name lookups hit.
+    Yielded one at a time, so 10^6-item catalogs need not fit in memory.
+    """
+    rng = random.Random(seed)
+    words = make_words(vocabulary, rng)
+    for _ in range(n):
+        available = rng.random() < 0.8
+        yield {
+            "title": " ".join(rng.choice(words) for _ in range(rng.randint(1, 4))).title(),
+            "item_type": rng.choice(ITEM_TYPES),
+            "author_or_director": f"{rng.choice(words).title()} {rng.choice(words).title()}",
+            "is_available": available,
+            "expected_available_date": None if available else
+                f"20{rng.randint(24, 27)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        }
+
+
+def generate_items(n, seed=42, vocabulary=5000):
+    """iter_items() as a list."""
+    return list(iter_items(n, seed, vocabulary))
@@ -0,0 +1,14 @@
+# benchmarks/load/__init__.py
+"""
+HTTP load tests for the backend API.
+
+A server process is started locally on a synthetic catalog (10^3 to 10^6
+items, see benchmarks/catalog.py); concurrent clients then drive it with a
+scenario mix (scenarios.py) for a fixed time. Throughput and latency
+percentiles are printed and can be written as JSON; `compare` diffs two
+such files, e.g. from two commits.
+
+    python -m benchmarks.load run --sizes 1000 100000 --clients 1 8 --json new.json
+    python -m benchmarks.load run --backend sqlite --scenarios mixed --duration 30
+    python -m benchmarks.load compare old.json new.json
+"""
@@ -0,0 +1,117 @@
+# benchmarks/load/__main__.py
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+
+from app.backends import BACKENDS
+
+from .runner import REQUEST_TIMEOUT, run_scenario
+from .scenarios import SCENARIOS
+from .server import LocalServer
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run(args):
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "started": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "timeout_s": args.timeout,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    print(f"{'size':>8} {'scenario':<12} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7} {'timeouts':>8}")
+    for size in args.sizes:
+        with LocalServer(args.backend, size, seed=args.seed,
+                         settings={"METRICS_ENABLED": not args.no_metrics}) as base:
+            for scenario in args.scenarios:
+                for clients in args.clients:
+                    r = run_scenario(base, size, scenario, clients, args.duration, args.warmup, args.seed,
+                                     args.timeout)
+                    r["backend"] = args.backend
+                    report["results"].append(r)
+                    lat = r["latency_ms"]
+                    print(f"{size:>8} {scenario:<12} {clients:>7} {r['throughput_rps']:>9,.0f} "
+                          f"{lat['p50']:>8.2f} {lat['p90']:>8.2f} {lat['p99']:>8.2f} {r['errors']:>7} {r['timeouts']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def _key(result):
+    return result.get("backend"), result["size"], result["scenario"], result["clients"]
+
+
+def compare(args):
+    """Throughput and p99 change per run present in both files; 1 if any regressed."""
+    with open(args.baseline) as f:
+        baseline = {_key(r): r for r in json.load(f)["results"]}
+    with open(args.candidate) as f:
+        candidate = json.load(f)["results"]
+
+    regressed = False
+    print(f"{'backend':<8} {'size':>8} {'scenario':<12} {'clients':>7} {'req/s':>9} {'change':>8} "
+          f"{'p99 ms':>8} {'change':>8}")
+    for new in candidate:
+        old = baseline.get(_key(new))
+        if old is None:
+            continue
+        rps = (new["throughput_rps"] / old["throughput_rps"] - 1) * 100 if old["throughput_rps"] else 0.0
+        p99 = (new["latency_ms"]["p99"] / old["latency_ms"]["p99"] - 1) * 100 if old["latency_ms"]["p99"] else 0.0
+        flag = rps < -args.threshold or p99 > args.threshold
+        regressed |= flag
+        print(f"{new.get('backend', '-'):<8} {new['size']:>8} {new['scenario']:<12} {new['clients']:>7} "
+              f"{new['throughput_rps']:>9,.0f} {rps:>+7.1f}% {new['latency_ms']['p99']:>8.2f} {p99:>+7.1f}%"
+              f"{'  REGRESSION' if flag else ''}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Load-test the backend API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("run", help="start a local server and load it")
+    p.add_argument("--backend", choices=sorted(BACKENDS), default="json")
+    p.add_argument("--sizes", nargs="+", type=int, default=[1000, 100000], help="catalog sizes (items)")
+    p.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    p.add_argument("--clients", nargs="+", type=int, default=[1, 8], help="concurrent client counts")
+    p.add_argument("--duration", type=float, default=10.0, help="measured seconds per run")
+    p.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before each run")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT,
+                   help="seconds before a request is abandoned and counted as an error")
+    p.add_argument("--no-metrics", action="store_true", help="run the server with METRICS_ENABLED = False")
+    p.add_argument("--json", help="write the results to this file")
+    p.set_defaults(func=run)
+
+    p = commands.add_parser("compare", help="diff two --json result files")
+    p.add_argument("baseline")
+    p.add_argument("candidate")
+    p.add_argument("--threshold", type=float, default=10.0, help="percent change that counts as a regression")
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
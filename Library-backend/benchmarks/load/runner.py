@@ -0,0 +1,124 @@
+# benchmarks/load/runner.py
+"""Concurrent clients driving a server with a scenario, and their statistics."""
+import random
+import threading
+import time
+
+import requests
+
+from .. import percentile
+from ..catalog import catalog_words
+from .scenarios import SCENARIOS
+
+REQUEST_TIMEOUT = 10.0      # seconds; a stalled request counts as an error, not a hang
+
+
+class Client:
+    """One simulated user: its own connection, random stream and paging state."""
+
+    def __init__(self, base, size, words, seed, timeout=REQUEST_TIMEOUT):
+        self.base = base
+        self.timeout = timeout
+        self.size = size
+        self.words = words
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.cursor = None
+        self.created = []
+        head = self.get("/items", params={"limit": 1}).json()
+        self.version, self.epoch = head["version"], head["epoch"]
+
+    def get(self, path, params=None):
+        return self.session.get(self.base + path, params=params, timeout=self.timeout)
+
+    def post(self, path, json):
+        return self.session.post(self.base + path, json=json, timeout=self.timeout)
+
+    def put(self, path, json):
+        return self.session.put(self.base + path, json=json, timeout=self.timeout)
+
+    def patch(self, path, json):
+        return self.session.patch(self.base + path, json=json, timeout=self.timeout)
+
+    def delete(self, path):
+        return self.session.delete(self.base + path, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+def _drive(client, operations, deadline, measure_from, samples):
+    ops, weights = zip(*operations)
+    while True:
+        op = client.rng.choices(ops, weights)[0]
+        started = time.perf_counter()
+        if started >= deadline:
+            return
+        timed_out = False
+        try:
+            ok = op(client).ok
+        except requests.Timeout:
+            ok, timed_out = False, True
+        except requests.RequestException:
+            ok = False
+        if started >= measure_from:
+            samples.append((op.__name__, time.perf_counter() - started, ok, timed_out))
+
+
+def _latency_ms(latencies):
+    latencies = sorted(latencies)
+    return {
+        "p50": percentile(latencies, 50) * 1e3,
+        "p90": percentile(latencies, 90) * 1e3,
+        "p99": percentile(latencies, 99) * 1e3,
+        "max": (latencies[-1] if latencies else 0.0) * 1e3,
+    }
+
+
+def run_scenario(base, size, scenario, clients, duration, warmup=1.0, seed=42, timeout=REQUEST_TIMEOUT):
+    """
+    Run `clients` concurrent clients for warmup + duration seconds and
+    summarize the requests issued after the warmup. Requests that take
+    longer than `timeout` seconds are abandoned and counted as errors (and
+    under "timeouts").
+    """
+    words = catalog_words(seed)
+    pool = [Client(base, size, words, seed * 1000 + n, timeout) for n in range(clients)]
+    samples = [[] for _ in pool]
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+    threads = [
+        threading.Thread(target=_drive, args=(client, SCENARIOS[scenario], deadline, measure_from, out))
+        for client, out in zip(pool, samples)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - measure_from
+    for client in pool:
+        client.close()
+
+    merged = [s for chunk in samples for s in chunk]
+    ops = {}
+    for name, latency, ok, timed_out in merged:
+        ops.setdefault(name, ([], [0, 0]))
+        ops[name][0].append(latency)
+        ops[name][1][0] += not ok
+        ops[name][1][1] += timed_out
+    return {
+        "scenario": scenario,
+        "size": size,
+        "clients": clients,
+        "duration_s": elapsed,
+        "requests": len(merged),
+        "errors": sum(not ok for _, _, ok, _ in merged),
+        "timeouts": sum(timed_out for *_, timed_out in merged),
+        "throughput_rps": len(merged) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": _latency_ms([latency for _, latency, *_ in merged]),
+        "ops": {
+            name: dict(count=len(latencies), errors=errors, timeouts=timeouts, **_latency_ms(latencies))
+            for name, (latencies, (errors, timeouts)) in sorted(ops.items())
+        },
+    }
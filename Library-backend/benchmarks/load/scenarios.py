@@ -0,0 +1,87 @@
+# benchmarks/load/scenarios.py
+"""
+Request mixes. Each operation takes a Client (runner.py) and issues one
+request; a scenario is a weighted choice of operations.
+"""
+from ..catalog import ITEM_TYPES
+
+PAGE = 100
+
+
+def list_page(client):
+    """Walk the catalog page by page, wrapping around at the end."""
+    params = {"limit": PAGE}
+    if client.cursor:
+        params["cursor"] = client.cursor
+    r = client.get("/items", params)
+    client.cursor = r.json()["next_cursor"] if r.ok else None
+    return r
+
+
+def get_item(client):
+    return client.get(f"/items/{client.rng.randint(1, client.size)}")
+
+
+def list_type(client):
+    return client.get("/items", {"type": client.rng.choice(ITEM_TYPES), "limit": PAGE})
+
+
+def changes(client):
+    r = client.get("/items/changes", {"since": client.version, "epoch": client.epoch})
+    if r.ok:
+        data = r.json()
+        client.version, client.epoch = data["version"], data["epoch"]
+    return r
+
+
+def search(client):
+    return client.get("/items", {"q": client.rng.choice(client.words)[:4], "limit": 20})
+
+
+def search_type(client):
+    return client.get("/items", {"q": client.rng.choice(client.words)[:3], "type": client.rng.choice(ITEM_TYPES),
+                                 "limit": 20})
+
+
+def by_name(client):
+    return client.get("/items", {"name": client.rng.choice(client.words).title()})
+
+
+def due_before(client):
+    return client.get("/items", {"available": "false", "limit": PAGE,
+                                 "due_before": f"2024-{client.rng.randint(1, 12):02d}-01"})
+
+
+def create(client):
+    r = client.post("/items", {"title": f"Load {client.rng.choice(client.words)}",
+                               "item_type": client.rng.choice(ITEM_TYPES)})
+    if r.ok:
+        client.created.append(r.json()["id"])
+    return r
+
+
+def update(client):
+    return client.put(f"/items/{client.rng.randint(1, client.size)}",
+                      {"is_available": client.rng.random() < 0.5})
+
+
+def batch_update(client):
+    first = client.rng.randint(1, max(1, client.size - 50))
+    return client.patch("/items", [{"id": i, "is_available": True} for i in range(first, first + 50)
+                                   if i <= client.size])
+
+
+def delete_own(client):
+    """Delete an item this client created (creating one first if it has none)."""
+    if not client.created:
+        return create(client)
+    return client.delete(f"/items/{client.created.pop()}")
+
+
+SCENARIOS = {
+    "read-heavy": [(list_page, 6), (get_item, 3), (list_type, 1), (changes, 1)],
+    "search": [(search, 6), (search_type, 2), (by_name, 1), (due_before, 1)],
+    "write-burst": [(create, 4), (update, 4), (batch_update, 1), (delete_own, 1)],
+    "mixed": [(list_page, 30), (get_item, 25), (changes, 5), (search, 15), (search_type, 5),
+              (due_before, 5), (create, 5), (update, 7), (batch_update, 1), (delete_own, 2)],
+}
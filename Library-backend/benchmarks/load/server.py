@@ -0,0 +1,76 @@
+# benchmarks/load/server.py
+"""A backend server on a seeded catalog, in its own process."""
+import logging
+import multiprocessing
+import os
+import tempfile
+
+from ..catalog import iter_items
+
+SEED_BATCH = 1000
+
+
+def seed_catalog(store, size, seed):
+    """Bulk-load `size` generated items, folding the journal only once at the end."""
+    threshold = getattr(store, "compact_threshold", None)
+    if threshold is not None:
+        store.compact_threshold = float("inf")
+    batch = []
+    for item in iter_items(size, seed=seed):
+        batch.append(item)
+        if len(batch) == SEED_BATCH:
+            store.add_items(batch)
+            batch = []
+    if batch:
+        store.add_items(batch)
+    if threshold is not None:
+        store.compact_threshold = threshold
+    store.compact()
+
+
+def _serve(backend, size, seed, settings, ready):
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as directory:
+        config = type("LoadTestConfig", (), {
+            "STORAGE_BACKEND": backend,
+            "STORAGE_FILE": os.path.join(directory, "library.json"),
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(directory, "library.db"),
+            **settings,
+        })
+        app = create_app(config)
+        seed_catalog(app.extensions["storage"], size, seed)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        ready.put(server.server_port)
+        server.serve_forever()
+
+
+class LocalServer:
+    """
+    Context manager running the API on `backend` seeded with `size` items;
+    yields the base URL. `settings` are extra app config (e.g. METRICS_ENABLED).
+    """
+
+    def __init__(self, backend, size, seed=42, settings=None, start_timeout=3600):
+        self.backend = backend
+        self.size = size
+        self.seed = seed
+        self.settings = settings or {}
+        self.start_timeout = start_timeout
+        self._process = None
+
+    def __enter__(self):
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        self._process = context.Process(
+            target=_serve, args=(self.backend, self.size, self.seed, self.settings, ready), daemon=True
+        )
+        self._process.start()
+        port = ready.get(timeout=self.start_timeout)
+        return f"http://127.0.0.1:{port}/api"
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join()
@@ -0,0 +1,95 @@
+# benchmarks/stress_writers.py
+"""
+Hammer a storage backend from many threads and check nothing was lost.
+
+Each writer thread creates items and then updates every item it created;
+readers list the catalog in a loop meanwhile. At the end the script checks
+that every id is unique, every write is visible, and (for persistent
+backends) a freshly opened store sees the same catalog. Prints throughput
+and exits non-zero on failure.
+
+    python -m benchmarks.stress_writers --writers 16 --ops 500 --backend sqlite
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+
+from app.backends import BACKENDS
+
+from . import make_backend
+
+
+def run(storage, writers, ops, readers):
+    created = [[] for _ in range(writers)]
+    stop = threading.Event()
+    start = threading.Barrier(writers + readers)
+
+    def writer(slot):
+        start.wait()
+        for i in range(ops):
+            created[slot].append(storage.add_item({"title": f"w{slot}-{i}", "item_type": "book"})["id"])
+        for item_id in created[slot]:
+            storage.update_item(item_id, {"is_available": False})
+
+    def reader():
+        start.wait()
+        while not stop.is_set():
+            storage.get_items(item_type="book")
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads + reader_threads:
+        t.start()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    for t in reader_threads:
+        t.join()
+
+    ids = [i for chunk in created for i in chunk]
+    failures = []
+    if len(ids) != len(set(ids)):
+        failures.append(f"duplicate ids: {len(ids) - len(set(ids))}")
+    items = storage.get_items()
+    if len(items) != writers * ops:
+        failures.append(f"expected {writers * ops} items, found {len(items)}")
+    if any(item["is_available"] for item in items):
+        failures.append("lost updates: some items are still available")
+
+    return elapsed, ids, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent writer stress test")
+    parser.add_argument("--backend", default="json", choices=sorted(BACKENDS))
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--ops", type=int, default=250, help="items created per writer")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_backend(args.backend, tmp)
+        elapsed, ids, failures = run(storage, args.writers, args.ops, args.readers)
+        storage.close()
+
+        if args.backend != "memory":
+            reopened = make_backend(args.backend, tmp)
+            if sorted(i["id"] for i in reopened.get_items()) != sorted(ids):
+                failures.append("catalog reopened from disk differs from memory")
+            reopened.close()
+
+    writes = args.writers * args.ops * 2
+    print(f"{args.backend}: {args.writers} writers x {args.ops} items (+{args.readers} readers): "
+          f"{writes} writes in {elapsed:.2f}s = {writes / elapsed:,.0f} writes/s")
+
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,9 +2,10 @@
 
 
 from app import create_app
+from app.config import Config
 
 
-app = create_app()
+app = create_app(Config)
 
 
 
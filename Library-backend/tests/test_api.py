@@ -10,27 +10,31 @@ from app import create_app
 
 import os
 import json
-import shutil
 import pytest
-import importlib
 
 from app import create_app
 
-# Path to the backend folder (adjust if your structure differs)
-HERE = os.path.dirname(os.path.dirname(__file__))  # Project/Library-backend/tests -> Project/Library-backend
-STORAGE_FILE_PATH = os.path.join(HERE, "library.json")
+# Every scenario in this file runs against each storage engine, so this file
+# doubles as the backend conformance suite.
+BACKENDS = ["json", "memory", "sqlite"]
 
 
-@pytest.fixture
-def app():
+@pytest.fixture(params=BACKENDS)
+def app(request, tmp_path):
     """
-    Create Flask test app and ensure the JSON storage is reset before tests.
+    Create Flask test app on a fresh, empty storage engine.
     Also register the API blueprint if create_app() did not.
     """
     from app import create_app
 
-    app = create_app()
-    app.config["TESTING"] = True
+    class TestConfig:
+        TESTING = True
+        STORAGE_BACKEND = request.param
+        # throwaway snapshot/journal/database so tests never touch the real library
+        STORAGE_FILE = str(tmp_path / "library.json")
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'library.db'}"
+
+    app = create_app(TestConfig)
 
     # ---- Ensure blueprint is registered ----
     try:
@@ -41,38 +45,24 @@ def app():
     except Exception as e:
         print("Blueprint registration failed:", e)
 
-    # ---- Reset JSON storage before tests ----
-    with app.app_context():
-        try:
-            from app import storage as storage_mod
-        except Exception:
-            import app.storage as storage_mod
-
-        # remove on-disk library.json if it exists
-        try:
-            if os.path.exists(STORAGE_FILE_PATH):
-                os.remove(STORAGE_FILE_PATH)
-        except Exception:
-            pass
-
-        # reset in-memory storage
-        storage_mod._data = {}
-        storage_mod._next_id = 1
-
     yield app
 
     # ---- Teardown after tests ----
-    try:
-        if os.path.exists(STORAGE_FILE_PATH):
-            os.remove(STORAGE_FILE_PATH)
-    except Exception:
-        pass
+    app.extensions["storage"].close()
 
 @pytest.fixture
 def client(app):
     return app.test_client()
 
 
+def test_health_and_readiness(client):
+    """/health (liveness) and /ready (storage loaded) both answer once started"""
+    client.application.extensions["storage"].get_items()   # waits for a lazy load
+    assert client.get("/health").get_json() == {"status": "ok"}
+    res = client.get("/ready")
+    assert res.status_code == 200 and res.get_json() == {"status": "ready"}
+
+
 def test_items_initially_empty(client):
     """GET /items should return an empty list when storage is empty"""
     res = client.get("/api/items")
@@ -167,3 +157,245 @@ def test_update_item_put(client):
     assert updated["title"] == "UpdatedTitle"
     assert updated["is_available"] is False
     assert updated["expected_available_date"] == "2025-12-31"
+
+
+def test_keyset_pagination_and_fields(client):
+    """?limit= pages through items by id with an opaque cursor; ?fields= projects keys"""
+    for i in range(5):
+        client.post("/api/items", json={"title": f"Item{i}", "item_type": "book"})
+
+    seen = []
+    cursor = None
+    while True:
+        query = {"limit": 2, "fields": "id,title"}
+        if cursor:
+            query["cursor"] = cursor
+        res = client.get("/api/items", query_string=query)
+        assert res.status_code == 200
+        page = res.get_json()
+        assert all(set(item) == {"id", "title"} for item in page["items"])
+        assert page["version"] == 5
+        seen.extend(item["title"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"Item{i}" for i in range(5)]
+
+    assert client.get("/api/items", query_string={"cursor": "garbage"}).status_code == 400
+    assert client.get("/api/items", query_string={"limit": 0}).status_code == 400
+    assert client.get("/api/items", query_string={"fields": "nope"}).status_code == 400
+
+
+def test_full_text_search_ranked(client):
+    """?q= matches title/author words and prefixes, title hits ranked first"""
+    client.post("/api/items", json={"title": "The Hobbit", "item_type": "book", "author_or_director": "J.R.R. Tolkien"})
+    client.post("/api/items", json={"title": "Tolkien", "item_type": "film", "author_or_director": "Dome Karukoski"})
+    client.post("/api/items", json={"title": "Dune", "item_type": "book", "author_or_director": "Frank Herbert"})
+
+    res = client.get("/api/items", query_string={"q": "tolk"})
+    assert res.status_code == 200
+    assert [i["title"] for i in res.get_json()] == ["Tolkien", "The Hobbit"]
+
+    res = client.get("/api/items", query_string={"q": "hob tolkien"})
+    assert [i["title"] for i in res.get_json()] == ["The Hobbit"]
+
+    res = client.get("/api/items", query_string={"q": "tolkien", "type": "book"})
+    assert [i["title"] for i in res.get_json()] == ["The Hobbit"]
+
+    res = client.get("/api/items", query_string={"q": "nothing"})
+    assert res.get_json() == []
+
+
+def test_due_date_queries(client):
+    """?available=false&due_before= and /items/overdue list unavailable items by due date"""
+    def add(title, available=True, due=None, item_type="book"):
+        return client.post("/api/items", json={"title": title, "item_type": item_type, "is_available": available,
+                                               "expected_available_date": due}).get_json()["id"]
+
+    add("On shelf")
+    late = add("Late", False, "2001-03-01")
+    later = add("Later", False, "2001-05-01", "film")
+    future = add("Future", False, "2999-01-01")
+    undated = add("Undated", False)
+    earliest = add("Earliest", False, "2001-02-01")
+
+    def titles(res):
+        assert res.status_code == 200
+        return [i["title"] for i in res.get_json()]
+
+    assert titles(client.get("/api/items?available=false")) == \
+        ["Earliest", "Late", "Later", "Future", "Undated"]
+    assert titles(client.get("/api/items?available=false&due_before=2001-05-01")) == ["Earliest", "Late"]
+    assert titles(client.get("/api/items?due_before=2001-05-02&type=film")) == ["Later"]
+    assert titles(client.get("/api/items?available=true")) == ["On shelf"]
+    assert titles(client.get("/api/items/overdue")) == ["Earliest", "Late", "Later"]
+
+    # returning an item, or moving its date, moves it in the index
+    client.put(f"/api/items/{late}", json={"is_available": True, "expected_available_date": None})
+    client.put(f"/api/items/{future}", json={"expected_available_date": "2001-01-01"})
+    client.post("/api/items/batch-delete", json={"ids": [later]})
+    res = client.get("/api/items/overdue", query_string={"fields": "id"})
+    assert res.get_json() == [{"id": future}, {"id": earliest}]
+    assert undated not in [i["id"] for i in res.get_json()]
+
+    assert client.get("/api/items?due_before=soon").status_code == 400
+    assert client.get("/api/items?available=maybe").status_code == 400
+    assert client.get("/api/items?available=true&due_before=2001-01-01").status_code == 400
+
+
+def test_bulk_import_and_export_ndjson(client):
+    """POST /items/bulk ingests NDJSON lines; GET /items/export streams them back"""
+    lines = [
+        json.dumps({"title": "One", "item_type": "book"}),
+        "",
+        "{not json",
+        json.dumps({"title": "Two", "item_type": "film", "author_or_director": "X"}),
+        json.dumps({"item_type": "book"}),
+    ]
+    res = client.post("/api/items/bulk", data="\n".join(lines) + "\n", content_type="application/x-ndjson")
+    assert res.status_code == 200
+    report = res.get_json()
+    assert report["inserted"] == 2
+    assert report["error_count"] == 2
+    assert [e["line"] for e in report["errors"]] == [3, 5]
+
+    res = client.get("/api/items/export")
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert [r["title"] for r in rows] == ["One", "Two"]
+
+
+def test_ids_not_reused_after_delete(client):
+    """a deleted item's id is never handed out again"""
+    first = client.post("/api/items", json={"title": "A", "item_type": "book"}).get_json()["id"]
+    second = client.post("/api/items", json={"title": "B", "item_type": "book"}).get_json()["id"]
+    client.delete(f"/api/items/{second}")
+    third = client.post("/api/items", json={"title": "C", "item_type": "book"}).get_json()["id"]
+    assert first < second < third
+
+
+def test_batch_update_and_delete(client):
+    """PATCH /items and POST /items/batch-delete apply whole batches atomically"""
+    ids = [client.post("/api/items", json={"title": f"T{i}", "item_type": "book"}).get_json()["id"]
+           for i in range(4)]
+
+    res = client.patch("/api/items", json=[{"id": i, "is_available": False} for i in ids[:3]]
+                       + [{"id": ids[0], "title": "Renamed"}])
+    assert res.status_code == 200
+    updated = res.get_json()
+    assert [i["id"] for i in updated] == ids[:3] + [ids[0]]
+    assert updated[-1]["title"] == "Renamed" and updated[-1]["is_available"] is False
+    assert [i["is_available"] for i in client.get("/api/items").get_json()] == [False, False, False, True]
+
+    # one unknown id: 404, and none of the batch is applied
+    version = client.get("/api/items/changes").get_json()["version"]
+    res = client.patch("/api/items", json=[{"id": ids[3], "is_available": False}, {"id": 999}])
+    assert res.status_code == 404 and res.get_json()["missing"] == [999]
+    assert client.get(f"/api/items/{ids[3]}").get_json()["is_available"] is True
+    assert client.get("/api/items/changes").get_json()["version"] == version
+
+    res = client.post("/api/items/batch-delete", json={"ids": [ids[1], ids[2], 999]})
+    assert res.status_code == 200
+    assert res.get_json() == {"deleted": [ids[1], ids[2]], "missing": [999]}
+    assert [i["id"] for i in client.get("/api/items").get_json()] == [ids[0], ids[3]]
+
+    assert client.patch("/api/items", json={"id": 1}).status_code == 400
+    assert client.patch("/api/items", json=[{"id": "1"}]).status_code == 400
+    assert client.post("/api/items/batch-delete", json={"ids": [True]}).status_code == 400
+
+
+def test_etags_and_not_modified(client):
+    """list and item responses carry ETags and answer If-None-Match with 304"""
+    a = client.post("/api/items", json={"title": "A", "item_type": "book"}).get_json()
+    b = client.post("/api/items", json={"title": "B", "item_type": "book"}).get_json()
+
+    res = client.get("/api/items")
+    list_etag = res.headers["ETag"]
+    res = client.get("/api/items", headers={"If-None-Match": list_etag})
+    assert res.status_code == 304 and res.data == b""
+    # bad params are a 400 even when the tag still matches
+    for params in ("limit=abc", "cursor=!!", "available=maybe", "fields=nope", "q=a&cursor=x"):
+        assert client.get(f"/api/items?{params}", headers={"If-None-Match": list_etag}).status_code == 400
+
+    res = client.get(f"/api/items/{a['id']}")
+    item_etag = res.headers["ETag"]
+    assert client.get(f"/api/items/{a['id']}", headers={"If-None-Match": item_etag}).status_code == 304
+
+    # changing another item invalidates the list but not item A
+    client.put(f"/api/items/{b['id']}", json={"title": "B2"})
+    res = client.get("/api/items", headers={"If-None-Match": list_etag})
+    assert res.status_code == 200 and res.headers["ETag"] != list_etag
+    assert client.get(f"/api/items/{a['id']}", headers={"If-None-Match": item_etag}).status_code == 304
+
+    # changing item A invalidates its own ETag
+    updated = client.put(f"/api/items/{a['id']}", json={"title": "A2"}).get_json()
+    assert updated["version"] > a["version"]
+    res = client.get(f"/api/items/{a['id']}", headers={"If-None-Match": item_etag})
+    assert res.status_code == 200 and res.get_json()["title"] == "A2"
+
+
+def test_changes_since_version(client):
+    """the changes feed returns a full reset first, then only deltas and tombstones"""
+    a = client.post("/api/items", json={"title": "A", "item_type": "book"}).get_json()
+    b = client.post("/api/items", json={"title": "B", "item_type": "book"}).get_json()
+
+    full = client.get("/api/items/changes").get_json()
+    assert full["reset"] is True
+    assert [i["id"] for i in full["items"]] == [a["id"], b["id"]]
+
+    params = {"since": full["version"], "epoch": full["epoch"]}
+    empty = client.get("/api/items/changes", query_string=params).get_json()
+    assert empty["reset"] is False and empty["items"] == [] and empty["deleted"] == []
+
+    client.put(f"/api/items/{a['id']}", json={"title": "A2"})
+    client.delete(f"/api/items/{b['id']}")
+    c = client.post("/api/items", json={"title": "C", "item_type": "dvd"}).get_json()
+
+    delta = client.get("/api/items/changes", query_string=params).get_json()
+    assert delta["reset"] is False
+    assert [(i["id"], i["title"]) for i in delta["items"]] == [(a["id"], "A2"), (c["id"], "C")]
+    assert delta["deleted"] == [b["id"]]
+    assert delta["version"] > full["version"]
+
+    # a different epoch (e.g. a wiped store) forces a reset
+    other = client.get("/api/items/changes", query_string={"since": 0, "epoch": "other"}).get_json()
+    assert other["reset"] is True and len(other["items"]) == 2
+    assert client.get("/api/items/changes?since=x").status_code == 400
+
+
+def test_event_stream(app, client):
+    """/events pushes committed changes and replays missed ones from Last-Event-ID"""
+    app.config["EVENT_KEEPALIVE"] = 0.05
+    a = client.post("/api/items", json={"title": "A", "item_type": "book"}).get_json()
+
+    res = client.get("/api/events", buffered=False)
+    stream = iter(res.response)
+    assert next(stream).startswith(b"retry:")
+    client.post("/api/items", json={"title": "B", "item_type": "book"})
+    client.delete(f"/api/items/{a['id']}")
+    chunk = next(stream)
+    assert b"event: put\n" in chunk and b'"title":"B"' in chunk
+    assert b'event: delete\ndata: {"id":%d}' % a["id"] in chunk
+    assert next(stream) == b": keepalive\n\n"
+    res.close()
+    assert len(app.extensions["events"]) == 0
+
+    # a reconnecting client gets what changed after its last event id
+    epoch = app.extensions["storage"].epoch
+    res = client.get("/api/events", headers={"Last-Event-ID": f"{epoch}-{a['version']}"}, buffered=False)
+    stream = iter(res.response)
+    next(stream)
+    chunk = next(stream)
+    assert b'"title":"B"' in chunk and b"event: delete" in chunk
+    res.close()
+
+    # an id from another epoch (a restarted memory store, a wiped file) means refetch all
+    for stale in ("deadbeef-3", "garbage"):
+        res = client.get("/api/events", headers={"Last-Event-ID": stale}, buffered=False)
+        stream = iter(res.response)
+        next(stream)
+        chunk = next(stream)
+        assert chunk.startswith(b"id: %s-" % epoch.encode()) and b"event: reset\n" in chunk
+        res.close()
@@ -0,0 +1,97 @@
+# tests/test_compression.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import gzip
+import json
+import zlib
+
+import pytest
+from werkzeug.http import parse_accept_header
+
+from app import compression, create_app, routes
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def client(tmp_path):
+    class Config:
+        TESTING = True
+        STORAGE_BACKEND = "json"
+        STORAGE_FILE = str(tmp_path / "library.json")
+
+    app = create_app(Config)
+    client = app.test_client()
+    client.post("/api/items/bulk", data="\n".join(json.dumps({"title": f"Title {i}", "item_type": "book"})
+                                                 for i in range(50)))
+    yield client
+    app.extensions["storage"].close()
+
+
+def test_large_responses_are_compressed_small_ones_not(client):
+    """gzip when accepted and above COMPRESS_MIN_SIZE; identity otherwise"""
+    res = client.get("/api/items", query_string={"limit": 50}, headers=GZIP)
+    assert res.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in res.headers["Vary"]
+    assert len(json.loads(gzip.decompress(res.data))["items"]) == 50
+
+    small = client.get("/api/items/1", headers=GZIP)
+    assert "Content-Encoding" not in small.headers and small.get_json()["id"] == 1
+
+    plain = client.get("/api/items", query_string={"limit": 50})
+    assert "Content-Encoding" not in plain.headers and len(plain.get_json()["items"]) == 50
+
+
+def test_negotiation_follows_q_values():
+    """the client's preferences win; q=0 and identity-only mean no compression"""
+    def pick(header):
+        return compression.negotiate(parse_accept_header(header))
+
+    assert pick("gzip, deflate") == "gzip"
+    assert pick("gzip;q=0") is None and pick("identity") is None and pick("") is None
+    assert pick("br, gzip;q=0.5") == ("br" if compression.brotli else "gzip")
+    assert pick("*") == next(iter(compression.CODECS))
+
+
+def test_compressed_etag_is_weak_and_revalidates(client):
+    """compressed bodies carry W/ tags, which If-None-Match still matches"""
+    res = client.get("/api/items", query_string={"limit": 50}, headers=GZIP)
+    etag = res.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    again = client.get("/api/items", query_string={"limit": 50}, headers={**GZIP, "If-None-Match": etag})
+    assert again.status_code == 304
+    plain = client.get("/api/items", query_string={"limit": 50}, headers={"If-None-Match": etag.lstrip("W/")})
+    assert plain.status_code == 304
+
+
+def test_full_list_is_streamed_in_chunks(client, monkeypatch):
+    """GET /items without a limit is encoded and compressed chunk by chunk"""
+    monkeypatch.setattr(routes, "STREAM_CHUNK", 20)
+    res = client.get("/api/items", buffered=False)
+    chunks = list(res.response)
+    assert res.is_streamed and len(chunks) == 4        # 20 + 20 + 10 items, then "]"
+    assert [i["id"] for i in json.loads(b"".join(chunks))] == list(range(1, 51))
+
+    res = client.get("/api/items", headers=GZIP, buffered=False)
+    assert res.headers["Content-Encoding"] == "gzip" and "Content-Length" not in res.headers
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = decoder.decompress(next(iter(res.response)))
+    assert first.startswith(b'[{"id":1,')             # decodable before the rest arrives
+    res.close()
+
+    empty = client.get("/api/items", query_string={"type": "film"})
+    assert empty.get_json() == []
+
+
+def test_streamed_list_has_weak_etag(client):
+    """the streamed list may include writes made while it is sent: weak tag, still revalidates"""
+    res = client.get("/api/items")
+    assert "Content-Encoding" not in res.headers and res.headers["ETag"].startswith('W/"')
+    assert client.get("/api/items", headers={"If-None-Match": res.headers["ETag"]}).status_code == 304
+
+    page = client.get("/api/items", query_string={"limit": 5})
+    assert page.headers["ETag"].startswith('"')
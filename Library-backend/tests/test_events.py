@@ -0,0 +1,39 @@
+# tests/test_events.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import threading
+
+from app.events import EventHub
+
+
+def test_slow_subscriber_is_dropped():
+    """an overflowing queue drops only that subscriber; publishing never blocks"""
+    hub = EventHub(queue_size=3)
+    slow, fast = hub.subscribe(), hub.subscribe()
+    for n in range(2):
+        hub.publish([{"op": "del", "id": n, "version": n}])
+        assert len(fast.get(0)) == 1
+    hub.publish([{"op": "del", "id": 2, "version": 2}, {"op": "del", "id": 3, "version": 3}])
+
+    assert slow.dropped and slow.get(0) == []
+    assert not fast.dropped and len(fast.get(0)) == 2
+    assert len(hub) == 1
+
+
+def test_subscriber_wakes_on_publish():
+    hub = EventHub()
+    subscription = hub.subscribe()
+    threading.Timer(0.05, hub.publish, args=([{"op": "del", "id": 1, "version": 1}],)).start()
+    assert subscription.get(5) == [{"op": "del", "id": 1, "version": 1}]
+
+
+def test_subscriber_limit():
+    hub = EventHub(max_subscribers=1)
+    first = hub.subscribe()
+    assert hub.subscribe() is None
+    first.close()
+    assert hub.subscribe() is not None
@@ -0,0 +1,125 @@
+# tests/test_metrics.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import cProfile
+import re
+
+from app import create_app, metrics
+from app.metrics import Histogram
+
+
+def _app(tmp_path, **settings):
+    class Config:
+        TESTING = True
+        STORAGE_BACKEND = "json"
+        STORAGE_FILE = str(tmp_path / "library.json")
+
+    for key, value in settings.items():
+        setattr(Config, key, value)
+    return create_app(Config)
+
+
+def _sample(text, name, **labels):
+    """The value of one sample line in Prometheus text output."""
+    selector = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(selector)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_text_format():
+    """buckets are cumulative and inclusive, with _sum and _count per series"""
+    h = Histogram("x_seconds", "Example.", ("op",), (0.1, 1.0))
+    for value in (0.1, 0.5, 3.0):
+        h.observe(("get",), value)
+    assert h.render().splitlines() == [
+        "# HELP x_seconds Example.",
+        "# TYPE x_seconds histogram",
+        'x_seconds_bucket{op="get",le="0.1"} 1',
+        'x_seconds_bucket{op="get",le="1.0"} 2',
+        'x_seconds_bucket{op="get",le="+Inf"} 3',
+        'x_seconds_sum{op="get"} 3.6',
+        'x_seconds_count{op="get"} 3',
+    ]
+
+
+def test_metrics_endpoint_reports_routes_storage_and_json(tmp_path):
+    """/metrics has latency and size per route plus storage and encoding timings"""
+    app = _app(tmp_path)
+    client = app.test_client()
+    client.post("/api/items", json={"title": "A", "item_type": "book"})
+    client.get("/api/items")
+    client.get("/api/items/1")
+    client.get("/api/items/2")
+    app.extensions["storage"].compact()
+
+    res = client.get("/metrics")
+    assert res.status_code == 200 and res.mimetype == "text/plain"
+    text = res.get_data(as_text=True)
+    duration = "library_http_request_duration_seconds_count"
+    assert _sample(text, duration, route="/api/items", method="GET", status="200") == 1
+    assert _sample(text, duration, route="/api/items/<int:item_id>", method="GET", status="404") == 1
+    assert _sample(text, "library_http_response_size_bytes_count", route="/api/items", method="POST") == 1
+    for operation in ("open", "get_page", "add_item", "get_item", "save_to_disk"):
+        assert _sample(text, "library_storage_operation_duration_seconds_count", operation=operation) >= 1
+    # startup is counted once, as "open"; a background full load is "load"
+    assert _sample(text, "library_storage_operation_duration_seconds_count", operation="open") == 1
+    assert re.search(r"^library_json_encode_duration_seconds_count [1-9]", text, re.M)
+    app.extensions["storage"].close()
+
+
+def test_lazy_startup_load_is_timed(tmp_path):
+    """a lazily opened store's background load is counted as the "load" operation"""
+    first = _app(tmp_path)
+    first.test_client().post("/api/items", json={"title": "A", "item_type": "book"})
+    first.extensions["storage"].compact()
+    first.extensions["storage"].close()
+
+    app = _app(tmp_path, STORAGE_LAZY_LOAD=True)
+    app.extensions["storage"].flush()                 # waits for the lazy load
+    text = app.test_client().get("/metrics").get_data(as_text=True)
+    assert _sample(text, "library_storage_operation_duration_seconds_count", operation="open") == 1
+    assert _sample(text, "library_storage_operation_duration_seconds_count", operation="load") == 1
+    app.extensions["storage"].close()
+
+
+def test_sampled_requests_are_profiled(tmp_path):
+    """with PROFILE_SAMPLE_RATE=1 every request is profiled, aggregated per route"""
+    app = _app(tmp_path, PROFILE_SAMPLE_RATE=1.0)
+    client = app.test_client()
+    client.get("/api/items")
+    client.get("/api/items")
+
+    report = client.get("/metrics/profile", query_string={"route": "/api/items"}).get_data(as_text=True)
+    assert report.startswith("==== /api/items\n")
+    assert "get_items" in report
+    app.extensions["storage"].close()
+
+
+def test_profiling_is_skipped_when_a_profiler_is_active(tmp_path, monkeypatch):
+    """a sampled request is served unprofiled while another is profiled, or if enable() fails"""
+    app = _app(tmp_path, PROFILE_SAMPLE_RATE=1.0)
+    client = app.test_client()
+    with metrics._profiling:                          # another request is being profiled
+        assert client.get("/api/items").status_code == 200
+
+    class ActiveElsewhere(cProfile.Profile):
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(metrics.cProfile, "Profile", ActiveElsewhere)
+    assert client.get("/api/items").status_code == 200
+    assert client.get("/metrics/profile").get_data(as_text=True) == ""
+    assert not metrics._profiling.locked()
+    app.extensions["storage"].close()
+
+
+def test_metrics_can_be_disabled(tmp_path):
+    """METRICS_ENABLED=False registers no hooks and no endpoint"""
+    app = _app(tmp_path, METRICS_ENABLED=False, COMPRESSION_ENABLED=False)
+    assert not app.before_request_funcs and not app.after_request_funcs
+    assert app.test_client().get("/metrics").status_code == 404
+    app.extensions["storage"].close()
@@ -0,0 +1,76 @@
+# tests/test_search.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import random
+
+from app.search import AUTHOR_WEIGHT, PREFIX_FACTOR, TITLE_WEIGHT, SearchIndex, tokenize
+from app.storage import IdList
+
+
+def _ranked(docs, query, limit, allowed=None):
+    """Every document scored the slow way, for comparison."""
+    terms = set(tokenize(query))
+    scored = []
+    for item_id, (title, author) in docs.items():
+        if allowed is not None and item_id not in allowed:
+            continue
+        weights = dict.fromkeys(tokenize(title), TITLE_WEIGHT)
+        for token in set(tokenize(author)):
+            weights[token] = weights.get(token, 0.0) + AUTHOR_WEIGHT
+        score = 0.0
+        for term in terms:
+            best = max((w * (1.0 if t == term else PREFIX_FACTOR) for t, w in weights.items()
+                        if t.startswith(term)), default=0.0)
+            if not best:
+                break
+            score += best
+        else:
+            if terms:
+                scored.append((-score, item_id))
+    return [item_id for _, item_id in sorted(scored)[:limit]]
+
+
+def test_search_matches_exhaustive_ranking():
+    """the early-stopping walk returns exactly the top hits of scoring every item"""
+    rng = random.Random(7)
+    words = ["ka", "kalo", "kalomi", "lomi", "mira", "mirador", "ra", "rates", "sol", "solaris", "tes", "vel"]
+    index, docs = SearchIndex(), {}
+
+    def put(item_id):
+        doc = (" ".join(rng.choices(words, k=rng.randint(1, 4))), " ".join(rng.choices(words, k=2)))
+        index.remove(item_id)
+        index.add(item_id, *doc)
+        docs[item_id] = doc
+
+    for item_id in range(1, 601):
+        put(item_id)
+    for _ in range(200):                        # updates re-insert ids mid-list, deletes drop them
+        item_id = rng.randint(1, 600)
+        if rng.random() < 0.3:
+            index.remove(item_id)
+            docs.pop(item_id, None)
+        else:
+            put(item_id)
+
+    for _ in range(300):
+        query = " ".join(rng.choice(words)[:rng.randint(1, 7)] for _ in range(rng.randint(1, 3)))
+        limit = rng.choice([1, 5, 50])
+        allowed = rng.choice([None, IdList(range(1, 601, 3)), IdList([5, 17, 40])])
+        assert index.search(query, limit=limit, allowed=allowed) == _ranked(docs, query, limit, allowed), query
+
+
+def test_posting_lists_stay_sorted_and_shrink():
+    """postings are ascending id lists per weight; emptied tokens leave the vocabulary"""
+    index = SearchIndex()
+    index.add(3, "Dune", "Herbert")
+    index.add(1, "Dune Messiah", "Frank Herbert")
+    assert index._postings["dune"] == {TITLE_WEIGHT: [1, 3]}
+    assert index._postings["herbert"] == {AUTHOR_WEIGHT: [1, 3]}
+
+    index.remove(1)
+    index.remove(3)
+    assert index._postings == {} and index._vocab == [] and len(index) == 0
@@ -0,0 +1,39 @@
+# tests/test_sqlite_storage.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import sqlite3
+
+from app.backends import create_backend
+from app.sqlite_storage import SqliteStorage
+
+
+def test_existing_library_db_is_migrated(tmp_path):
+    """a library.db with the old library_items table gains key columns and indexes"""
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE library_items (id INTEGER NOT NULL, title VARCHAR(255) NOT NULL,"
+        " item_type VARCHAR(50) NOT NULL, author_or_director VARCHAR(255),"
+        " is_available BOOLEAN NOT NULL, expected_available_date DATE, PRIMARY KEY (id))"
+    )
+    conn.execute("INSERT INTO library_items VALUES (7, 'Solaris', 'Film', 'Tarkovsky', 1, NULL)")
+    conn.commit()
+    conn.close()
+
+    store = SqliteStorage(path)
+    assert [i["id"] for i in store.get_items(name="solaris", item_type="film")] == [7]
+    assert [i["id"] for i in store.search("tark")] == [7]
+    assert store.add_item({"title": "Stalker", "item_type": "film"})["id"] == 8
+
+
+def test_sqlite_backend_defaults_to_library_db(tmp_path, monkeypatch):
+    """STORAGE_BACKEND=sqlite without a database URI opens ./library.db"""
+    monkeypatch.chdir(tmp_path)
+    store = create_backend({"STORAGE_BACKEND": "sqlite"})
+    store.add_item({"title": "Solaris", "item_type": "film"})
+    store.close()
+    assert (tmp_path / "library.db").exists()
@@ -0,0 +1,490 @@
+# tests/test_storage.py
+import sys, os
+# ensure backend folder on sys.path
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.insert(0, backend_root)
+
+import json
+import threading
+import pytest
+
+from app.storage import JsonStorage
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A JSON store on an empty temporary snapshot + journal."""
+    store = JsonStorage(str(tmp_path / "library.json"))
+    yield store
+    store.close()
+
+
+def test_mutations_go_to_journal_not_snapshot(store):
+    """add/update/delete append to the journal and leave the snapshot alone"""
+    a = store.add_item({"title": "A", "item_type": "book"})
+    b = store.add_item({"title": "B", "item_type": "film"})
+    store.update_item(a["id"], {"title": "A2"})
+    store.delete_item(b["id"])
+
+    assert not os.path.exists(store.path)
+    with open(store._journal.path) as f:
+        ops = [json.loads(line)["op"] for line in f]
+    assert ops == ["put", "put", "put", "del"]
+
+
+def test_reload_replays_snapshot_and_journal(store):
+    """a restart sees the snapshot plus every journaled mutation"""
+    a = store.add_item({"title": "A", "item_type": "book"})
+    store.compact()
+    b = store.add_item({"title": "B", "item_type": "film"})
+    store.update_item(a["id"], {"is_available": False})
+    store.close()
+
+    store.load()
+    assert store.get_item(a["id"])["is_available"] is False
+    assert store.get_item(b["id"])["title"] == "B"
+    assert store.add_item({"title": "C"})["id"] == b["id"] + 1
+
+
+def test_compaction_threshold_folds_journal(store):
+    """crossing the compaction threshold writes a snapshot and empties the journal"""
+    store.compact_threshold = 3
+    for i in range(3):
+        store.add_item({"title": f"T{i}", "item_type": "book"})
+    store.flush()   # compaction runs on a background thread
+
+    assert os.path.getsize(store._journal.path) == 0
+    with open(store.path) as f:
+        assert len(json.load(f)["data"]) == 3
+
+
+def test_torn_journal_tail_is_ignored(store):
+    """a half-written last record (crash mid-append) does not break loading"""
+    store.add_item({"title": "Kept", "item_type": "book"})
+    store.close()
+    with open(store._journal.path, "a") as f:
+        f.write('{"op":"put","item":{"id":2,')
+
+    store.load()
+    assert [i["title"] for i in store.get_items()] == ["Kept"]
+
+
+def test_corrupt_snapshot_refuses_to_load(store):
+    """an unreadable snapshot is an error, not a silently empty library"""
+    store.add_item({"title": "A", "item_type": "book"})
+    store.compact()
+    store.close()
+    with open(store.path, "wb") as f:
+        f.write(b'{"data":{"1":')
+
+    with pytest.raises(RuntimeError, match="Cannot load snapshot"):
+        store.load()
+
+
+def test_failed_snapshot_write_keeps_old_snapshot(store, monkeypatch):
+    """snapshots go to a temp file first: a failed write leaves the old one intact"""
+    from app import persistence
+    store.add_item({"title": "Old", "item_type": "book"})
+    store.compact()
+    store.update_item(1, {"title": "New"})
+
+    def fail(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(persistence.os, "fsync", fail)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+
+    assert sorted(os.listdir(os.path.dirname(store.path))) == ["library.json", "library.json.idx",
+                                                               "library.json.lock", "library.json.log"]
+    with open(store.path) as f:
+        assert json.load(f)["data"]["1"]["title"] == "Old"
+    store.close()
+    store.load()
+    assert store.get_item(1)["title"] == "New"
+
+
+def _count_fsyncs(monkeypatch, module):
+    threads = []
+    fsync = module.os.fsync
+
+    def counting(fd):
+        threads.append(threading.current_thread().name)
+        fsync(fd)
+    monkeypatch.setattr(module.os, "fsync", counting)
+    return threads
+
+
+def test_async_durability_syncs_off_the_request_thread(store, monkeypatch):
+    """by default mutations return before any fsync; the writer thread does them"""
+    from app import journal
+    fsyncs = _count_fsyncs(monkeypatch, journal)
+    for i in range(20):
+        store.add_item({"title": f"T{i}", "item_type": "book"})
+    store.flush()
+
+    assert fsyncs and set(fsyncs) == {"storage-writer"}
+    assert len(fsyncs) < 20
+
+
+def test_sync_durability_syncs_every_commit(tmp_path, monkeypatch):
+    """"sync" fsyncs the journal before each mutation returns"""
+    from app import journal
+    store = JsonStorage(str(tmp_path / "library.json"), durability="sync")
+    fsyncs = _count_fsyncs(monkeypatch, journal)
+    for i in range(5):
+        store.add_item({"title": f"T{i}", "item_type": "book"})
+        assert len(fsyncs) == i + 1
+    store.close()
+    assert "storage-writer" not in fsyncs
+
+
+def test_group_commit_shares_fsyncs(tmp_path, monkeypatch):
+    """concurrent "group" writers each wait for an fsync, but share them"""
+    from app import journal
+    store = JsonStorage(str(tmp_path / "library.json"), durability="group")
+    fsyncs = _count_fsyncs(monkeypatch, journal)
+    store.add_item({"title": "first", "item_type": "book"})
+    assert fsyncs == ["storage-writer"] and not store._journal._dirty
+    n_threads, per_thread = 8, 25
+
+    def writer(slot):
+        for i in range(per_thread):
+            store.add_item({"title": f"{slot}-{i}", "item_type": "book"})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(fsyncs) == {"storage-writer"}
+    assert len(fsyncs) < 1 + n_threads * per_thread
+    store.close()
+    store.load()
+    assert len(store.get_items()) == 1 + n_threads * per_thread
+    store.close()
+
+
+def test_snapshot_only_mode_coalesces_rewrites(tmp_path, monkeypatch):
+    """without a journal, a burst of mutations becomes one or two snapshot rewrites"""
+    from app import storage as storage_module
+    store = JsonStorage(str(tmp_path / "library.json"), journal=False, shared=False)
+    installs = []
+    install = storage_module.install
+    monkeypatch.setattr(storage_module, "install", lambda tmp, path: (installs.append(path), install(tmp, path)))
+    for i in range(20):
+        store.add_item({"title": f"T{i}", "item_type": "book"})
+    store.flush()
+
+    assert 1 <= len(installs) < 5
+    with open(store.path) as f:
+        assert len(json.load(f)["data"]) == 20
+    store.close()
+
+
+def _held_lazy_store(path, monkeypatch):
+    """A lazily loading store whose background load waits for the returned event."""
+    release = threading.Event()
+    load = JsonStorage.load
+
+    def held_load(self):
+        release.wait(10)
+        load(self)
+    monkeypatch.setattr(JsonStorage, "load", held_load)
+    store = JsonStorage(path, lazy=True)
+    monkeypatch.setattr(JsonStorage, "load", load)
+    return store, release
+
+
+def test_lazy_load_serves_from_snapshot_index(store, monkeypatch):
+    """while loading, by-id reads and pages come from the mapped snapshot plus the journal"""
+    store.add_items([{"title": f"T{i}", "item_type": "book"} for i in range(10)])
+    store.compact()
+    store.update_item(2, {"title": "changed"})
+    store.delete_item(3)
+    store.add_item({"title": "new", "item_type": "film"})
+    expected_page, expected_version = store.get_page(5, after=1), store.version()
+    store.close()
+
+    lazy, release = _held_lazy_store(store.path, monkeypatch)
+    assert not lazy.is_ready()
+    assert lazy.version() == expected_version and lazy.epoch == store.epoch
+    assert lazy.get_item(2)["title"] == "changed" and lazy.get_item(3) is None
+    assert lazy.get_page(5, after=1) == expected_page
+    assert [i["id"] for i in lazy.get_page(5, after=8)[0]] == [9, 10, 11]
+
+    release.set()
+    assert len(lazy.get_items()) == 10      # waits for the full load
+    assert lazy.is_ready() and lazy.get_page(5, after=1) == expected_page
+    lazy.close()
+
+
+def test_snapshot_index_must_match_snapshot(store):
+    """an index left over from another snapshot is ignored, and a fresh one written"""
+    from app.snapshot import INDEX_SUFFIX, SnapshotReader
+    store.add_item({"title": "A", "item_type": "book"})
+    store.compact()
+    with open(store.path + INDEX_SUFFIX, "rb") as f:
+        old_index = f.read()
+    assert len(SnapshotReader.open(store.path)) == 1
+
+    store.add_item({"title": "B", "item_type": "book"})
+    store.compact()
+    with open(store.path + INDEX_SUFFIX, "wb") as f:
+        f.write(old_index)
+    assert SnapshotReader.open(store.path) is None
+    store.close()
+
+    lazy = JsonStorage(store.path, lazy=True)
+    assert [i["title"] for i in lazy.get_items()] == ["A", "B"]
+    lazy.flush()
+    reader = SnapshotReader.open(store.path)
+    assert reader is not None and reader.get(2)["title"] == "B"
+    lazy.close()
+
+
+def test_indexes_follow_mutations(store):
+    """title/type lookups are case-insensitive and track update and delete"""
+    a = store.add_item({"title": "Dune", "item_type": "Book"})
+    b = store.add_item({"title": "dune", "item_type": "film"})
+
+    assert [i["id"] for i in store.get_items(name="DUNE")] == [a["id"], b["id"]]
+    assert [i["id"] for i in store.get_items(name="dune", item_type="book")] == [a["id"]]
+
+    store.update_item(a["id"], {"title": "Emma"})
+    assert [i["id"] for i in store.get_items(name="dune")] == [b["id"]]
+    assert [i["id"] for i in store.get_items(name="emma")] == [a["id"]]
+
+    store.delete_item(b["id"])
+    assert store.get_items(item_type="film") == []
+    assert "film" not in store._type_index
+
+
+def test_items_held_as_compact_records(store):
+    """items are stored as slotted records with interned types; callers get their own dicts"""
+    from app.storage import ItemRecord
+    store.add_item({"title": "A", "item_type": "".join(["bo", "ok"])})
+    store.compact()
+    store.load()
+    store.add_item({"title": "B", "item_type": "".join(["bo", "ok"])})
+
+    records = list(store._data.values())
+    assert all(type(r) is ItemRecord and not hasattr(r, "__dict__") for r in records)
+    assert records[0].item_type is records[1].item_type
+
+    item = store.get_item(1)
+    item["title"] = "changed"
+    assert store.get_item(1)["title"] == "A"
+
+
+def test_indexes_rebuilt_on_load(store):
+    """indexes are rebuilt from snapshot + journal on startup"""
+    store.add_item({"title": "Solaris", "item_type": "film"})
+    store.close()
+    store.load()
+    assert [i["title"] for i in store.get_items(name="solaris", item_type="FILM")] == ["Solaris"]
+
+
+def test_due_index_rebuilt_on_load(store):
+    """the due-date index is rebuilt in bulk on load and follows journal replay"""
+    from datetime import date
+    for day in (5, 3, 9, 1):
+        store.add_item({"title": f"D{day}", "item_type": "book", "is_available": False,
+                        "expected_available_date": f"2030-01-0{day}"})
+    store.compact()
+    store.update_item(1, {"is_available": True})
+    store.close()
+    store.load()
+
+    assert [i["title"] for i in store.get_unavailable()] == ["D1", "D3", "D9"]
+    assert [i["title"] for i in store.get_unavailable(date(2030, 1, 9))] == ["D1", "D3"]
+    assert len(store._due_index) == 3
+
+
+def test_get_page_after_delete(store):
+    """get_page resumes after the cursor id even if that item was deleted"""
+    ids = [store.add_item({"title": f"T{i}", "item_type": "book"})["id"] for i in range(5)]
+    page, after = store.get_page(2)
+    assert [i["id"] for i in page] == ids[:2] and after == ids[1]
+
+    store.delete_item(ids[1])
+    page, after = store.get_page(2, after=after)
+    assert [i["id"] for i in page] == ids[2:4]
+
+    page, after = store.get_page(2, after=after)
+    assert [i["id"] for i in page] == ids[4:] and after is None
+
+
+def test_filtered_pages_follow_type_changes(store):
+    """type pages come from the id-ordered index entry, kept in order across updates"""
+    ids = [store.add_item({"title": f"T{i}", "item_type": "book" if i % 2 else "film"})["id"]
+           for i in range(10)]
+    store.update_item(ids[2], {"item_type": "Book"})       # joins in the middle of the list
+    store.update_item(ids[9], {"item_type": "film"})
+    assert store._type_index["book"] == sorted(store._type_index["book"])
+
+    seen, after = [], None
+    while True:
+        page, after = store.get_page(2, after=after, item_type="BOOK")
+        seen += [i["id"] for i in page]
+        if after is None:
+            break
+    assert seen == [ids[i] for i in (1, 2, 3, 5, 7)]
+    assert [i["id"] for i in store.get_page(10, name="t2", item_type="book")[0]] == [ids[2]]
+    assert store.get_page(10, name="t2", item_type="film") == ([], None)
+
+
+def test_add_items_persists_once_per_batch(store, monkeypatch):
+    """add_items journals the whole batch with a single write"""
+    writes = []
+    monkeypatch.setattr(store._journal, "append_many", lambda records: writes.append(list(records)))
+    items = store.add_items([{"title": f"T{i}", "item_type": "book"} for i in range(10)])
+
+    assert [i["id"] for i in items] == list(range(1, 11))
+    assert len(writes) == 1 and len(writes[0]) == 10
+
+
+def test_batch_update_and_delete_persist_once(store, monkeypatch):
+    """update_items / delete_items journal each batch with a single write"""
+    ids = [i["id"] for i in store.add_items([{"title": f"T{i}", "item_type": "book"} for i in range(5)])]
+    writes = []
+    monkeypatch.setattr(store._journal, "append_many", lambda records: writes.append(list(records)))
+
+    store.update_items([{"id": i, "is_available": False} for i in ids])
+    assert store.delete_items(ids[:3] + [99]) == ids[:3]
+    assert [len(w) for w in writes] == [5, 3]
+    before = store.get_item(ids[3])
+    assert store.update_items([{"id": ids[3], "title": "X"}, {"id": ids[0]}]) is None
+    assert len(writes) == 2 and store.get_item(ids[3]) == before
+
+
+def test_concurrent_writers_no_lost_updates(store):
+    """parallel add/update from many threads: unique ids, no lost writes"""
+    import threading
+
+    n_threads, per_thread = 8, 50
+    created = [[] for _ in range(n_threads)]
+
+    def writer(slot):
+        for i in range(per_thread):
+            created[slot].append(store.add_item({"title": f"{slot}-{i}", "item_type": "book"})["id"])
+        for item_id in created[slot]:
+            store.update_item(item_id, {"is_available": False})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ids = [i for chunk in created for i in chunk]
+    assert len(set(ids)) == n_threads * per_thread
+    items = store.get_items()
+    assert len(items) == n_threads * per_thread
+    assert not any(item["is_available"] for item in items)
+
+    store.close()
+    store.load()
+    assert sorted(i["id"] for i in store.get_items()) == sorted(ids)
+
+
+def _run_worker(code, storage_file):
+    """Start a separate Python process that uses app.storage on the same files."""
+    import subprocess
+    script = (
+        "from app.storage import JsonStorage\n"
+        f"storage = JsonStorage({storage_file!r})\n" + code
+    )
+    return subprocess.Popen([sys.executable, "-c", script], cwd=backend_root)
+
+
+def test_worker_processes_share_one_catalog(store):
+    """writes from other processes are seen here, ids stay unique across workers"""
+    store.add_item({"title": "Local", "item_type": "book"})
+    assert len(store.get_items()) == 1
+
+    # a low threshold makes workers compact (rewrite the snapshot) mid-run
+    code = (
+        "storage.compact_threshold = 25\n"
+        "for i in range(40):\n"
+        "    storage.add_item({'title': f'remote {i}', 'item_type': 'film'})\n"
+        "storage.close()\n"
+    )
+    workers = [_run_worker(code, store.path) for _ in range(4)]
+    assert all(w.wait(timeout=60) == 0 for w in workers)
+
+    items = store.get_items()
+    assert len(items) == 1 + 4 * 40
+    assert len({i["id"] for i in items}) == len(items)
+    assert len(store.get_items(item_type="film")) == 160
+
+    # and our own writes keep allocating fresh ids after catching up
+    assert store.add_item({"title": "After", "item_type": "book"})["id"] == 162
+
+
+def test_snapshot_is_compact_json(store):
+    """snapshots are written without indentation and load back with int ids"""
+    store.add_item({"title": "Compact", "item_type": "book"})
+    store.compact()
+    with open(store.path, "rb") as f:
+        raw = f.read()
+    assert b"\n" not in raw and b": " not in raw
+    assert json.loads(raw)["data"]["1"]["title"] == "Compact"
+
+    store.load()
+    assert store.get_item(1)["title"] == "Compact"
+
+
+def test_fastjson_stdlib_fallback(monkeypatch):
+    """without orjson the encoder still handles int keys and stays compact"""
+    from app import fastjson
+    monkeypatch.setattr(fastjson, "orjson", None)
+    assert fastjson.dumps_bytes({"data": {1: {"a": None}}}) == b'{"data":{"1":{"a":null}}}'
+    assert fastjson.loads(b'{"x":[1,2]}') == {"x": [1, 2]}
+
+
+def test_versions_survive_reload(store):
+    """catalog version and epoch are restored from snapshot + journal"""
+    a = store.add_item({"title": "A", "item_type": "book"})
+    store.compact()
+    store.update_item(a["id"], {"title": "A2"})
+    b = store.add_item({"title": "B", "item_type": "book"})
+    store.delete_item(b["id"])
+    version, epoch = store.version(), store.epoch
+    assert version == 4
+
+    store.close()
+    store.load()
+    assert store.version() == version and store.epoch == epoch
+    assert store.get_item(a["id"])["version"] == 2
+
+
+def test_change_log_is_bounded():
+    """deltas come from a bounded log; callers further behind get None"""
+    from app.storage import MemoryStorage
+    store = MemoryStorage(change_log_size=3)
+    a = store.add_item({"title": "A", "item_type": "book"})
+    b = store.add_item({"title": "B", "item_type": "book"})
+    store.update_item(a["id"], {"title": "A2"})
+    store.delete_item(b["id"])
+
+    items, deleted, version = store.get_changes(2)
+    assert [i["title"] for i in items] == ["A2"] and deleted == [b["id"]] and version == 4
+    assert store.get_changes(0) is None
+    assert store.get_changes(5) is None
+
+
+def test_changes_replayed_from_journal(store):
+    """after a reload the journal tail is still available as deltas"""
+    a = store.add_item({"title": "A", "item_type": "book"})
+    store.compact()
+    b = store.add_item({"title": "B", "item_type": "book"})
+    store.delete_item(a["id"])
+
+    store.close()
+    store.load()
+    assert store.get_changes(0) is None
+    items, deleted, version = store.get_changes(1)
+    assert [i["id"] for i in items] == [b["id"]] and deleted == [a["id"]] and version == 3
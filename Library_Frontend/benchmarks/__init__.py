@@ -0,0 +1,2 @@
+# Standalone performance scripts for the desktop client.
+# Run from the Library_Frontend folder, e.g. `python -m benchmarks.bench_filter`.
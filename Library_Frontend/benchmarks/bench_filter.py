@@ -0,0 +1,51 @@
+# benchmarks/bench_filter.py
+"""
+Local filter latency: ItemTableModel.set_filter() over a loaded table, one
+call per keystroke as a user types a search, extends it with a second
+word, and then starts over with another (which rescans every row).
+
+Reports each step in milliseconds and flags those over `--target-ms`
+(a frame or two); the exit status is 1 if any is.
+
+    python -m benchmarks.bench_filter --rows 100000 1000000
+"""
+import argparse
+import sys
+import time
+
+import main as client
+
+TARGET_MS = 100.0
+KEYSTROKES = (["a"], ["au"], ["author"], ["author", "9"], ["author", "97"], ["t"])
+
+
+def bench(rows):
+    model = client.ItemTableModel()
+    model.reset({"id": i, "title": f"Title {i}", "author_or_director": f"Author {i % 977}"}
+                for i in range(rows))
+    results = []
+    for terms in KEYSTROKES:
+        started = time.perf_counter()
+        model.set_filter(terms)
+        results.append((" ".join(terms), (time.perf_counter() - started) * 1e3, model.rowCount()))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the client's local table filter")
+    parser.add_argument("--rows", nargs="+", type=int, default=[100000])
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS, help="per-keystroke target")
+    args = parser.parse_args(argv)
+
+    missed = False
+    print(f"{'rows':>8} {'filter':<10} {'ms':>8} {'shown':>8}")
+    for rows in args.rows:
+        for terms, ms, shown in bench(rows):
+            miss = ms > args.target_ms
+            missed |= miss
+            print(f"{rows:>8} {terms:<10} {ms:>8.1f} {shown:>8}{'  MISSES TARGET' if miss else ''}")
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
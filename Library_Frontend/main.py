@@ -1,25 +1,58 @@
 """
 Library Manager Frontend (PyQt)
 Features:
-- List items from /api/items
+- List items in a model/view table that loads pages as you scroll
+  (GET /api/items?limit=&cursor=) and refreshes incrementally via
+  /api/items/changes
+- Live row updates pushed by the server (/api/events, Server-Sent Events)
+- All HTTP calls run on a worker pool over one keep-alive session, so the
+  window never blocks on the network; responses come compressed (gzip, or
+  brotli / zstd when those packages are installed)
+- Items are cached on disk: startup paints from the cache while it
+  revalidates, and the catalog stays browsable while the server is down
+- Search titles and authors (GET /api/items?q=...)
 - Add new item (POST /api/items)
 - Edit item (PUT /api/items/<id>)
 - Delete item (DELETE /api/items/<id>)
 - Toggle availability and set expected_available_date
 """
+from bisect import bisect_left
 from typing import Optional
+import json
+import os
+import re
+import sqlite3
 import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QLabel,
+    QTableView, QHeaderView, QMessageBox, QDialog, QLabel,
     QLineEdit, QTextEdit, QComboBox, QDateEdit, QCheckBox, QFormLayout,
     QInputDialog
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import (
+    Qt, QDate, QObject, QRunnable, QTimer, QThreadPool, QAbstractTableModel, QModelIndex, pyqtSignal
+)
 from dateutil import parser as dateparser
 
 API_BASE = "http://127.0.0.1:5000/api"
+ETAG_CACHE_SIZE = 64   # GET responses kept for If-None-Match revalidation
+EVENTS_MAX_BACKOFF = 30   # seconds between reconnect attempts to /events, at most
+NETWORK_THREADS = 4       # worker threads (and pooled connections) for API calls
+REQUEST_TIMEOUT = 6
+PAGE_SIZE = 500           # rows per /items page fetched as the table scrolls
+COLUMN_SAMPLE_ROWS = 200  # rows measured when sizing columns
+MAX_COLUMN_WIDTH = 400
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "library-manager", "items.db")
+CACHE_SIZE = 50000        # items kept in the on-disk cache (least recently used go first)
+SEARCH_DELAY_MS = 250     # typing pause before the search box is applied
+
+_ITEM_PATH = re.compile(r"^/items/(\d+)$")
+_WORD = re.compile(r"\w+")      # words as the server's search tokenizes them
+_NON_WORD = re.compile(r"\W+")
 
 
 def iso_date_or_none(qdate: QDate):
@@ -38,6 +71,489 @@ def parse_iso_date(s):
         return None
 
 
+class ItemCache:
+    """
+    On-disk (SQLite) cache of items, each with the ETag it was served
+    with, plus the first page last shown in each view so the next start
+    can paint at once. Holds at most `capacity` items, evicting the least
+    recently used. Safe to call from worker threads.
+
+    Reads note their time in memory; it reaches the database with the next
+    write. put_later()/remove_later() return at once and leave the write to
+    a background thread, which coalesces whatever queued up meanwhile into
+    one transaction.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY,
+        version INTEGER,
+        etag TEXT,
+        type_key TEXT,
+        used INTEGER NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_items_used ON items (used);
+    CREATE TABLE IF NOT EXISTS views (
+        key TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL commits append to the log instead of rewriting pages, and with
+        # NORMAL they are fsynced at checkpoints rather than on every commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        self._clock = self._db.execute("SELECT COALESCE(MAX(used), 0) FROM items").fetchone()[0]
+        self._used = {}                # item id -> clock of reads not yet written back
+        self._queued = {}              # item id -> item, or None to remove: writes not yet applied
+        self._queued_cond = threading.Condition()
+        self._writer = None
+        self._closed = False
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, item_id):
+        """(etag, item) for a cached item, or None."""
+        with self._queued_cond:
+            if item_id in self._queued:
+                item = self._queued[item_id]
+                return None if item is None else (None, item)
+        with self._lock:
+            row = self._db.execute("SELECT etag, data FROM items WHERE id = ?", (item_id,)).fetchone()
+            if row is None:
+                return None
+            self._used[item_id] = self._tick()
+        return row[0], json.loads(row[1])
+
+    def put(self, item, etag=None):
+        self.put_many([item], etag)
+
+    def put_many(self, items, etag=None):
+        """
+        Store items; an item whose version did not change keeps the ETag
+        it was cached with.
+        """
+        self._write(items, etag)
+
+    def remove(self, item_ids):
+        self._write(removed=item_ids)
+
+    def put_later(self, item):
+        """put() on the writer thread; returns at once."""
+        self._enqueue({item["id"]: item})
+
+    def remove_later(self, item_ids):
+        """remove() on the writer thread; returns at once."""
+        self._enqueue(dict.fromkeys(item_ids))
+
+    def flush(self):
+        """Wait until everything queued by put_later()/remove_later() is written."""
+        with self._queued_cond:
+            self._queued_cond.wait_for(lambda: not self._queued)
+
+    def close(self):
+        """Finish queued writes, write back read times and close the database."""
+        with self._queued_cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._queued_cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        self._write()
+        self._db.close()
+
+    def _write(self, items=(), etag=None, removed=()):
+        """One transaction: pending read times, then `items`, then `removed`, then eviction."""
+        with self._lock:
+            if not (items or removed or self._used):
+                return
+            self._db.execute("BEGIN")
+            if self._used:
+                self._db.executemany("UPDATE items SET used = ? WHERE id = ?",
+                                     [(used, i) for i, used in self._used.items()])
+                self._used.clear()
+            if items:
+                self._db.executemany(
+                    "INSERT INTO items (id, version, etag, type_key, used, data) VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (id) DO UPDATE SET"
+                    " etag = CASE WHEN excluded.etag IS NULL AND items.version = excluded.version"
+                    " THEN items.etag ELSE excluded.etag END,"
+                    " version = excluded.version, type_key = excluded.type_key,"
+                    " used = excluded.used, data = excluded.data",
+                    [(item["id"], item.get("version"), etag, (item.get("item_type") or "").casefold(),
+                      self._tick(), json.dumps(item)) for item in items],
+                )
+            if removed:
+                self._db.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in removed])
+            if items:
+                excess = self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0] - self.capacity
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM items WHERE id IN (SELECT id FROM items ORDER BY used LIMIT ?)", (excess,)
+                    )
+            self._db.execute("COMMIT")
+
+    def _enqueue(self, changes):
+        with self._queued_cond:
+            if self._closed:
+                return
+            self._queued.update(changes)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, name="item-cache-writer", daemon=True)
+                self._writer.start()
+            self._queued_cond.notify_all()
+
+    def _write_behind(self):
+        while True:
+            with self._queued_cond:
+                self._queued_cond.wait_for(lambda: self._queued or self._closed)
+                if not self._queued:
+                    return
+                # queued entries stay visible to get() until they are in the database
+                batch = dict(self._queued)
+            try:
+                self._write([item for item in batch.values() if item is not None],
+                            removed=[i for i, item in batch.items() if item is None])
+            except sqlite3.Error:
+                pass        # it is only a cache: drop the batch, keep the writer
+            with self._queued_cond:
+                for item_id, item in batch.items():
+                    if item_id in self._queued and self._queued[item_id] is item:
+                        del self._queued[item_id]
+                self._queued_cond.notify_all()
+
+    def page(self, after, item_type, limit):
+        """Cached items with id > `after` (and of `item_type`), in id order."""
+        self.flush()
+        sql, args = "SELECT data FROM items WHERE id > ?", [after if after is not None else -1]
+        if item_type:
+            sql += " AND type_key = ?"
+            args.append(item_type.casefold())
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY id LIMIT ?", args + [limit]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_view(self, key, data):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO views (key, data) VALUES (?, ?)", (key, json.dumps(data)))
+
+    def load_view(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM views WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class _TaskSignals(QObject):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class Task(QRunnable):
+    """Runs `fn()` on a QThreadPool thread and emits its result (or error) as a signal."""
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.signals = _TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.done.emit(result)
+
+
+class EventStream(QObject):
+    """
+    Follows the server's /events stream on a daemon thread and re-emits each
+    event as `received(name, data)`; Qt delivers it on the GUI thread.
+    Reconnects with backoff, resuming from the last event id it saw.
+    """
+    received = pyqtSignal(str, object)
+
+    def __init__(self, url, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.last_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="library-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        delay = 1
+        while not self._stop.is_set():
+            headers = {"Accept": "text/event-stream"}
+            if self.last_id:
+                headers["Last-Event-ID"] = self.last_id
+            try:
+                with requests.get(self.url, headers=headers, stream=True, timeout=(6, 60)) as r:
+                    r.raise_for_status()
+                    delay = 1
+                    self._read(r)
+            except (requests.RequestException, ValueError):
+                pass
+            self._stop.wait(delay)
+            delay = min(delay * 2, EVENTS_MAX_BACKOFF)
+
+    def _read(self, response):
+        name, data = "message", []
+        for line in response.iter_lines(decode_unicode=True):
+            if self._stop.is_set():
+                return
+            if not line:
+                if data:
+                    self.received.emit(name, json.loads("\n".join(data)))
+                name, data = "message", []
+                continue
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                name = value
+            elif field == "data":
+                data.append(value)
+            elif field == "id":
+                self.last_id = value
+
+
+class ItemTableModel(QAbstractTableModel):
+    """
+    Table model over a plain list of item dicts (no per-cell objects); the
+    view only asks for the cells it paints. When `next_cursor` is set, the
+    view's canFetchMore/fetchMore turn scrolling to the end into a request
+    for the next page, via `fetch_requested`.
+    Rows are in id order unless `sorted_by_id` is False (search hits).
+    set_filter() narrows the rows shown to local search matches; row
+    numbers in the Qt API and item() then refer to the shown rows.
+    """
+    COLUMNS = (
+        ("ID", "id"),
+        ("Title", "title"),
+        ("Type", "item_type"),
+        ("Author/Director", "author_or_director"),
+        ("Available", "is_available"),
+        ("Expected date", "expected_available_date"),
+    )
+    fetch_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._ids = []                 # parallel to _rows
+        self._keys = []                # parallel to _rows: search_key() of each
+        self._terms = ()               # local search terms, () when unfiltered
+        self._view = None              # indexes into _rows of the shown rows while filtered
+        self.sorted_by_id = True
+        self.next_cursor = None
+        self.generation = 0            # bumped on reset, to spot stale page results
+        self._fetching = False
+
+    # --- Qt model API ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._view is None else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.cell_text(self.item(index.row()), index.column())
+        if role == Qt.TextAlignmentRole and index.column() in (0, 4):
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid() and self.next_cursor is not None
+                and not self._fetching and self._view is None)
+
+    def fetchMore(self, parent=QModelIndex()):
+        self._fetching = True
+        self.fetch_requested.emit()
+
+    # --- row store ---
+
+    @classmethod
+    def cell_text(cls, item, column):
+        key = cls.COLUMNS[column][1]
+        if key == "is_available":
+            return "Yes" if item.get(key, True) else "No"
+        value = item.get(key)
+        return "" if value is None else str(value)
+
+    @staticmethod
+    def search_key(item):
+        """Case-folded title and author words, each preceded by a space."""
+        text = "%s %s" % (item.get("title") or "", item.get("author_or_director") or "")
+        return " " + _NON_WORD.sub(" ", text.casefold())
+
+    def item(self, row):
+        return self._rows[row if self._view is None else self._view[row]]
+
+    def sample(self, count):
+        if self._view is None:
+            return self._rows[:count]
+        return [self._rows[i] for i in self._view[:count]]
+
+    @property
+    def filtered(self):
+        return self._view is not None
+
+    def set_filter(self, terms):
+        """
+        Show only the rows where every term starts a title or author word
+        (terms are case-folded words), in table order; no terms shows all.
+        Typing on (each new term extends an old one) only rescans the rows
+        already shown, so each keystroke costs a few substring scans at most.
+        """
+        terms = tuple(terms)
+        if terms == self._terms:
+            return
+        candidates = None
+        if self._view is not None and all(any(new.startswith(old) for new in terms) for old in self._terms):
+            candidates = self._view
+        self.beginResetModel()
+        self._terms = terms
+        self._view = self._matching(candidates) if terms else None
+        self.endResetModel()
+
+    def _matching(self, candidates=None):
+        keys = self._keys
+        view = candidates
+        for term in self._terms:
+            needle = " " + term
+            if view is None:
+                view = [i for i, key in enumerate(keys) if needle in key]
+            else:
+                view = [i for i in view if needle in keys[i]]
+        return view
+
+    def _refilter(self):
+        """Recompute the shown rows after _rows changed under a filter."""
+        self.beginResetModel()
+        self._view = self._matching()
+        self.endResetModel()
+
+    def reset(self, items, next_cursor=None, sorted_by_id=True):
+        self.beginResetModel()
+        self._rows = list(items)
+        self._ids = [item["id"] for item in self._rows]
+        self._keys = [self.search_key(item) for item in self._rows]
+        self._terms = ()
+        self._view = None
+        self.sorted_by_id = sorted_by_id
+        self.next_cursor = next_cursor
+        self.generation += 1
+        self._fetching = False
+        self.endResetModel()
+
+    def append_page(self, items, next_cursor):
+        """Add the next page; ids already present (inserted live) are skipped."""
+        self._fetching = False
+        self.next_cursor = next_cursor
+        last = self._ids[-1] if self._ids else None
+        items = [item for item in items if last is None or item["id"] > last]
+        if not items:
+            return
+        if self._view is not None:
+            self._extend(items)
+            self._refilter()
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self._extend(items)
+        self.endInsertRows()
+
+    def _extend(self, items):
+        self._rows.extend(items)
+        self._ids.extend(item["id"] for item in items)
+        self._keys.extend(self.search_key(item) for item in items)
+
+    def fetch_failed(self):
+        self._fetching = False
+
+    def row_of(self, item_id):
+        """Index of the item in _rows (not a shown row number), or None."""
+        if self.sorted_by_id:
+            row = bisect_left(self._ids, item_id)
+            return row if row < len(self._ids) and self._ids[row] == item_id else None
+        try:
+            return self._ids.index(item_id)
+        except ValueError:
+            return None
+
+    def upsert(self, item):
+        """
+        Replace the item's row, or insert it in id order if it falls within
+        the pages loaded so far (later pages will bring it otherwise).
+        Search hits are only updated, never extended.
+        """
+        row = self.row_of(item["id"])
+        if row is not None:
+            self._rows[row] = item
+            self._keys[row] = self.search_key(item)
+            if self._view is not None:
+                self._refilter()
+            else:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+            return
+        if not self.sorted_by_id:
+            return
+        if self.next_cursor is not None and (not self._ids or item["id"] > self._ids[-1]):
+            return
+        row = bisect_left(self._ids, item["id"])
+        if self._view is None:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, item)
+        self._ids.insert(row, item["id"])
+        self._keys.insert(row, self.search_key(item))
+        if self._view is None:
+            self.endInsertRows()
+        else:
+            self._refilter()
+
+    def remove(self, item_id):
+        row = self.row_of(item_id)
+        if row is None:
+            return
+        if self._view is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._ids[row]
+        del self._keys[row]
+        if self._view is None:
+            self.endRemoveRows()
+        else:
+            self._refilter()
+
+
 class ItemDialog(QDialog):
     def __init__(self, parent=None, data=None):
         super().__init__(parent)
@@ -108,6 +624,12 @@ class ItemDialog(QDialog):
 
         self.save_btn.clicked.connect(self.accept)
         self.cancel_btn.clicked.connect(self.reject)
+        # what the fields show before any edit (empty dates default to today)
+        self.initial = self.get_payload()
+
+    def changes(self):
+        """The payload fields the user changed since the dialog opened."""
+        return {k: v for k, v in self.get_payload().items() if v != self.initial.get(k)}
 
     def get_payload(self):
         # collect values and return dict suitable for API
@@ -129,9 +651,36 @@ class ItemDialog(QDialog):
 
 
 class LibraryApp(QWidget):
+    LIVE_UPDATES = True   # subscribe to /events on startup
+
+    # emitted by api_* (from worker threads) and shown on the GUI thread
+    network_error = pyqtSignal(str, str)
+    connectivity_changed = pyqtSignal(bool)
+
     def __init__(self):
         super().__init__()
+        # API calls run here, sharing one session (and its keep-alive connections)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(NETWORK_THREADS)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=NETWORK_THREADS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # every encoding urllib3 can decode here: gzip and deflate, plus br and
+        # zstd when brotli / zstandard are installed; bodies arrive decoded
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._pending = {}             # key -> the latest Task submitted under it
+        self._tasks = set()            # every submitted Task until it has run: the pool does not own them
+        self._etag_lock = threading.Lock()
+        self.network_error.connect(lambda title, msg: QMessageBox.critical(self, title, msg))
         self.user_column_widths = {}   # stores column widths the user sets (empty by default)
+        self._etag_cache = {}          # (path, params) -> (etag, data) of recent GETs
+        self.cache = ItemCache(CACHE_PATH)
+        self.online = True             # False once the server stopped answering
+        # catalog version the loaded rows reflect; refreshes ask /items/changes from here
+        self._sync_version = None
+        self._sync_epoch = None
+        self._query = None             # search shown in the table, None for the category view
 
         self.setWindowTitle("Library Manager (PyQt Client)")
         self.resize(900, 500)
@@ -143,7 +692,7 @@ class LibraryApp(QWidget):
         controls_row = QHBoxLayout()
 
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search exact name (press Enter or click Search)")
+        self.search_input.setPlaceholderText("Search title or author")
         self.search_btn = QPushButton("Search")
 
         self.category_combo = QComboBox()
@@ -167,47 +716,176 @@ class LibraryApp(QWidget):
 
         vbox.addLayout(controls_row)
 
-        # Table
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["ID", "Title", "Type", "Author/Director", "Available", "Expected date"])
+        # Table: a view over ItemTableModel, painting only the visible rows
+        self.model = ItemTableModel(self)
+        self.model.fetch_requested.connect(self.fetch_next_page)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.setColumnHidden(0, True)
         self.table.setSelectionBehavior(self.table.SelectRows)
+        self.table.setSelectionMode(self.table.ExtendedSelection)
         self.table.setEditTriggers(self.table.NoEditTriggers)
+        # fixed row heights: no per-row measuring on large catalogs
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().hide()
 
-        self.table.cellDoubleClicked.connect(self.on_row_double_clicked)
+        self.table.doubleClicked.connect(lambda index: self.on_row_double_clicked(index.row(), index.column()))
 
         vbox.addWidget(self.table)
 
+        self.status_label = QLabel("")
+        self.status_label.hide()
+        vbox.addWidget(self.status_label)
+        self.connectivity_changed.connect(self.on_connectivity_changed)
+
         self.setLayout(vbox)
 
         
-        self.refresh_btn.clicked.connect(self.load_items)
+        self.refresh_btn.clicked.connect(self.refresh)
         self.add_btn.clicked.connect(self.add_item)
         self.edit_btn.clicked.connect(self.edit_item)
         self.delete_btn.clicked.connect(self.delete_item)
         self.toggle_avail_btn.clicked.connect(self.toggle_availability)
 
         # new connections for search / category
-        self.search_btn.clicked.connect(lambda: self.load_items(name=self.search_input.text().strip()))
-        self.search_input.returnPressed.connect(lambda: self.load_items(name=self.search_input.text().strip()))
+        # typing searches once it pauses; Enter / Search apply it at once
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(lambda _: self._search_timer.start())
+        self.search_btn.clicked.connect(self.run_search)
+        self.search_input.returnPressed.connect(self.run_search)
         self.category_combo.currentIndexChanged.connect(lambda _: self.load_items())
 
 
-        # initial load
-        self.load_items()
+        # initial load: paint the cached first page at once and catch up from
+        # its version; without one, fetch the first page
+        view = self.cache.load_view(self._view_key())
+        if view is not None:
+            self._show_first_page(view)
+            self.refresh()
+        else:
+            self.load_items()
+
+        self.events = None
+        if self.LIVE_UPDATES:
+            self.events = EventStream(API_BASE + "/events", self)
+            self.events.received.connect(self.apply_event)
+            self.events.start()
+
+    def closeEvent(self, event):
+        if self.events is not None:
+            self.events.stop()
+        # drop queued requests, let running ones finish (their results are ignored)
+        self.pool.clear()
+        self.pool.waitForDone()
+        self._pending.clear()
+        self._tasks.clear()
+        self.cache.close()
+        super().closeEvent(event)
+
+    def run_async(self, key, fn, callback):
+        """
+        Run `fn()` on the worker pool and hand its result to `callback` on
+        the GUI thread. A later call with the same `key` supersedes this one:
+        it is taken off the queue if it has not started, and its result is
+        discarded if it has. key=None never supersedes anything.
+
+        Tasks are not auto-deleted, so `_tasks` holds each one until its own
+        signal arrives (or it is taken off the queue unrun); `_pending` only
+        says whose result is still wanted.
+        """
+        if key is None:
+            key = object()
+        previous = self._pending.get(key)
+        if previous is not None and self.pool.tryTake(previous):
+            self._tasks.discard(previous)
+        task = Task(fn)
+        task.setAutoDelete(False)
+        self._pending[key] = task
+        self._tasks.add(task)
+
+        def finished(result):
+            self._tasks.discard(task)
+            if self._pending.get(key) is task:
+                del self._pending[key]
+                callback(result)
+
+        def failed(message):
+            self._tasks.discard(task)
+            if self._pending.get(key) is task:
+                del self._pending[key]
+                QMessageBox.critical(self, "Error", message)
+
+        task.signals.done.connect(finished)
+        task.signals.failed.connect(failed)
+        self.pool.start(task)
 
     def api_get(self, path, params=None):
+        # revalidate with the ETag of the last identical GET: an unchanged
+        # catalog costs a bodiless 304 instead of the full payload. Single
+        # items revalidate against the on-disk item cache instead, which
+        # also answers for them while the server is unreachable.
+        # (blocking: called from worker threads, see run_async)
+        match = _ITEM_PATH.match(path)
+        item_id = int(match.group(1)) if match else None
+        key = (path, tuple(sorted((params or {}).items())))
+        if item_id is not None:
+            cached = self.cache.get(item_id)
+        else:
+            with self._etag_lock:
+                cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached and cached[0] else None
         try:
-            r = requests.get(API_BASE + path, params=params, timeout=6)
+            r = self.session.get(API_BASE + path, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            self._set_online(True)
+            if r.status_code == 304 and cached:
+                return cached[1]
+            if r.status_code == 404 and item_id is not None:
+                self.cache.remove([item_id])
             r.raise_for_status()
-            return r.json()
+            data = r.json()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            was_online = self.online
+            self._set_online(False)
+            if item_id is not None and cached:
+                return cached[1]
+            if was_online:
+                self.network_error.emit("Network error", f"GET {path} failed:\n{e}")
+            return None
         except requests.RequestException as e:
-            QMessageBox.critical(self, "Network error", f"GET {path} failed:\n{e}")
+            self.network_error.emit("Network error", f"GET {path} failed:\n{e}")
             return None
 
+        etag = r.headers.get("ETag")
+        if item_id is not None:
+            self.cache.put(data, etag)
+        elif etag:
+            with self._etag_lock:
+                self._etag_cache.pop(key, None)
+                if len(self._etag_cache) >= ETAG_CACHE_SIZE:
+                    self._etag_cache.pop(next(iter(self._etag_cache)))
+                self._etag_cache[key] = (etag, data)
+        return data
+
+    def _set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self.connectivity_changed.emit(online)
+
+    def on_connectivity_changed(self, online):
+        if online:
+            self.status_label.hide()
+            # catch up with whatever changed while we were away
+            self.refresh()
+        else:
+            self.status_label.setText("Offline: showing cached items")
+            self.status_label.show()
+
     def api_post(self, path, json):
         try:
-            r = requests.post(API_BASE + path, json=json, timeout=6)
+            r = self.session.post(API_BASE + path, json=json, timeout=REQUEST_TIMEOUT)
             r.raise_for_status()
             return r.json(), r.status_code
         except requests.RequestException as e:
@@ -218,85 +896,236 @@ class LibraryApp(QWidget):
                     msg = e.response.text
                 except Exception:
                     pass
-            QMessageBox.critical(self, "Network error", f"POST {path} failed:\n{msg}")
+            self.network_error.emit("Network error", f"POST {path} failed:\n{msg}")
             return None, getattr(e, "response", None)
 
     def api_put(self, path, json):
         try:
-            r = requests.put(API_BASE + path, json=json, timeout=6)
+            r = self.session.put(API_BASE + path, json=json, timeout=REQUEST_TIMEOUT)
             r.raise_for_status()
             return r.json()
         except requests.RequestException as e:
-            QMessageBox.critical(self, "Network error", f"PUT {path} failed:\n{e}")
+            self.network_error.emit("Network error", f"PUT {path} failed:\n{e}")
+            return None
+
+    def api_patch(self, path, json):
+        try:
+            r = self.session.patch(API_BASE + path, json=json, timeout=REQUEST_TIMEOUT)
+            r.raise_for_status()
+            return r.json()
+        except requests.RequestException as e:
+            self.network_error.emit("Network error", f"PATCH {path} failed:\n{e}")
             return None
 
     def api_delete(self, path):
         try:
-            r = requests.delete(API_BASE + path, timeout=6)
+            r = self.session.delete(API_BASE + path, timeout=REQUEST_TIMEOUT)
             if r.status_code not in (200, 204):
                 r.raise_for_status()
             return True
         except requests.RequestException as e:
-            QMessageBox.critical(self, "Network error", f"DELETE {path} failed:\n{e}")
+            self.network_error.emit("Network error", f"DELETE {path} failed:\n{e}")
             return False
 
 
-    def load_items(self, name: Optional[str] = None):
+    def _category_params(self):
+        cat = self.category_combo.currentText()
+        if cat and cat.lower() != "all":
+            return {"type": cat}
+        return {}
+
+    def _in_category(self, item):
+        cat = self.category_combo.currentText()
+        if not cat or cat.lower() == "all":
+            return True
+        return (item.get("item_type") or "").casefold() == cat.casefold()
+
+    def load_items(self, query: Optional[str] = None):
         """
-        Load items from the backend.
-        If `name` is provided -> exact-name search (/items?name=...)
-        Otherwise, uses the selected category (/items?type=...)
+        Load items from the backend (in the background).
+        If `query` is provided -> ranked title/author search (/items?q=...)
+        Otherwise, shows the first page of the selected category
+        (/items?type=...&limit=...); later pages load as the table scrolls.
+        A newer load supersedes one still in flight.
         """
+        self._query = query or None
+        if query:
+            def show_hits(data):
+                if data is not None:
+                    self.model.reset(data, sorted_by_id=False)
+                    self.resize_columns()
+
+            self.run_async("load", lambda: self.api_get("/items", params={"q": query}), show_hits)
+            return
 
-        params = {}
+        params = dict(self._category_params(), limit=PAGE_SIZE)
+        view_key = self._view_key()
 
-        if name:
-            params["name"] = name
-        else:
-            cat = self.category_combo.currentText()
-            if cat and cat.lower() != "all":
-                params["type"] = cat
+        def fetch():
+            data = self.api_get("/items", params=params)
+            if isinstance(data, dict):
+                self.cache.put_many(data["items"])
+                self.cache.save_view(view_key, data)
+            elif not self.online:
+                return self.cache.load_view(view_key) or {
+                    "items": self.cache.page(None, params.get("type"), PAGE_SIZE), "next_cursor": None,
+                }
+            return data
 
-        data = self.api_get("/items", params=params if params else None)
-        if data is None:
-            return
-        
-        self.table.setRowCount(0)
+        def show(data):
+            if isinstance(data, dict):
+                self._show_first_page(data)
+
+        self.run_async("load", fetch, show)
+
+    def run_search(self):
+        """
+        Apply the search box. While the table holds the whole category the
+        loaded rows are filtered in place (see ItemTableModel.set_filter), with
+        no request; otherwise the server is asked, superseding any search
+        still in flight. An empty box returns to the category view.
+        """
+        self._search_timer.stop()
+        text = self.search_input.text().strip()
+        terms = _WORD.findall(text.casefold())
+        if self._query is None and self.model.sorted_by_id and self.model.next_cursor is None:
+            self.model.set_filter(terms)
+        elif terms:
+            if text != self._query:
+                self.load_items(query=text)
+        elif self._query is not None:
+            self.load_items()
+
+    def _view_key(self):
+        return self.category_combo.currentText()
 
-        for item in data:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
+    def _show_first_page(self, data):
+        if data.get("version") is not None:
+            self._sync_version = data["version"]
+            self._sync_epoch = data.get("epoch")
+        self.model.reset(data["items"], data.get("next_cursor"))
+        self.resize_columns()
+        if self.search_input.text().strip():
+            self.run_search()
 
-            id_item = QTableWidgetItem(str(item.get("id")))
-            title_item = QTableWidgetItem(item.get("title", ""))
-            type_item = QTableWidgetItem(item.get("item_type", ""))
-            author_item = QTableWidgetItem(item.get("author_or_director") or "")
-            avail_item = QTableWidgetItem("Yes" if item.get("is_available", True) else "No")
-            expected_item = QTableWidgetItem(item.get("expected_available_date") or "")
+    def fetch_next_page(self):
+        """
+        Load the page after the last row (requested by the model on scroll).
+        Offline, the next rows come from the item cache instead.
+        """
+        params = dict(self._category_params(), limit=PAGE_SIZE, cursor=self.model.next_cursor)
+        generation = self.model.generation
+        last = self.model.item(self.model.rowCount() - 1)["id"] if self.model.rowCount() else None
+
+        def fetch():
+            data = self.api_get("/items", params=params)
+            if isinstance(data, dict):
+                self.cache.put_many(data["items"])
+            elif not self.online:
+                items = self.cache.page(last, params.get("type"), PAGE_SIZE)
+                # keep the server cursor: once back online, overlapping rows are skipped
+                return {"items": items, "next_cursor": params["cursor"]} if items else None
+            return data
+
+        def append(data):
+            if generation != self.model.generation:
+                return
+            if isinstance(data, dict):
+                self.model.append_page(data["items"], data.get("next_cursor"))
+            else:
+                self.model.fetch_failed()
 
-            id_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            avail_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.run_async("page", fetch, append)
 
-            self.table.setItem(row, 0, id_item)
-            self.table.setItem(row, 1, title_item)
-            self.table.setItem(row, 2, type_item)
-            self.table.setItem(row, 3, author_item)
-            self.table.setItem(row, 4, avail_item)
-            self.table.setItem(row, 5, expected_item)
+    def refresh(self):
+        """
+        Bring the table up to date. The category view asks /items/changes
+        for what changed since the loaded version and patches those rows;
+        a search is simply re-run.
+        """
+        if self._query or self._sync_version is None:
+            self.load_items(query=self._query)
+            return
+        params = {"since": self._sync_version, "epoch": self._sync_epoch}
+
+        def fetch():
+            data = self.api_get("/items/changes", params=params)
+            if isinstance(data, dict) and not data.get("reset"):
+                self.cache.put_many(data.get("items", []))
+                self.cache.remove(data.get("deleted", []))
+            return data
 
-        self.table.resizeColumnsToContents()
+        self.run_async("load", fetch, self.apply_changes)
+
+    def apply_changes(self, data):
+        """
+        Patch the table with an /items/changes response. On a reset (the
+        server can no longer diff from our version) the category is reloaded.
+        """
+        if not isinstance(data, dict):
+            return
+        if data.get("reset"):
+            self.load_items()
+            return
+        for item in data.get("items", []):
+            self._apply_item(item)
+        for item_id in data.get("deleted", []):
+            self.model.remove(item_id)
+        self._sync_version = data.get("version")
+
+    def _apply_item(self, item):
+        if self.model.sorted_by_id and not self._in_category(item):
+            self.model.remove(item["id"])
+        else:
+            self.model.upsert(item)
 
+    def apply_event(self, name, data):
+        """
+        Patch the table for one server event instead of reloading it:
+        "put" rewrites (or inserts) the item's row, "delete" removes it,
+        "reset" means the server lost track of us and everything is refetched.
+        The sync version is left alone, so the next refresh re-confirms these.
+        """
+        if name == "reset":
+            self.load_items(query=self._query)
+        elif name == "put":
+            self.cache.put_later(data)
+            self._apply_item(data)
+        elif name == "delete":
+            self.cache.remove_later([data["id"]])
+            self.model.remove(data["id"])
+
+    def resize_columns(self):
+        """
+        Size columns to the header and a sample of rows, not every row;
+        columns the user resized keep their width.
+        """
+        metrics = self.table.fontMetrics()
+        sample = self.model.sample(COLUMN_SAMPLE_ROWS)
+        for column, (header, _) in enumerate(self.model.COLUMNS):
+            if column in self.user_column_widths or self.table.isColumnHidden(column):
+                continue
+            texts = [header] + [self.model.cell_text(item, column) for item in sample]
+            width = max(metrics.horizontalAdvance(text) for text in texts) + 24
+            self.table.setColumnWidth(column, min(width, MAX_COLUMN_WIDTH))
+
+    def get_selected_items(self):
+        """The items of the selected rows, in table order."""
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        return [self.model.item(row) for row in rows]
 
     def get_selected_item_id(self):
-        sel = self.table.selectedItems()
-        if not sel:
-            return None
-        # first column is hidden ID
-        row = sel[0].row()
-        id_item = self.table.item(row, 0)
-        if id_item:
-            return int(id_item.text())
-        return None
+        items = self.get_selected_items()
+        return items[0]["id"] if items else None
+
+    def update_items(self, updates, message):
+        """Send `updates` (partial items with ids) as one PATCH, then refresh."""
+        def updated(items):
+            if items is not None:
+                self.refresh()
+                QMessageBox.information(self, "Updated", message)
+
+        self.run_async(None, lambda: self.api_patch("/items", json=updates), updated)
 
     def on_column_resized(self, col, old_size, new_size):
         """Called when user manually resizes a column. Store the new width."""
@@ -305,20 +1134,12 @@ class LibraryApp(QWidget):
     def on_row_double_clicked(self, row, col):
         """
         Show simple metadata when a user double-clicks a row.
-        Connected to: self.table.cellDoubleClicked
+        Connected to: self.table.doubleClicked
         """
-        id_item = self.table.item(row, 0)
-        if not id_item:
+        if not 0 <= row < self.model.rowCount():
             return
-        try:
-            item_id = int(id_item.text())
-        except Exception:
-            return
-
-        item = self.api_get(f"/items/{item_id}")
-        if not item:
-            return
-
+        # the row is kept current by refreshes and live events: no request needed
+        item = self.model.item(row)
         info = (
             f"Title: {item.get('title')}\n"
             f"Type: {item.get('item_type')}\n"
@@ -336,67 +1157,131 @@ class LibraryApp(QWidget):
             if not payload.get("title") or not payload.get("item_type"):
                 QMessageBox.warning(self, "Validation", "Title and type are required.")
                 return
-            data, status = self.api_post("/items", json=payload)
-            if data:
-                QMessageBox.information(self, "Created", f"Item created: {data.get('title')}")
-                self.load_items()
+
+            def created(result):
+                data, status = result
+                if data:
+                    QMessageBox.information(self, "Created", f"Item created: {data.get('title')}")
+                    self.refresh()
+
+            self.run_async(None, lambda: self.api_post("/items", json=payload), created)
 
     def edit_item(self):
-        item_id = self.get_selected_item_id()
-        if not item_id:
+        selected = self.get_selected_items()
+        if not selected:
             QMessageBox.warning(self, "No selection", "Select a row first.")
             return
-        # get item details from the server (or reuse row contents)
-        item = self.api_get(f"/items/{item_id}")
-        if item is None:
+        if len(selected) > 1:
+            # one dialog, prefilled from the first row; the fields changed
+            # in it are applied to every selected item
+            first = selected[0]
+            dialog = ItemDialog(self, data=first)
+            if dialog.exec_() != QDialog.Accepted:
+                return
+            changes = dialog.changes()
+            if changes:
+                self.update_items([dict(changes, id=item["id"]) for item in selected],
+                                  f"{len(selected)} items updated.")
             return
-        dialog = ItemDialog(self, data=item)
-        if dialog.exec_() == QDialog.Accepted:
-            payload = dialog.get_payload()
-            updated = self.api_put(f"/items/{item_id}", json=payload)
-            if updated:
-                QMessageBox.information(self, "Updated", f"Item updated: {updated.get('title')}")
-                self.load_items()
+        item_id = selected[0]["id"]
+
+        def updated(item):
+            if item:
+                QMessageBox.information(self, "Updated", f"Item updated: {item.get('title')}")
+                self.refresh()
+
+        # get item details from the server (or reuse row contents)
+        def edit(item):
+            if item is None:
+                return
+            dialog = ItemDialog(self, data=item)
+            if dialog.exec_() == QDialog.Accepted:
+                payload = dialog.get_payload()
+                self.run_async(None, lambda: self.api_put(f"/items/{item_id}", json=payload), updated)
+
+        self.run_async("details", lambda: self.api_get(f"/items/{item_id}"), edit)
 
     def delete_item(self):
-        item_id = self.get_selected_item_id()
-        if not item_id:
+        selected = self.get_selected_items()
+        if not selected:
             QMessageBox.warning(self, "No selection", "Select a row first.")
             return
+        if len(selected) > 1:
+            ok = QMessageBox.question(self, "Confirm delete", f"Delete the {len(selected)} selected items?")
+            if ok != QMessageBox.Yes:
+                return
+
+            def deleted_many(result):
+                data, status = result
+                if data:
+                    QMessageBox.information(self, "Deleted", f"{len(data['deleted'])} items deleted.")
+                    self.refresh()
+
+            ids = [item["id"] for item in selected]
+            self.run_async(None, lambda: self.api_post("/items/batch-delete", json={"ids": ids}), deleted_many)
+            return
+        item_id = selected[0]["id"]
         ok = QMessageBox.question(self, "Confirm delete", "Are you sure you want to delete the selected item?")
         if ok != QMessageBox.Yes:
             return
-        if self.api_delete(f"/items/{item_id}"):
-            QMessageBox.information(self, "Deleted", "Item deleted.")
-            self.load_items()
+
+        def deleted(ok):
+            if ok:
+                QMessageBox.information(self, "Deleted", "Item deleted.")
+                self.refresh()
+
+        self.run_async(None, lambda: self.api_delete(f"/items/{item_id}"), deleted)
+
+    def ask_expected_date(self):
+        """Ask when unavailable items are due back; an ISO date, or None if cancelled."""
+        expected, ok = QInputDialog.getText(self, "Mark unavailable", "Enter expected available date (YYYY-MM-DD):")
+        if not ok:
+            return None
+        # simple validation
+        expected_parsed = parse_iso_date(expected)
+        if not expected_parsed:
+            QMessageBox.warning(self, "Bad date", "Please provide a valid date in YYYY-MM-DD.")
+        return expected_parsed
 
     def toggle_availability(self):
-        item_id = self.get_selected_item_id()
-        if not item_id:
+        selected = self.get_selected_items()
+        if not selected:
             QMessageBox.warning(self, "No selection", "Select a row first.")
             return
-        item = self.api_get(f"/items/{item_id}")
-        if item is None:
+        if len(selected) > 1:
+            # mark them all unavailable if any is available, else all available
+            if any(item.get("is_available", True) for item in selected):
+                expected = self.ask_expected_date()
+                if expected is None:
+                    return
+                payload = {"is_available": False, "expected_available_date": expected}
+            else:
+                payload = {"is_available": True, "expected_available_date": None}
+            self.update_items([dict(payload, id=item["id"]) for item in selected], "Availability updated.")
             return
-        currently_available = item.get("is_available", True)
-        if currently_available:
-            # ask for expected date to set when it will be available
-            expected, ok = QInputDialog.getText(self, "Mark unavailable", "Enter expected available date (YYYY-MM-DD):")
-            if not ok:
-                return
-            # simple validation
-            expected_parsed = parse_iso_date(expected)
-            if not expected_parsed:
-                QMessageBox.warning(self, "Bad date", "Please provide a valid date in YYYY-MM-DD.")
-                return
-            payload = {"is_available": False, "expected_available_date": expected_parsed}
-        else:
-            payload = {"is_available": True, "expected_available_date": None}
+        item_id = selected[0]["id"]
 
-        updated = self.api_put(f"/items/{item_id}", json=payload)
-        if updated:
-            self.load_items()
-            QMessageBox.information(self, "Updated", "Availability updated.")
+        def updated(item):
+            if item:
+                self.refresh()
+                QMessageBox.information(self, "Updated", "Availability updated.")
+
+        def toggle(item):
+            if item is None:
+                return
+            currently_available = item.get("is_available", True)
+            if currently_available:
+                # ask for expected date to set when it will be available
+                expected_parsed = self.ask_expected_date()
+                if expected_parsed is None:
+                    return
+                payload = {"is_available": False, "expected_available_date": expected_parsed}
+            else:
+                payload = {"is_available": True, "expected_available_date": None}
+
+            self.run_async(None, lambda: self.api_put(f"/items/{item_id}", json=payload), updated)
+
+        self.run_async("details", lambda: self.api_get(f"/items/{item_id}"), toggle)
 
 
 if __name__ == "__main__":
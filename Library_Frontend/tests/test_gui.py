@@ -1,8 +1,14 @@
 # Library_Frontend/tests/test_gui.py
+import gc
+import io
 import json
 import sys
 import os
+import threading
+import zlib
 import pytest
+import urllib3
+from PyQt5.QtCore import QItemSelectionModel
 from PyQt5.QtWidgets import QDialog
 
 # Ensure the Library_Frontend folder is on sys.path so we can import main.py
@@ -27,34 +33,95 @@ SAMPLE_ITEMS = [
 ]
 
 
+class FakeServer:
+    """Answers LibraryApp.api_get like the backend would, from an in-memory catalog."""
+
+    def __init__(self, items=()):
+        self.version = 0
+        self.items = {}
+        self.deleted = {}          # id -> version of the delete
+        self.calls = []
+        for item in items:
+            self.put(item)
+
+    def put(self, item):
+        self.version += 1
+        self.items[item["id"]] = dict(item, version=self.version)
+        return self.items[item["id"]]
+
+    def delete(self, item_id):
+        self.version += 1
+        self.items.pop(item_id)
+        self.deleted[item_id] = self.version
+
+    def get(self, path, params=None):
+        self.calls.append((path, params))
+        params = params or {}
+        items = [self.items[i] for i in sorted(self.items)]
+        if "type" in params:
+            items = [i for i in items if i["item_type"] == params["type"]]
+        if path == "/items" and "q" in params:
+            return [i for i in items if params["q"].lower() in i["title"].lower()]
+        if path == "/items":
+            after = int(params.get("cursor") or 0)
+            page = [i for i in items if i["id"] > after][:params["limit"]]
+            more = page and page[-1]["id"] < items[-1]["id"]
+            return {"items": page, "next_cursor": str(page[-1]["id"]) if more else None,
+                    "version": self.version, "epoch": "e"}
+        if path == "/items/changes":
+            since = params["since"]
+            return {"epoch": "e", "version": self.version, "reset": False,
+                    "items": [i for i in items if i["version"] > since],
+                    "deleted": [i for i, v in self.deleted.items() if v > since]}
+        return self.items.get(int(path.rsplit("/", 1)[1]))
+
+
+def serve(monkeypatch, server):
+    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: server.get(path, params))
+    return server
+
+
+def settle(qtbot, app):
+    """Wait until every background request and its GUI callback has run."""
+    qtbot.waitUntil(lambda: not app._pending and app.pool.activeThreadCount() == 0, timeout=5000)
+
+
+def cell(app, row, column):
+    return app.model.data(app.model.index(row, column))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch, tmp_path):
+    # every test starts with its own empty on-disk item cache
+    monkeypatch.setattr(main, "CACHE_PATH", str(tmp_path / "cache" / "items.db"))
+
+
 @pytest.fixture(autouse=True)
 def disable_message_boxes(monkeypatch):
     # prevent modal message boxes from blocking tests
     monkeypatch.setattr(main.QMessageBox, "critical", lambda *a, **k: None)
     monkeypatch.setattr(main.QMessageBox, "information", lambda *a, **k: None)
     monkeypatch.setattr(main.QMessageBox, "warning", lambda *a, **k: None)
+    # no background /events connection to a real server
+    monkeypatch.setattr(main.LibraryApp, "LIVE_UPDATES", False)
     yield
 
 
 def test_load_items_populates_table(qtbot, monkeypatch):
     # prepare api_get to return our sample items
     monkeypatch.setattr(main, "API_BASE", "http://127.0.0.1:5000/")
-
-    def fake_api_get(path, params=None):
-        assert path == "/items"
-        return SAMPLE_ITEMS
-
-    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: fake_api_get(path, params))
+    server = serve(monkeypatch, FakeServer(SAMPLE_ITEMS))
 
     app = main.LibraryApp()
     qtbot.addWidget(app)
+    settle(qtbot, app)
 
     # load items and assert table populated
     app.load_items()
-    assert app.table.rowCount() == 1
-    item = app.table.item(0, 1)
-    assert item is not None
-    title = item.text()
+    settle(qtbot, app)
+    assert all(path == "/items" for path, _ in server.calls)
+    assert app.model.rowCount() == 1
+    title = cell(app, 0, 1)
     assert title == "The Hobbit"
 
 
@@ -73,56 +140,43 @@ class DummyDialog(QDialog):
 def test_add_item_flow(qtbot, monkeypatch):
     # monkeypatch dialog and API calls
     monkeypatch.setattr(main, "ItemDialog", DummyDialog)
+    server = serve(monkeypatch, FakeServer())
 
     # api_post should return created item
     created = {"id": 2, "title": "Dune", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
 
     def fake_api_post(self, path, json):
         assert path == "/items"
-        return created, 201
-
-    # api_get should return list including created item after creation
-    called = {"get_calls": 0}
-
-    def fake_api_get(self, path, params=None):
-        called["get_calls"] += 1
-        if called["get_calls"] == 1:
-            return []
-        return [created]
+        return server.put(created), 201
 
     monkeypatch.setattr(main.LibraryApp, "api_post", fake_api_post)
-    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
 
     app = main.LibraryApp()
     qtbot.addWidget(app)
+    settle(qtbot, app)
+    assert app.model.rowCount() == 0
 
     # simulate clicking Add
     app.add_item()
+    settle(qtbot, app)
 
-    # after add, load_items should have been called and table updated
-    assert app.table.rowCount() == 1
-    item = app.table.item(0, 1)
-    assert item is not None
-    assert item.text() == "Dune"
+    # after add, the table is refreshed with the changes since the first load
+    assert server.calls[-1] == ("/items/changes", {"since": 0, "epoch": "e"})
+    assert app.model.rowCount() == 1
+    assert cell(app, 0, 1) == "Dune"
 
 
 def test_edit_item_flow(qtbot, monkeypatch):
     # prepare initial item and API behaviors
     original = {"id": 3, "title": "Old Title", "item_type": "book", "author_or_director": "A", "is_available": True, "expected_available_date": None}
     updated = {"id": 3, "title": "New Title", "item_type": "book", "author_or_director": "A", "is_available": True, "expected_available_date": None}
-
-    # api_get for single item should return original
-    def fake_api_get(self, path, params=None):
-        if path == "/items":
-            return [original]
-        if path == "/items/3":
-            return original
-        return None
+    server = serve(monkeypatch, FakeServer([original]))
 
     # Replace ItemDialog to return updated payload
     class EditDialog(QDialog):
         def __init__(self, parent=None, data=None):
             super().__init__(parent)
+            assert data["title"] == "Old Title"
             self._payload = {"title": "New Title", "item_type": "book"}
 
         def exec_(self):
@@ -133,97 +187,552 @@ def test_edit_item_flow(qtbot, monkeypatch):
 
     def fake_api_put(self, path, json):
         assert path == "/items/3"
-        return updated
+        return server.put(updated)
 
-    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
     monkeypatch.setattr(main, "ItemDialog", EditDialog)
     monkeypatch.setattr(main.LibraryApp, "api_put", fake_api_put)
 
     app = main.LibraryApp()
     qtbot.addWidget(app)
+    settle(qtbot, app)
 
     # load initial items
     app.load_items()
-    assert app.table.rowCount() == 1
+    settle(qtbot, app)
+    assert app.model.rowCount() == 1
 
     # select row 0
     app.table.selectRow(0)
     # run edit
     app.edit_item()
+    settle(qtbot, app)
 
     # after edit, table should have updated title
-    # we monkeypatched api_get to still return original list on reload, so update table manually by calling load_items again with updated data
-    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: [updated] if path == "/items" else updated)
-    app.load_items()
-    item = app.table.item(0, 1)
-    assert item is not None
-    assert item.text() == "New Title"
+    assert cell(app, 0, 1) == "New Title"
 
 
 def test_delete_item_flow(qtbot, monkeypatch):
     item = {"id": 4, "title": "ToDelete", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
-
-    def fake_api_get(self, path, params=None):
-        if path == "/items":
-            return [item]
-        if path == "/items/4":
-            return item
-        return None
+    server = serve(monkeypatch, FakeServer([item]))
 
     def fake_api_delete(self, path):
         assert path == "/items/4"
+        server.delete(4)
         return True
 
-    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
     monkeypatch.setattr(main.LibraryApp, "api_delete", fake_api_delete)
 
     app = main.LibraryApp()
     qtbot.addWidget(app)
+    settle(qtbot, app)
     app.load_items()
-    assert app.table.rowCount() == 1
+    settle(qtbot, app)
+    assert app.model.rowCount() == 1
 
     app.table.selectRow(0)
     # monkeypatch QMessageBox.question to auto-confirm
     monkeypatch.setattr(main.QMessageBox, "question", lambda *a, **k: main.QMessageBox.Yes)
     app.delete_item()
-    # simulate empty list after deletion
-    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: [])
-    app.load_items()
-    assert app.table.rowCount() == 0
+    settle(qtbot, app)
+    assert app.model.rowCount() == 0
 
 
 def test_toggle_availability_flow(qtbot, monkeypatch):
     # item initially available -> toggle to unavailable
     item = {"id": 5, "title": "ToggleMe", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
     updated = {"id": 5, "title": "ToggleMe", "item_type": "book", "author_or_director": None, "is_available": False, "expected_available_date": "2025-12-25"}
-
-    def fake_api_get(self, path, params=None):
-        if path == "/items":
-            return [item]
-        if path == "/items/5":
-            return item
-        return None
+    server = serve(monkeypatch, FakeServer([item]))
 
     def fake_api_put(self, path, json):
         assert path == "/items/5"
         # ensure payload contains expected date when marking unavailable
         assert json.get("is_available") is False
-        return updated
+        return server.put(updated)
 
-    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
     monkeypatch.setattr(main.LibraryApp, "api_put", fake_api_put)
     # make QInputDialog.getText return a valid date and accepted=True
     monkeypatch.setattr(main.QInputDialog, "getText", lambda *a, **k: ("2025-12-25", True))
 
     app = main.LibraryApp()
     qtbot.addWidget(app)
+    settle(qtbot, app)
     app.load_items()
+    settle(qtbot, app)
     app.table.selectRow(0)
     app.toggle_availability()
+    settle(qtbot, app)
+
+    assert cell(app, 0, 4) == "No"
+    assert cell(app, 0, 5) == "2025-12-25"
+
+
+def test_multi_row_actions_send_one_batch(qtbot, monkeypatch):
+    # a selection of rows is toggled / deleted with a single request
+    server = serve(monkeypatch, FakeServer(
+        dict(SAMPLE_ITEMS[0], id=i, title=f"Item {i}") for i in range(1, 6)
+    ))
+    requests_sent = []
+
+    def fake_api_patch(self, path, json):
+        requests_sent.append(("PATCH", path, json))
+        return [server.put(dict(server.items[u["id"]], **u)) for u in json]
+
+    def fake_api_post(self, path, json):
+        requests_sent.append(("POST", path, json))
+        for item_id in json["ids"]:
+            server.delete(item_id)
+        return {"deleted": json["ids"], "missing": []}, 200
+
+    monkeypatch.setattr(main.LibraryApp, "api_patch", fake_api_patch)
+    monkeypatch.setattr(main.LibraryApp, "api_post", fake_api_post)
+    monkeypatch.setattr(main.QInputDialog, "getText", lambda *a, **k: ("2025-12-25", True))
+    monkeypatch.setattr(main.QMessageBox, "question", lambda *a, **k: main.QMessageBox.Yes)
+
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    for row in (0, 2, 3):
+        app.table.selectionModel().select(
+            app.model.index(row, 0), QItemSelectionModel.Select | QItemSelectionModel.Rows)
+
+    app.toggle_availability()
+    settle(qtbot, app)
+    assert requests_sent == [("PATCH", "/items", [
+        {"is_available": False, "expected_available_date": "2025-12-25", "id": i} for i in (1, 3, 4)
+    ])]
+    assert [cell(app, r, 4) for r in range(5)] == ["No", "Yes", "No", "No", "Yes"]
+
+    app.delete_item()
+    settle(qtbot, app)
+    assert requests_sent[1] == ("POST", "/items/batch-delete", {"ids": [1, 3, 4]})
+    assert [cell(app, r, 1) for r in range(app.model.rowCount())] == ["Item 2", "Item 5"]
+
+
+def test_multi_row_edit_sends_only_changed_fields(qtbot, monkeypatch):
+    # Save with nothing changed sends nothing; otherwise only the edited fields go to every row
+    server = serve(monkeypatch, FakeServer(
+        dict(SAMPLE_ITEMS[0], id=i, title=f"Item {i}") for i in range(1, 4)
+    ))
+    requests_sent = []
+
+    def fake_api_patch(self, path, json):
+        requests_sent.append(json)
+        return [server.put(dict(server.items[u["id"]], **u)) for u in json]
+
+    edits = []
+
+    def fake_exec(dialog):
+        for edit in edits:
+            edit(dialog)
+        return QDialog.Accepted
 
-    # simulate updated list on reload
-    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: [updated] if path == "/items" else updated)
+    monkeypatch.setattr(main.LibraryApp, "api_patch", fake_api_patch)
+    monkeypatch.setattr(main.ItemDialog, "exec_", fake_exec)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    for row in (0, 2):
+        app.table.selectionModel().select(
+            app.model.index(row, 0), QItemSelectionModel.Select | QItemSelectionModel.Rows)
+
+    app.edit_item()
+    settle(qtbot, app)
+    assert requests_sent == []
+
+    edits.append(lambda dialog: dialog.author_in.setText("Ursula K. Le Guin"))
+    app.edit_item()
+    settle(qtbot, app)
+    assert requests_sent == [[{"author_or_director": "Ursula K. Le Guin", "id": i} for i in (1, 3)]]
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+def test_api_get_revalidates_with_etag(qtbot, monkeypatch):
+    # first GET stores the ETag, the second sends If-None-Match and reuses the body on 304
+    sent = []
+    page = {"items": SAMPLE_ITEMS, "next_cursor": None, "version": 1, "epoch": "e"}
+
+    def fake_get(session, url, params=None, headers=None, timeout=None):
+        sent.append(headers)
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, page if params and "limit" in params else SAMPLE_ITEMS, {"ETag": '"v1"'})
+
+    monkeypatch.setattr(main.requests.Session, "get", fake_get)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+
+    assert app.model.rowCount() == 1
+    assert app.api_get("/items") == SAMPLE_ITEMS
+    assert app.api_get("/items") == SAMPLE_ITEMS
+    assert sent[-1] == {"If-None-Match": '"v1"'}
+
+
+def test_api_get_decodes_compressed_responses(qtbot, monkeypatch):
+    # the server gzips large bodies (a streamed list: sync-flushed chunks) for
+    # clients that accept it; api_get must hand back the decoded JSON
+    sent = []
+    gz = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    body = b"".join(gz.compress(chunk) + gz.flush(zlib.Z_SYNC_FLUSH)
+                    for chunk in (b"[", json.dumps(SAMPLE_ITEMS)[1:-1].encode(), b"]\n")) + gz.flush()
+
+    def send(adapter, request, **kwargs):
+        sent.append(request.headers)
+        raw = urllib3.HTTPResponse(
+            body=io.BytesIO(body), status=200, preload_content=False, decode_content=False,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip", "ETag": 'W/"e-1"'})
+        return adapter.build_response(request, raw)
+
+    api_get = main.LibraryApp.api_get
+    serve(monkeypatch, FakeServer(SAMPLE_ITEMS))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+
+    monkeypatch.setattr(main.HTTPAdapter, "send", send)
+    assert api_get(app, "/items") == SAMPLE_ITEMS
+    assert "gzip" in sent[0]["Accept-Encoding"]
+    assert api_get(app, "/items") == SAMPLE_ITEMS
+    assert sent[1]["If-None-Match"] == 'W/"e-1"'
+
+
+def test_refresh_applies_deltas(qtbot, monkeypatch):
+    # after the first page, a refresh only asks for changes since the loaded version
+    b = {"id": 2, "title": "Dune", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
+    server = serve(monkeypatch, FakeServer([SAMPLE_ITEMS[0], b]))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    assert app.model.rowCount() == 2
+
+    server.put(dict(SAMPLE_ITEMS[0], title="The Hobbit (2nd ed.)"))
+    server.delete(2)
+    app.refresh()
+    settle(qtbot, app)
+    assert server.calls[-1] == ("/items/changes", {"since": 2, "epoch": "e"})
+    assert app.model.rowCount() == 1
+    assert cell(app, 0, 1) == "The Hobbit (2nd ed.)"
+    assert app._sync_version == 4
+
+
+def test_pages_load_on_scroll(qtbot, monkeypatch):
+    # the table starts with one page and fetches the next when the view asks for more
+    monkeypatch.setattr(main, "PAGE_SIZE", 50)
+    serve(monkeypatch, FakeServer(
+        dict(SAMPLE_ITEMS[0], id=i, title=f"Item {i}") for i in range(1, 121)
+    ))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    assert app.model.rowCount() == 50 and app.model.canFetchMore()
+
+    app.model.fetchMore()
+    assert not app.model.canFetchMore()      # one page request at a time
+    settle(qtbot, app)
+    assert app.model.rowCount() == 100
+    app.model.fetchMore()
+    settle(qtbot, app)
+    assert app.model.rowCount() == 120 and not app.model.canFetchMore()
+    assert [cell(app, r, 1) for r in (0, 119)] == ["Item 1", "Item 120"]
+
+    # live inserts beyond the loaded pages wait for their page
+    app.model.reset(app.model.sample(10), next_cursor="10")
+    app.apply_event("put", dict(SAMPLE_ITEMS[0], id=500, title="Late"))
+    assert app.model.rowCount() == 10
+
+
+def test_events_patch_rows(qtbot, monkeypatch):
+    # pushed events update, insert and remove single rows without a reload
+    b = {"id": 2, "title": "Dune", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
+    serve(monkeypatch, FakeServer([SAMPLE_ITEMS[0], b]))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    monkeypatch.setattr(main.LibraryApp, "api_get", lambda self, path, params=None: pytest.fail("reloaded"))
+
+    app.apply_event("put", dict(b, is_available=False))
+    assert cell(app, 1, 4) == "No"
+    app.apply_event("delete", {"id": 1})
+    assert app.model.rowCount() == 1 and cell(app, 0, 1) == "Dune"
+    app.apply_event("put", dict(b, id=7, title="Emma"))
+    app.apply_event("put", dict(b, id=5, title="Solaris"))
+    assert [cell(app, r, 1) for r in range(3)] == ["Dune", "Solaris", "Emma"]
+    app.apply_event("put", dict(b, id=5, title="Solaris", item_type="film"))
+    app.category_combo.blockSignals(True)
+    app.category_combo.setCurrentText("book")
+    app.apply_event("put", dict(b, id=5, title="Solaris", item_type="film"))
+    assert [cell(app, r, 1) for r in range(app.model.rowCount())] == ["Dune", "Emma"]
+    # the cache catches up off the GUI thread
+    app.cache.flush()
+    assert app.cache.get(1) is None
+    assert [i["title"] for i in app.cache.page(None, "film", 10)] == ["Solaris"]
+
+
+def test_event_stream_parses_sse(qtbot):
+    class FakeStream:
+        def iter_lines(self, decode_unicode=False):
+            return iter([": keepalive", "", "id: e-3", "event: delete", 'data: {"id": 4}', "", "retry: 10", ""])
+
+    stream = main.EventStream("http://example/events")
+    with qtbot.waitSignal(stream.received) as blocker:
+        stream._read(FakeStream())
+    assert blocker.args == ["delete", {"id": 4}]
+    assert stream.last_id == "e-3"
+
+
+def test_superseded_load_is_discarded(qtbot, monkeypatch):
+    # a slow first load must not overwrite the result of a newer one
+    release = threading.Event()
+    server = FakeServer(SAMPLE_ITEMS)
+
+    def fake_api_get(self, path, params=None):
+        if params and params.get("q") == "slow":
+            release.wait(5)
+            return [dict(SAMPLE_ITEMS[0], title="Stale")]
+        return server.get(path, params)
+
+    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+
+    app.load_items(query="slow")
     app.load_items()
-    item = app.table.item(0, 4)
-    assert item is not None
-    assert item.text() == "No"
+    release.set()
+    settle(qtbot, app)
+    app.pool.waitForDone(5000)
+    qtbot.wait(50)
+    assert cell(app, 0, 1) == "The Hobbit"
+
+
+def test_superseded_tasks_live_until_they_finish(qtbot, monkeypatch):
+    # a running task that is superseded, or still running at close, keeps its Python object
+    serve(monkeypatch, FakeServer(SAMPLE_ITEMS))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    started, release, results = threading.Event(), threading.Event(), []
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    app.run_async("k", slow, results.append)
+    assert started.wait(5)
+    app.run_async("k", lambda: "fast", results.append)
+    gc.collect()
+    assert len(app._tasks) == 2
+    release.set()
+    settle(qtbot, app)
+    qtbot.waitUntil(lambda: not app._tasks, timeout=5000)
+    assert results == ["fast"]
+
+    release.clear()
+    started.clear()
+    app.run_async("k", slow, results.append)
+    assert started.wait(5)
+    threading.Timer(0.2, release.set).start()
+    app.close()                                   # waits for the running task
+    assert app.pool.activeThreadCount() == 0 and not app._tasks
+
+
+def test_network_calls_do_not_block_gui(qtbot, monkeypatch):
+    # load_items returns immediately; the table fills in once the worker finishes
+    release = threading.Event()
+    server = FakeServer(SAMPLE_ITEMS)
+
+    def fake_api_get(self, path, params=None):
+        release.wait(5)
+        return server.get(path, params)
+
+    monkeypatch.setattr(main.LibraryApp, "api_get", fake_api_get)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    assert app.model.rowCount() == 0
+    release.set()
+    settle(qtbot, app)
+    assert app.model.rowCount() == 1
+
+
+def test_item_cache_is_bounded_and_persistent(tmp_path):
+    path = str(tmp_path / "items.db")
+    cache = main.ItemCache(path, capacity=3)
+    for i in range(1, 5):
+        cache.put(dict(SAMPLE_ITEMS[0], id=i, version=i), etag=f'"e{i}"')
+    cache.get(2)                                  # 2 is now more recent than 3 and 4
+    cache.put(dict(SAMPLE_ITEMS[0], id=5, version=5, item_type="film"))
+
+    cache = main.ItemCache(path, capacity=3)
+    assert cache.get(1) is None and cache.get(3) is None
+    assert cache.get(2) == ('"e2"', dict(SAMPLE_ITEMS[0], id=2, version=2))
+    # re-caching an unchanged version keeps its ETag, a new version drops it
+    cache.put(dict(SAMPLE_ITEMS[0], id=2, version=2))
+    cache.put(dict(SAMPLE_ITEMS[0], id=4, version=9))
+    assert cache.get(2)[0] == '"e2"' and cache.get(4)[0] is None
+    assert [i["id"] for i in cache.page(None, "book", 10)] == [2, 4]
+    assert [i["id"] for i in cache.page(2, None, 10)] == [4, 5]
+
+
+def test_item_cache_writes_behind(tmp_path):
+    path = str(tmp_path / "items.db")
+    cache = main.ItemCache(path, capacity=2)
+    cache.put(dict(SAMPLE_ITEMS[0], id=1))
+    cache.put(dict(SAMPLE_ITEMS[0], id=2))
+    cache.get(1)                                  # noted in memory, written with the next write
+    cache.put_later(dict(SAMPLE_ITEMS[0], id=3, title="Draft"))
+    cache.put_later(dict(SAMPLE_ITEMS[0], id=3, title="Final"))
+    cache.put_later(dict(SAMPLE_ITEMS[0], id=4))
+    cache.remove_later([4])
+    assert cache.get(3)[1]["title"] == "Final" and cache.get(4) is None
+    cache.close()
+
+    cache = main.ItemCache(path, capacity=2)
+    assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert [(i["id"], i["title"]) for i in cache.page(None, None, 10)] == [(1, "The Hobbit"), (3, "Final")]
+
+
+def test_startup_paints_from_cache_then_catches_up(qtbot, monkeypatch):
+    # a second start shows the cached page before the network answers, then applies the delta
+    b = {"id": 2, "title": "Dune", "item_type": "book", "author_or_director": None, "is_available": True, "expected_available_date": None}
+    server = serve(monkeypatch, FakeServer([SAMPLE_ITEMS[0], b]))
+    first = main.LibraryApp()
+    qtbot.addWidget(first)
+    settle(qtbot, first)
+
+    server.put(dict(b, title="Dune Messiah"))
+    release = threading.Event()
+
+    def slow_get(self, path, params=None):
+        release.wait(5)
+        return server.get(path, params)
+
+    monkeypatch.setattr(main.LibraryApp, "api_get", slow_get)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    assert [cell(app, r, 1) for r in range(2)] == ["The Hobbit", "Dune"]
+    release.set()
+    settle(qtbot, app)
+    assert server.calls[-1] == ("/items/changes", {"since": 2, "epoch": "e"})
+    assert cell(app, 1, 1) == "Dune Messiah"
+
+
+def test_offline_reads_fall_back_to_cache(qtbot, monkeypatch):
+    # with the server down, item lookups answer from the cache and the UI says so
+    server = FakeServer(SAMPLE_ITEMS)
+    down = threading.Event()
+
+    def fake_get(session, url, params=None, headers=None, timeout=None):
+        if down.is_set():
+            raise main.requests.ConnectionError("refused")
+        return FakeResponse(200, server.get(url[len(main.API_BASE):], params))
+
+    monkeypatch.setattr(main.requests.Session, "get", fake_get)
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    assert app.model.rowCount() == 1
+
+    down.set()
+    monkeypatch.setattr(main.QMessageBox, "critical", lambda *a, **k: pytest.fail("error shown"))
+    assert app.api_get("/items/1")["title"] == "The Hobbit"
+    assert not app.online
+    qtbot.waitUntil(lambda: app.status_label.isVisibleTo(app))
+
+
+def test_typing_filters_loaded_rows_locally(qtbot, monkeypatch):
+    # with the whole category loaded, typing filters rows in place without requests
+    server = serve(monkeypatch, FakeServer([
+        SAMPLE_ITEMS[0],
+        dict(SAMPLE_ITEMS[0], id=2, title="Dune", author_or_director="Frank Herbert"),
+        dict(SAMPLE_ITEMS[0], id=3, title="The Silmarillion"),
+    ]))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+    requests_made = len(server.calls)
+
+    qtbot.keyClicks(app.search_input, "tolk")
+    assert app.model.rowCount() == 3          # debounced: nothing happens mid-typing
+    qtbot.waitUntil(lambda: app.model.rowCount() == 2, timeout=2000)
+    assert [cell(app, r, 1) for r in range(2)] == ["The Hobbit", "The Silmarillion"]
+
+    app.search_input.setText("the sil")
+    app.run_search()
+    assert [cell(app, r, 1) for r in range(app.model.rowCount())] == ["The Silmarillion"]
+    app.search_input.setText("ilm")           # word prefixes only, like the server
+    app.run_search()
+    assert app.model.rowCount() == 0
+
+    # live changes are matched against the filter too
+    app.search_input.setText("herb")
+    app.run_search()
+    app.apply_event("put", dict(SAMPLE_ITEMS[0], id=4, title="Herbs"))
+    assert [cell(app, r, 1) for r in range(app.model.rowCount())] == ["Dune", "Herbs"]
+
+    app.search_input.clear()
+    app.run_search()
+    assert app.model.rowCount() == 4
+    assert len(server.calls) == requests_made
+
+
+def test_typing_searches_server_when_partly_loaded(qtbot, monkeypatch):
+    # with more pages on the server, one debounced ?q= request replaces the rows
+    monkeypatch.setattr(main, "PAGE_SIZE", 2)
+    server = serve(monkeypatch, FakeServer(
+        dict(SAMPLE_ITEMS[0], id=i, title=f"Item {i}") for i in range(1, 6)
+    ))
+    app = main.LibraryApp()
+    qtbot.addWidget(app)
+    settle(qtbot, app)
+
+    qtbot.keyClicks(app.search_input, "item 5")
+    qtbot.waitUntil(lambda: app._query == "item 5", timeout=2000)
+    settle(qtbot, app)
+    assert [p["q"] for _, p in server.calls if p and "q" in p] == ["item 5"]
+    assert [cell(app, r, 1) for r in range(app.model.rowCount())] == ["Item 5"]
+
+    app.search_input.clear()
+    app.run_search()
+    settle(qtbot, app)
+    assert app._query is None and app.model.rowCount() == 2
+
+
+def test_local_filter_rescans_only_shown_rows(qtbot):
+    # typing on rescans the rows still shown, not the whole table (timed in benchmarks/bench_filter.py)
+    class CountingKeys(list):
+        visited = 0
+
+        def __iter__(self):
+            CountingKeys.visited += len(self)
+            return super().__iter__()
+
+        def __getitem__(self, i):
+            CountingKeys.visited += 1
+            return super().__getitem__(i)
+
+    model = main.ItemTableModel()
+    model.reset({"id": i, "title": f"Title {i}", "author_or_director": f"Author {i % 977}"}
+                for i in range(5000))
+    model._keys = CountingKeys(model._keys)
+    for terms in (["a"], ["au"], ["author", "9"], ["author", "97"]):
+        shown, CountingKeys.visited = model.rowCount(), 0
+        model.set_filter(terms)
+        assert CountingKeys.visited <= len(terms) * shown
+    assert CountingKeys.visited < 5000            # "author 97" read only the rows "author 9" left
+    CountingKeys.visited = 0
+    model.set_filter(["t"])                       # not an extension: a full rescan
+    assert CountingKeys.visited == 5000
+    assert model.rowCount() == 5000 and model.item(0)["id"] == 0